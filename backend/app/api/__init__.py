@@ -4,7 +4,8 @@ from app.api.routes import (
     topics_router,
     user_router,
     card_router,
-    explanation_router
+    explanation_router,
+    learning_router,
 )
 
 api_router = APIRouter()
@@ -14,3 +15,4 @@ api_router.include_router(topics_router)
 api_router.include_router(user_router)
 api_router.include_router(card_router)
 api_router.include_router(explanation_router)
+api_router.include_router(learning_router)
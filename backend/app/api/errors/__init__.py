@@ -5,15 +5,17 @@ from .exceptions import (
     NotFoundException,
     ConflictException,
     UnprocessableEntityException,
-    InternalServerErrorException
+    InternalServerErrorException,
+    ServiceUnavailableException,
 )
 
 __all__ = [
     "BadRequestException",
-    "UnauthorizedException", 
+    "UnauthorizedException",
     "ForbiddenException",
     "NotFoundException",
     "ConflictException",
     "UnprocessableEntityException",
-    "InternalServerErrorException"
-]
\ No newline at end of file
+    "InternalServerErrorException",
+    "ServiceUnavailableException",
+]
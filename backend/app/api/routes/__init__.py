@@ -3,11 +3,13 @@ from .topics import router as topics_router
 from .user import router as user_router
 from .card import router as card_router
 from .explanation import router as explanation_router
+from .learning import router as learning_router
 
 __all__ = [
     "auth_router",
     "topics_router",
     "user_router",
     "card_router",
-    "explanation_router"
+    "explanation_router",
+    "learning_router",
 ]
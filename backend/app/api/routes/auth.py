@@ -7,7 +7,10 @@ from app.config import get_db
 from app.models import User
 from app.schemas.user import Token, UserCreate, UserResponse
 from app.config.settings import settings
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import password_hasher, create_access_token, token_claims_cache
+from app.core.dependencies import get_current_user
+from app.core.exceptions import ServiceOverloadedError
+from app.api.errors import ServiceUnavailableException
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
@@ -37,7 +40,13 @@ async def register(user_create: UserCreate, db: AsyncSession = Depends(get_db)):
             detail="Email or username already registered"
         )
 
-    hashed_password = get_password_hash(user_create.password)
+    try:
+        hashed_password = await password_hasher.hash(user_create.password)
+    except ServiceOverloadedError:
+        raise ServiceUnavailableException(
+            detail="Too many concurrent registrations, please retry shortly"
+        )
+
     db_user = User(
         email=user_create.email,
         username=user_create.username,
@@ -64,7 +73,16 @@ async def login(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        password_is_valid = bool(user) and await password_hasher.verify(
+            form_data.password, user.hashed_password
+        )
+    except ServiceOverloadedError:
+        raise ServiceUnavailableException(
+            detail="Too many concurrent logins, please retry shortly"
+        )
+
+    if not password_is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -80,3 +98,11 @@ async def login(
     )
 
     return Token(access_token=access_token, token_type="bearer")
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(oauth2_scheme), current_user: User = Depends(get_current_user)
+):
+    """Revoke the access token used for this request on every worker"""
+    await token_claims_cache.revoke_token(token)
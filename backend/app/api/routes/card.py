@@ -1,14 +1,8 @@
 from typing import List, Optional
-from fastapi import (
-    APIRouter,
-    Depends,
-    HTTPException,
-    Query,
-    status,
-    Response
-)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import and_, bindparam, select
 from sqlalchemy.orm import selectinload
 
 from app.config import get_db
@@ -17,12 +11,115 @@ from app.schemas.card import (
     SaveCardRequest,
     SavedCardResponse
 )
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_read_db, read_session_factory
 from app.services.card import CardService
-from app.core.exceptions import NotFoundError
+from app.core.db import (
+    DBOperationOptions,
+    decode_cursor,
+    encode_cursor,
+    fetch_keyset_page,
+    keyset_order_by,
+    keyset_segments,
+)
+from app.core.counters import card_counters
+from app.core.exceptions import NotFoundError, ValidationError
+from app.core.export import EXPORT_BATCH_SIZE, ndjson_response, stream_in_session
+from app.core.repository import Repository
 
 router = APIRouter(prefix="/cards", tags=["cards"])
 
+saved_card_repository = Repository(SavedCard)
+
+
+# The /saved routes are registered before /{card_id}, which would otherwise
+# match "saved" as a card id
+@router.get("/saved", response_model=List[SavedCardResponse])
+async def get_saved_cards(
+    response: Response,
+    folder: Optional[str] = Query(None),
+    tag: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor value from the previous page"
+    ),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get user's saved cards, newest first
+
+    Pages are keyed on (saved_at, id) of the last row, so every page costs
+    the same; follow the X-Next-Cursor header to get the next one. A skip
+    without a cursor offsets into the same order; skip is ignored once a
+    cursor is given.
+    """
+    query = (
+        select(SavedCard)
+        .options(selectinload(SavedCard.card))
+        .where(SavedCard.user_id == current_user.id)
+    )
+
+    if folder:
+        query = query.where(SavedCard.folder == folder)
+
+    if tag:
+        query = query.where(SavedCard.tags.contains([tag]))
+
+    keyset_columns = [SavedCard.saved_at, SavedCard.id]
+    try:
+        cursor_values = decode_cursor(cursor, 2, keyset_columns) if cursor else None
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+    if skip and cursor_values is None:
+        segments = [
+            query.order_by(*keyset_order_by(keyset_columns, descending=True)).offset(
+                skip
+            )
+        ]
+    else:
+        segments = keyset_segments(
+            query, keyset_columns, cursor_values, descending=True
+        )
+    saved_cards = await fetch_keyset_page(
+        db, [segment.limit(bindparam("limit")) for segment in segments], limit
+    )
+
+    if len(saved_cards) > limit:
+        saved_cards = saved_cards[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            [saved_cards[-1].saved_at, saved_cards[-1].id]
+        )
+
+    return saved_cards
+
+
+@router.get("/saved/export", response_class=StreamingResponse)
+async def export_saved_cards(
+    request: Request,
+    folder: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Export all of the user's saved cards as NDJSON, oldest first
+
+    Rows are streamed from a server-side cursor in a session opened for the
+    response body, gzip-compressed when the client accepts it.
+    """
+    filters = {"user_id": current_user.id}
+    if folder:
+        filters["folder"] = folder
+
+    saved_card_batches = stream_in_session(
+        await read_session_factory(current_user.id),
+        saved_card_repository,
+        DBOperationOptions(
+            filters=filters, sort_by="saved_at", batch_size=EXPORT_BATCH_SIZE
+        ),
+    )
+    return ndjson_response(request, saved_card_batches, "saved_cards.ndjson")
+
 
 @router.get("/{card_id}")
 async def get_card(
@@ -32,7 +129,7 @@ async def get_card(
     """Get a specific card by ID"""
     try:
         card = await CardService.get_card_by_id(db, card_id)
-        return card
+        return await card_counters.overlay(card)
     except NotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -74,33 +171,3 @@ async def unsave_card(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Error in deleting card with the error: {e.message}"
         )
-
-
-@router.get("/saved", response_model=List[SavedCardResponse])
-async def get_saved_cards(
-    folder: Optional[str] = Query(None),
-    tag: Optional[str] = Query(None),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get user's saved cards"""
-    query = (
-        select(SavedCard)
-        .options(selectinload(SavedCard.card))
-        .where(SavedCard.user_id == current_user.id)
-    )
-
-    if folder:
-        query = query.where(SavedCard.folder == folder)
-
-    if tag:
-        query = query.where(SavedCard.tags.contains([tag]))
-
-    query = query.order_by(SavedCard.saved_at.desc()).offset(skip).limit(limit)
-
-    result = await db.execute(query)
-    saved_cards = result.scalars().all()
-
-    return saved_cards
@@ -1,22 +1,37 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, and_, func
-from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.config.database import get_db
-from app.models import User, Topic, Card, LearningSession, CardInteraction
+from app.models import User, Topic, LearningSession, CardInteraction
 from app.schemas.learning import (
     StartSessionRequest, StartSessionResponse,
     CardResponse, SessionMetricsUpdate,
     SessionStatsResponse
 )
 from app.services.learning import LearningService
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_read_db, read_session_factory
+from app.core.cache import LRUCache
+from app.core.counters import card_counters, session_counters
+from app.core.db import DBOperationOptions
+from app.core.export import EXPORT_BATCH_SIZE, ndjson_response, stream_in_session
+from app.core.interaction_buffer import interaction_buffer
+from app.core.repository import Repository
+from app.core.session_stats import load_session_stats
+from app.core.trending import trending_topics
 
 router = APIRouter(prefix="/learning", tags=["learning"])
 
+card_interaction_repository = Repository(CardInteraction)
+
+# (session id, user id) pairs already checked by update_card_metrics; a
+# session never changes owner, so hits skip the lookup on the hot path
+_owned_sessions = LRUCache(max_size=10_000)
+
 
 @router.post("/start", response_model=StartSessionResponse)
 async def start_learning_session(
@@ -47,6 +62,9 @@ async def start_learning_session(
         user_id=current_user.id,
         mode=request.mode
     )
+    await trending_topics.record_activity(
+        [(topic.id, topic.category, settings.TRENDING_SESSION_WEIGHT)]
+    )
 
     return session_data
 
@@ -78,7 +96,7 @@ async def get_next_card(
     if not card:
         raise HTTPException(status_code=404, detail="No more cards available")
 
-    return card
+    return await card_counters.overlay(card)
 
 
 @router.post("/session/{session_id}/metrics")
@@ -88,41 +106,42 @@ async def update_card_metrics(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Update metrics for a viewed card"""
-    # Create interaction record
-    interaction = CardInteraction(
-        user_id=current_user.id,
-        card_id=metrics.card_id,
-        session_id=session_id,
-        time_spent_seconds=metrics.time_spent,
-        answer_revealed=metrics.answer_revealed,
-        action=metrics.action,
-        confidence_rating=metrics.confidence_rating
-    )
-    db.add(interaction)
-
-    # Update card statistics
-    await db.execute(
-        update(Card)
-        .where(Card.id == metrics.card_id)
-        .values(
-            total_views=Card.total_views + 1,
-            total_time_spent=Card.total_time_spent + metrics.time_spent
-        )
-    )
-
-    # Update session metrics
-    await db.execute(
-        update(LearningSession)
-        .where(LearningSession.id == session_id)
-        .values(
-            cards_viewed=LearningSession.cards_viewed + 1,
-            total_time_seconds=LearningSession.total_time_seconds + metrics.time_spent
+    """
+    Update metrics for a viewed card
+
+    The interaction is handed to the write-behind interaction buffer, which
+    stores it and updates the card and session counters in bulk; see
+    INTERACTION_DURABILITY for the guarantees. The session must exist and
+    belong to the current user; this is checked before anything is
+    buffered.
+    """
+    owner_key = (session_id, current_user.id)
+    if owner_key not in _owned_sessions:
+        result = await db.execute(
+            select(LearningSession.id).where(
+                and_(
+                    LearningSession.id == session_id,
+                    LearningSession.user_id == current_user.id,
+                )
+            )
         )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        _owned_sessions.set(owner_key, True)
+
+    await interaction_buffer.record(
+        db,
+        {
+            "user_id": current_user.id,
+            "card_id": metrics.card_id,
+            "session_id": session_id,
+            "time_spent_seconds": metrics.time_spent,
+            "answer_revealed": metrics.answer_revealed,
+            "action": metrics.action,
+            "confidence_rating": metrics.confidence_rating,
+        },
     )
 
-    await db.commit()
-
     return {"status": "updated"}
 
 
@@ -130,39 +149,29 @@ async def update_card_metrics(
 async def get_session_stats(
     session_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get detailed statistics for a learning session"""
-    result = await db.execute(
-        select(LearningSession)
-        .options(selectinload(LearningSession.card_interactions))
-        .where(
-            and_(
-                LearningSession.id == session_id,
-                LearningSession.user_id == current_user.id
-            )
-        )
-    )
-    session = result.scalar_one_or_none()
+    """
+    Get detailed statistics for a learning session
 
-    if not session:
+    The interaction totals come from one aggregate query over the session's
+    interactions (see load_session_stats), so no interaction rows are loaded.
+    """
+    session_stats = await load_session_stats(db, session_id, current_user.id)
+
+    if not session_stats:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Calculate stats
-    total_cards = len(session.card_interactions)
-    cards_mastered = sum(
-        1 for i in session.card_interactions if i.confidence_rating >= 4)
-    avg_time = sum(
-        i.time_spent_seconds for i in session.card_interactions) / max(total_cards, 1)
+    session = await session_counters.overlay(session_stats.session)
 
     return SessionStatsResponse(
         session_id=session_id,
         cards_viewed=session.cards_viewed,
-        cards_mastered=cards_mastered,
+        cards_mastered=session_stats.mastered_count,
         total_time_seconds=session.total_time_seconds,
-        average_time_per_card=avg_time,
-        completion_rate=(cards_mastered / max(total_cards, 1)) * 100,
-        engagement_score=session.engagement_score
+        average_time_per_card=session_stats.average_time_per_card,
+        completion_rate=session_stats.completion_rate,
+        engagement_score=session.engagement_score,
     )
 
 
@@ -186,3 +195,27 @@ async def end_learning_session(
     await db.commit()
 
     return {"status": "session ended"}
+
+
+@router.get("/interactions/export", response_class=StreamingResponse)
+async def export_card_interactions(
+    request: Request,
+    session_id: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Export the user's card interaction history as NDJSON, oldest first
+
+    Rows are streamed from a server-side cursor in a session opened for the
+    response body, gzip-compressed when the client accepts it.
+    """
+    filters = {"user_id": current_user.id}
+    if session_id:
+        filters["session_id"] = session_id
+
+    interaction_batches = stream_in_session(
+        await read_session_factory(current_user.id),
+        card_interaction_repository,
+        DBOperationOptions(filters=filters, batch_size=EXPORT_BATCH_SIZE),
+    )
+    return ndjson_response(request, interaction_batches, "card_interactions.ndjson")
@@ -1,43 +1,127 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.services.topics import TopicService
-from app.config.database import get_db
+from app.config.settings import settings
+from app.core.cache import cached
+from app.core.dependencies import get_read_db
 from app.schemas.topic import TopicResponse, TopicListResponse
 from app.core.db import DBOperationOptions
+from app.core.exceptions import ValidationError
+from app.core.repository import Repository
+from app.core.search import topic_search
+from app.core.trending import trending_topics
+from app.models import Topic
 
 router = APIRouter(prefix="/topics", tags=["topics"])
 
+topic_repository = Repository(Topic)
+
+TOPIC_KEYSET = ("name", "id")
+
 
 @router.get("/", response_model=TopicListResponse)
 async def get_topics(
+    response: Response,
     category: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor value from the previous page"
+    ),
+    db: AsyncSession = Depends(get_read_db),
 ) -> TopicListResponse:
-    """Get list of available topics"""
+    """
+    Get list of available topics
+
+    Pages are ordered by (name, id), topics without a name last, and keyed
+    on the last row, so every page costs the same; follow the X-Next-Cursor
+    header to get the next one. A skip without a cursor offsets into the
+    same order and filters (and still returns X-Next-Cursor); skip is
+    ignored once a cursor is given.
+
+    X-Total-Kind tells how total was obtained: "exact" or "approximate" (the
+    planner's estimate for very large results).
+
+    With search, topics whose name or description contains every word (the
+    last one of three or more letters as a prefix, for typeahead) come back
+    ranked by relevance from the full-text index and are paged with
+    skip/limit. Without a full-text index, search matches the whole text as
+    a substring of the name or description and pages like the plain listing.
+    """
+    if search:
+        search_results = await topic_search.search(db, search, category, skip, limit)
+        if search_results is not None:
+            topics, total = search_results
+            response.headers["X-Total-Kind"] = "exact"
+            return TopicListResponse(topics=topics, total=total, skip=skip, limit=limit)
+
+    filters = {}
+    if category:
+        filters["category"] = category
+    if search:
+        filters["name|description__icontains"] = search
+    options = DBOperationOptions(skip=skip, limit=limit, filters=filters)
 
-    topics, total = await TopicService.get_topics(
-        db, category, search, options=DBOperationOptions(
-            skip=skip,
-            limit=limit
+    try:
+        topics, next_cursor = await topic_repository.list_keyset(
+            db, TOPIC_KEYSET, options, cursor
         )
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+    total_count = await topic_repository.count_total(db, options)
+
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["X-Total-Kind"] = (
+        "approximate" if total_count.approximate else "exact"
     )
 
     return TopicListResponse(
-        topics=topics,
-        total=total,
-        skip=skip,
-        limit=limit
+        topics=topics, total=total_count.value, skip=skip, limit=limit
     )
 
 
 @router.get("/trending", response_model=list[TopicResponse])
 async def get_trending_topics(
     limit: int = Query(10, ge=1, le=50),
-    db: AsyncSession = Depends(get_db)
+    category: Optional[str] = Query(
+        None, description="Only rank topics in this category"
+    ),
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[TopicResponse]:
-    """Get trending topics based on recent activity"""
-    return await TopicService.get_trending_topics(db, limit)
+    """
+    Get trending topics based on recent activity
+
+    Ranked by exponentially decayed activity (session starts and card
+    interactions, see TRENDING_HALF_LIFE_SECONDS) from precomputed
+    leaderboards, so only the returned topics are read from the database.
+    Falls back to ranking topics by session count, filtered by category in
+    the query, while the leaderboards are unavailable or still empty. The
+    result is cached per limit and category for TRENDING_CACHE_TTL seconds.
+    """
+    return await get_trending_topic_rows(db, limit, category)
+
+
+@cached(
+    "trending:{limit}:{category}",
+    ttl_seconds=settings.TRENDING_CACHE_TTL,
+    namespace="topics",
+)
+async def get_trending_topic_rows(
+    db: AsyncSession, limit: int, category: Optional[str]
+) -> list[dict]:
+    """Trending topics as response rows, shared by all callers for TRENDING_CACHE_TTL"""
+    trending = await trending_topics.top_topics(limit, category)
+    if not trending:
+        topics = await trending_topics.fallback_topics(db, limit, category)
+    else:
+        topic_ids = [topic_id for topic_id, _ in trending]
+        result = await db.execute(select(Topic).where(Topic.id.in_(topic_ids)))
+        topics_by_id = {topic.id: topic for topic in result.scalars()}
+        topics = [
+            topics_by_id[topic_id] for topic_id in topic_ids if topic_id in topics_by_id
+        ]
+
+    return [TopicResponse.model_validate(topic).model_dump() for topic in topics]
@@ -5,6 +5,8 @@ from app.config import get_db
 from app.models import User
 from app.schemas.user import UserResponse, UserUpdate, UserPreferencesUpdate
 from app.core.dependencies import get_current_user
+from app.core.user_cache import user_cache
+from app.core.security import token_claims_cache
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -30,6 +32,9 @@ async def update_user_profile(
         setattr(current_user, field, value)
 
     await db.commit()
+    await user_cache.invalidate(current_user.id)
+    if update_data.get("is_active") is False:
+        await token_claims_cache.revoke_subject(current_user.id)
     await db.refresh(current_user)
 
     return current_user
@@ -48,6 +53,9 @@ async def update_user_preferences(
         setattr(current_user, field, value)
 
     await db.commit()
+    await user_cache.invalidate(current_user.id)
+    if update_data.get("is_active") is False:
+        await token_claims_cache.revoke_subject(current_user.id)
     await db.refresh(current_user)
 
     return current_user
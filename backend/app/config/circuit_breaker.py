@@ -0,0 +1,115 @@
+import time
+from enum import Enum
+from typing import Any, Dict
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for a remote dependency.
+
+    - Closed: calls go through; failure_threshold consecutive failures trip
+      the breaker.
+    - Open: calls are refused immediately, so callers take their fallback
+      path without paying a timeout.
+    - Half-open: a single health probe is in flight. Its success closes the
+      breaker; its failure reopens it with the retry delay doubled (capped at
+      max_reset_timeout_seconds).
+
+    The breaker only tracks state; whoever owns it runs the probe (see
+    RedisClient). It is not thread-safe and is meant to be used from one
+    event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout_seconds: float = 1.0,
+        max_reset_timeout_seconds: float = 30.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.max_reset_timeout_seconds = max_reset_timeout_seconds
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._retry_delay_seconds = reset_timeout_seconds
+        self._opened_at = 0.0
+        self.trips = 0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls should bypass the dependency (open or probing)"""
+        return self._state != CircuitState.CLOSED
+
+    @property
+    def retry_delay_seconds(self) -> float:
+        """How long to wait before the next health probe"""
+        return self._retry_delay_seconds
+
+    def allow_request(self) -> bool:
+        """Whether a regular call may go through right now"""
+        if self._state == CircuitState.CLOSED:
+            return True
+        self.rejected_calls += 1
+        return False
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        if self._state != CircuitState.CLOSED:
+            self._state = CircuitState.CLOSED
+            self._retry_delay_seconds = self.reset_timeout_seconds
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if this call tripped the breaker"""
+        self._consecutive_failures += 1
+        if self._state == CircuitState.HALF_OPEN:
+            self._retry_delay_seconds = min(
+                self._retry_delay_seconds * 2, self.max_reset_timeout_seconds
+            )
+            self._open()
+            return False
+        if (
+            self._state == CircuitState.CLOSED
+            and self._consecutive_failures >= self.failure_threshold
+        ):
+            self.trip()
+            return True
+        return False
+
+    def trip(self) -> None:
+        """Open the breaker right away (e.g. when the initial connection fails)"""
+        if self._state == CircuitState.CLOSED:
+            self.trips += 1
+        self._open()
+
+    def begin_probe(self) -> None:
+        """Move to half-open for the duration of a health probe"""
+        self._state = CircuitState.HALF_OPEN
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state and trip/rejection counters"""
+        return {
+            "state": self._state.value,
+            "consecutive_failures": self._consecutive_failures,
+            "trips": self.trips,
+            "rejected_calls": self.rejected_calls,
+            "open_for_seconds": (
+                (time.monotonic() - self._opened_at) if self.is_open else 0.0
+            ),
+        }
@@ -1,31 +1,151 @@
+import time
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import MetaData
-from typing import AsyncGenerator
+from sqlalchemy import Index, MetaData, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, Tuple
 from loguru import logger
 
-from app.config.settings import settings
+from app.config.read_your_writes import read_your_writes
+from app.config.settings import Environment, settings
 
 
 DATABASE_URL = settings.DATABASE_URL
 
 
-engine = create_async_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.DATABASE_ECHO
+# Pool defaults per environment; any DB_POOL_* setting that is set wins.
+# Pre-ping costs a round trip per checkout, so production relies on
+# pool_recycle plus SQLAlchemy's invalidate-on-disconnect instead.
+POOL_DEFAULTS: Dict[Environment, Dict[str, Any]] = {
+    Environment.DEVELOPMENT: {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 10.0,
+        "pool_pre_ping": True,
+    },
+    Environment.TESTING: {
+        "pool_size": 2,
+        "max_overflow": 0,
+        "pool_timeout": 5.0,
+        "pool_pre_ping": False,
+    },
+    Environment.PRODUCTION: {
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 3.0,
+        "pool_pre_ping": False,
+    },
+}
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that reports how long each checkout waited for a connection.
+
+    Set checkout_observer to a callable taking (wait_seconds, timed_out) to
+    record pool waits (used by the metrics layer).
+    """
+
+    checkout_observer: Optional[Callable[[float, bool], None]] = None
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.checkout_observer is not None:
+                self.checkout_observer(time.perf_counter() - start_time, timed_out)
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """
+    Keyword arguments for create_async_engine, from settings.
+
+    SQLite keeps SQLAlchemy's default pool (pool sizing does not apply to
+    it); asyncpg additionally gets its prepared statement cache size.
+    """
+    options: Dict[str, Any] = {"echo": settings.DATABASE_ECHO}
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    pool_defaults = POOL_DEFAULTS[settings.ENVIRONMENT]
+    configured_pool_options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    for option_name, configured_value in configured_pool_options.items():
+        options[option_name] = (
+            pool_defaults[option_name] if configured_value is None else configured_value
+        )
+
+    options["poolclass"] = TimedQueuePool
+    options["pool_recycle"] = settings.DB_POOL_RECYCLE
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+        }
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+# Read-only routes use the replica when one is configured; otherwise both
+# names refer to the primary engine
+READ_REPLICA_URL = settings.DATABASE_READ_REPLICA_URL
+read_engine = (
+    create_async_engine(READ_REPLICA_URL, **engine_options(READ_REPLICA_URL))
+    if READ_REPLICA_URL
+    else engine
 )
 
 
+class PrimarySession(Session):
+    """
+    Session class for the primary database.
+
+    Sessions tagged with info["writer_id"] (get_current_user does this)
+    record a read-your-writes marker whenever they commit.
+    """
+
+    pass
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _record_committed_write(session: Session) -> None:
+    writer_id = session.info.get("writer_id")
+    if writer_id is not None and has_read_replica():
+        read_your_writes.mark_write_local(writer_id)
+        session.info["committed_writer_id"] = writer_id
+
+
 AsyncSessionLocal = async_sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine,
-    class_=AsyncSession
+    class_=AsyncSession,
+    sync_session_class=PrimarySession,
+)
+
+
+ReadSessionLocal = async_sessionmaker(
+    autocommit=False, autoflush=False, bind=read_engine, class_=AsyncSession
 )
 
 
+def has_read_replica() -> bool:
+    return read_engine is not engine
+
+
 Base = declarative_base()
 
 
@@ -45,6 +165,35 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+            committed_writer_id = session.info.pop("committed_writer_id", None)
+            if committed_writer_id is not None and has_read_replica():
+                await read_your_writes.mark_write(committed_writer_id)
+
+
+# Composite indexes backing keyset pagination and per-session aggregates:
+# (table, index name, columns). The leading equality filter comes first,
+# then the keyset or aggregated columns.
+COMPOSITE_INDEXES: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = (
+    ("saved_cards", "ix_saved_cards_user_saved_at_id", ("user_id", "saved_at", "id")),
+    ("topics", "ix_topics_name_id", ("name", "id")),
+    ("topics", "ix_topics_category_name_id", ("category", "name", "id")),
+    (
+        "card_interactions",
+        "ix_card_interactions_session_stats",
+        ("session_id", "confidence_rating", "time_spent_seconds"),
+    ),
+)
+
+
+def _create_composite_indexes(sync_connection) -> None:
+    for table_name, index_name, column_names in COMPOSITE_INDEXES:
+        table = Base.metadata.tables.get(table_name)
+        if table is None or any(index.name == index_name for index in table.indexes):
+            continue
+        composite_index = Index(
+            index_name, *[table.c[column_name] for column_name in column_names]
+        )
+        composite_index.create(sync_connection, checkfirst=True)
 
 
 async def create_tables():
@@ -53,6 +202,7 @@ async def create_tables():
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_composite_indexes)
     logger.info("Database tables created")
 
 
@@ -70,4 +220,6 @@ async def close_db():
     Close database engine
     """
     await engine.dispose()
+    if has_read_replica():
+        await read_engine.dispose()
     logger.info("Database engine disposed")
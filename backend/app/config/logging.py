@@ -0,0 +1,184 @@
+import queue
+import random
+import sys
+import threading
+from typing import Any, Dict, List, Optional, TextIO
+
+from loguru import logger
+
+from app.config.settings import settings
+
+
+class BatchedLogSink:
+    """
+    Non-blocking loguru sink.
+
+    Formatted records are pushed onto a bounded in-memory queue and written by
+    a background thread in batches, so logging never waits on stderr from the
+    event loop. When the queue is full new records are dropped and counted
+    rather than applying back-pressure to request handling.
+
+    Note:
+        attach() starts the writer and registers the sink with loguru
+        (setup_logging does this); stop() on shutdown unregisters it and
+        flushes whatever is still queued, so records logged afterwards are
+        not queued with nobody left to write them.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        stream: TextIO = sys.stderr,
+        max_queue_size: int = settings.LOG_QUEUE_SIZE,
+        batch_size: int = settings.LOG_BATCH_SIZE,
+        flush_interval_seconds: float = settings.LOG_FLUSH_INTERVAL,
+    ):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._writer_thread: Optional[threading.Thread] = None
+        self._handler_id: Optional[int] = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def __call__(self, message: str) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """Start the background writer thread"""
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            return
+
+        self._writer_thread = threading.Thread(
+            target=self._write_batches, name="log-writer", daemon=True
+        )
+        self._writer_thread.start()
+
+    def attach(self, **handler_options: Any) -> None:
+        """Start the writer and add this sink to loguru with the given logger.add() options"""
+        self.start()
+        if self._handler_id is None:
+            self._handler_id = logger.add(self, **handler_options)
+
+    def stop(self, timeout_seconds: float = 5.0) -> None:
+        """Remove the sink from loguru, flush queued records and stop the writer thread"""
+        if self._handler_id is not None:
+            logger.remove(self._handler_id)
+            self._handler_id = None
+
+        if self._writer_thread is None:
+            return
+
+        self._queue.put(self._STOP)
+        self._writer_thread.join(timeout_seconds)
+        self._writer_thread = None
+
+    def _write_batches(self) -> None:
+        while True:
+            try:
+                first_record = self._queue.get(timeout=self.flush_interval_seconds)
+            except queue.Empty:
+                continue
+
+            batch: List[str] = []
+            stop_requested = first_record is self._STOP
+            if not stop_requested:
+                batch.append(first_record)
+
+            while len(batch) < self.batch_size and not stop_requested:
+                try:
+                    next_record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_record is self._STOP:
+                    stop_requested = True
+                else:
+                    batch.append(next_record)
+
+            if batch:
+                self._flush(batch)
+
+            if stop_requested:
+                self._drain()
+                return
+
+    def _drain(self) -> None:
+        remaining: List[str] = []
+        while True:
+            try:
+                next_record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if next_record is not self._STOP:
+                remaining.append(next_record)
+        if remaining:
+            self._flush(remaining)
+
+    def _flush(self, batch: List[str]) -> None:
+        try:
+            self.stream.write("".join(batch))
+            self.stream.flush()
+            self.written += len(batch)
+            self.batches += 1
+        except Exception:
+            self.dropped += len(batch)
+
+    def stats(self) -> Dict[str, int]:
+        """Written/dropped record counters and current queue depth"""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+        }
+
+
+class AccessLogSampler:
+    """
+    Decides which access log records to keep, by response status class.
+
+    Rates come from settings.ACCESS_LOG_SAMPLE_RATES, keyed by "2xx", "3xx",
+    "4xx" and "5xx"; status classes without a rate are always logged.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None):
+        rates = (
+            sample_rates
+            if sample_rates is not None
+            else settings.ACCESS_LOG_SAMPLE_RATES
+        )
+        self._rates_by_class = {
+            int(status_class[0]): rate for status_class, rate in rates.items()
+        }
+        self.sampled_out = 0
+
+    def should_log(self, status_code: int) -> bool:
+        rate = self._rates_by_class.get(status_code // 100, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+log_sink = BatchedLogSink()
+
+
+def setup_logging() -> None:
+    """
+    Route all loguru output through the batched sink.
+
+    Records are serialized as JSON lines when LOG_JSON is enabled.
+    """
+    logger.remove()
+    log_sink.attach(
+        level=settings.LOG_LEVEL,
+        serialize=settings.LOG_JSON,
+        backtrace=False,
+        diagnose=False,
+    )
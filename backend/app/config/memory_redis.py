@@ -0,0 +1,1201 @@
+import asyncio
+import fnmatch
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from urllib.parse import parse_qs, urlparse
+
+from redis.exceptions import ResponseError
+
+from app.config.settings import settings
+
+IN_MEMORY_URL_SCHEME = "redis+memory"
+
+# Rough per-key bookkeeping overhead, so many tiny keys still count towards the cap
+KEY_OVERHEAD_BYTES = 64
+
+WRONG_TYPE_MESSAGE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+
+def _to_bytes(value: Any) -> bytes:
+    """Encode a value the way redis-py sends it to the server"""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    if isinstance(value, float):
+        return repr(value).encode()
+    return str(value).encode()
+
+
+def _key_name(key: Any) -> str:
+    return key.decode() if isinstance(key, bytes) else str(key)
+
+
+def _value_size(value: Any) -> int:
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, MemoryStream):
+        return value.size_bytes
+    if isinstance(value, MemoryHash):
+        return sum(
+            len(field) + len(field_value) for field, field_value in value.items()
+        )
+    if isinstance(value, dict):
+        return sum(len(member) + 8 for member in value)
+    return sum(len(member) for member in value)
+
+
+class MemoryHash(dict):
+    """Field -> value mapping of a hash key (kept distinct from sorted sets, which are plain dicts)"""
+
+    pass
+
+
+StreamId = Tuple[int, int]
+
+
+def _format_stream_id(stream_id: StreamId) -> bytes:
+    return f"{stream_id[0]}-{stream_id[1]}".encode()
+
+
+def _parse_stream_id(raw_id: Any, missing_sequence: int = 0) -> StreamId:
+    milliseconds, _, sequence = _key_name(raw_id).partition("-")
+    try:
+        return int(milliseconds), int(sequence) if sequence else missing_sequence
+    except ValueError:
+        raise ResponseError(
+            "ERR Invalid stream ID specified as stream command argument"
+        )
+
+
+class MemoryConsumerGroup:
+    """Delivery cursor and pending entries list (PEL) of one consumer group"""
+
+    def __init__(self, last_delivered_id: StreamId):
+        self.last_delivered_id = last_delivered_id
+        # entry id -> (consumer name, delivery time in ms)
+        self.pending: Dict[StreamId, Tuple[str, int]] = {}
+
+
+class MemoryStream:
+    """Append-only entries of a stream key, plus its consumer groups"""
+
+    def __init__(self):
+        self.entries: "OrderedDict[StreamId, Dict[bytes, bytes]]" = OrderedDict()
+        self.last_id: StreamId = (0, 0)
+        self.groups: Dict[str, MemoryConsumerGroup] = {}
+        self.size_bytes = 0
+
+    def next_id(self) -> StreamId:
+        now_milliseconds = int(time.time() * 1000)
+        if now_milliseconds > self.last_id[0]:
+            return now_milliseconds, 0
+        return self.last_id[0], self.last_id[1] + 1
+
+    def append(self, entry_id: StreamId, fields: Dict[bytes, bytes]) -> None:
+        self.entries[entry_id] = fields
+        self.last_id = entry_id
+        self.size_bytes += (
+            sum(len(field) + len(value) for field, value in fields.items()) + 16
+        )
+
+    def remove(self, entry_id: StreamId) -> bool:
+        fields = self.entries.pop(entry_id, None)
+        if fields is None:
+            return False
+        self.size_bytes -= (
+            sum(len(field) + len(value) for field, value in fields.items()) + 16
+        )
+        return True
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel for key expiry.
+
+    Keys are bucketed by deadline tick, so expiring due keys only visits the
+    buckets for ticks that have passed since the last advance instead of
+    scanning every key with a TTL. A bucket may also hold keys due in a later
+    revolution (or whose TTL changed); those are skipped or dropped when the
+    bucket is visited.
+    """
+
+    def __init__(self, slot_count: int = 1024, resolution_seconds: float = 0.1):
+        self.slot_count = slot_count
+        self.resolution_seconds = resolution_seconds
+        self._slots: List[Set[str]] = [set() for _ in range(slot_count)]
+        self._current_tick = self._tick(time.monotonic())
+
+    def _tick(self, timestamp: float) -> int:
+        return int(timestamp / self.resolution_seconds)
+
+    def schedule(self, key: str, deadline: float) -> None:
+        self._slots[self._tick(deadline) % self.slot_count].add(key)
+
+    def pop_expired(self, now: float, deadlines: Dict[str, float]) -> List[str]:
+        """Keys whose deadline in `deadlines` has passed, from the ticks elapsed so far"""
+        now_tick = self._tick(now)
+        if now_tick <= self._current_tick:
+            return []
+
+        first_tick = max(self._current_tick, now_tick - self.slot_count)
+        self._current_tick = now_tick
+
+        expired_keys = []
+        for tick in range(first_tick, now_tick):
+            slot_index = tick % self.slot_count
+            slot = self._slots[slot_index]
+            for key in list(slot):
+                deadline = deadlines.get(key)
+                if (
+                    deadline is None
+                    or self._tick(deadline) % self.slot_count != slot_index
+                ):
+                    slot.discard(key)
+                elif deadline <= now:
+                    slot.discard(key)
+                    expired_keys.append(key)
+        return expired_keys
+
+
+class MemoryKeyspace:
+    """
+    Synchronous Redis data model: strings, hashes, sets, sorted sets and streams.
+
+    Keys expire lazily on access and eagerly through a timer wheel. Memory use
+    is estimated from key and value sizes; once it exceeds max_memory_bytes
+    the least recently used keys with a TTL are evicted, like Redis'
+    volatile-lru policy. Keys under no_evict_prefixes are never evicted even
+    if they have a TTL. When nothing evictable is left the cap is exceeded
+    rather than data dropped.
+
+    Method names and return types follow redis-py with decode_responses=False,
+    so values come back as bytes.
+    """
+
+    MAX_OPEN_SCANS = 64
+
+    def __init__(
+        self,
+        max_memory_bytes: int,
+        timer_resolution_seconds: float = 0.1,
+        no_evict_prefixes: Sequence[str] = (),
+    ):
+        self.max_memory_bytes = max_memory_bytes
+        self.no_evict_prefixes = tuple(no_evict_prefixes)
+        self._values: "OrderedDict[str, Any]" = OrderedDict()
+        # Eviction candidates (keys with a TTL, outside no_evict_prefixes) in LRU order
+        self._evictable: "OrderedDict[str, None]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._timer_wheel = TimerWheel(resolution_seconds=timer_resolution_seconds)
+        self._open_scans: "OrderedDict[int, List[Any]]" = OrderedDict()
+        self._scan_ids = itertools.count(1)
+        self.memory_used = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def expire_due_keys(self) -> None:
+        now = time.monotonic()
+        for key in self._timer_wheel.pop_expired(now, self._deadlines):
+            self._remove(key)
+            self.expirations += 1
+
+    def _lookup(self, key: Any, expected_type: Optional[type] = None) -> Any:
+        key = _key_name(key)
+        deadline = self._deadlines.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+
+        value = self._values.get(key)
+        if value is None:
+            return None
+        if expected_type is not None and type(value) is not expected_type:
+            raise ResponseError(WRONG_TYPE_MESSAGE)
+        self._touch(key)
+        return value
+
+    def _touch(self, key: str) -> None:
+        self._values.move_to_end(key)
+        if key in self._evictable:
+            self._evictable.move_to_end(key)
+
+    def _is_live(self, key: str) -> bool:
+        """Whether a key exists, without touching its LRU position"""
+        if key not in self._values:
+            return False
+        deadline = self._deadlines.get(key)
+        return deadline is None or deadline > time.monotonic()
+
+    def _store(self, key: str, value: Any, keep_ttl: bool = False) -> None:
+        if key in self._values:
+            self._touch(key)
+        self._values[key] = value
+        if not keep_ttl:
+            self._deadlines.pop(key, None)
+            self._evictable.pop(key, None)
+        self._resize(key)
+
+    def _resize(self, key: str) -> None:
+        new_size = len(key) + _value_size(self._values[key]) + KEY_OVERHEAD_BYTES
+        self.memory_used += new_size - self._sizes.get(key, 0)
+        self._sizes[key] = new_size
+        self._evict_if_needed(keep_key=key)
+
+    def _remove(self, key: str) -> bool:
+        if key not in self._values:
+            return False
+        del self._values[key]
+        self._deadlines.pop(key, None)
+        self._evictable.pop(key, None)
+        self.memory_used -= self._sizes.pop(key, 0)
+        return True
+
+    def _evict_if_needed(self, keep_key: str) -> None:
+        while self.memory_used > self.max_memory_bytes and self._evictable:
+            oldest_key = next(iter(self._evictable))
+            if oldest_key == keep_key:
+                if len(self._evictable) == 1:
+                    return
+                self._evictable.move_to_end(oldest_key)
+                continue
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _set_deadline(self, key: str, ttl_seconds: float) -> None:
+        deadline = time.monotonic() + ttl_seconds
+        self._deadlines[key] = deadline
+        self._timer_wheel.schedule(key, deadline)
+        if not key.startswith(self.no_evict_prefixes):
+            self._evictable[key] = None
+            self._evictable.move_to_end(key)
+
+    def _remaining_ttl(self, key: str) -> Optional[float]:
+        deadline = self._deadlines.get(key)
+        return None if deadline is None else deadline - time.monotonic()
+
+    def _scan_page(
+        self, cursor: int, snapshot: Callable[[], List[Any]], count: Optional[int]
+    ) -> Tuple[int, List[Any]]:
+        """
+        Serve one page of a cursor scan from a snapshot taken on the first call.
+
+        Deleting entries between calls never makes the scan skip the others.
+        """
+        remaining = self._open_scans.pop(cursor, None) if cursor else None
+        if remaining is None:
+            remaining = snapshot()
+
+        page_size = count or 10
+        page, remaining = remaining[:page_size], remaining[page_size:]
+        if not remaining:
+            return 0, page
+
+        next_cursor = next(self._scan_ids)
+        self._open_scans[next_cursor] = remaining
+        while len(self._open_scans) > self.MAX_OPEN_SCANS:
+            self._open_scans.popitem(last=False)
+        return next_cursor, page
+
+    def ping(self) -> bool:
+        return True
+
+    def time(self) -> Tuple[int, int]:
+        now = time.time()
+        return int(now), int((now % 1) * 1_000_000)
+
+    def dbsize(self) -> int:
+        return len(self._values)
+
+    def flushdb(self) -> bool:
+        self._values.clear()
+        self._sizes.clear()
+        self._deadlines.clear()
+        self._evictable.clear()
+        self.memory_used = 0
+        return True
+
+    def delete(self, *names: Any) -> int:
+        return sum(
+            self._remove(_key_name(name))
+            for name in names
+            if self._lookup(name) is not None
+        )
+
+    unlink = delete
+
+    def exists(self, *names: Any) -> int:
+        return sum(1 for name in names if self._lookup(name) is not None)
+
+    def rename(self, src: Any, dst: Any) -> bool:
+        value = self._lookup(src)
+        if value is None:
+            raise ResponseError("ERR no such key")
+        source_key, destination_key = _key_name(src), _key_name(dst)
+        deadline = self._deadlines.get(source_key)
+        self._remove(source_key)
+        self._remove(destination_key)
+        self._store(destination_key, value)
+        if deadline is not None:
+            self._set_deadline(destination_key, deadline - time.monotonic())
+        return True
+
+    def expire(
+        self,
+        name: Any,
+        seconds: int,
+        nx: bool = False,
+        xx: bool = False,
+        gt: bool = False,
+        lt: bool = False,
+    ) -> bool:
+        key = _key_name(name)
+        if self._lookup(key) is None:
+            return False
+
+        current_ttl = self._remaining_ttl(key)
+        if nx and current_ttl is not None:
+            return False
+        if xx and current_ttl is None:
+            return False
+        if gt and (current_ttl is None or seconds <= current_ttl):
+            return False
+        if lt and current_ttl is not None and seconds >= current_ttl:
+            return False
+
+        self._set_deadline(key, seconds)
+        return True
+
+    def ttl(self, name: Any) -> int:
+        key = _key_name(name)
+        if self._lookup(key) is None:
+            return -2
+        remaining_ttl = self._remaining_ttl(key)
+        return -1 if remaining_ttl is None else max(0, round(remaining_ttl))
+
+    def scan(
+        self,
+        cursor: int = 0,
+        match: Optional[Any] = None,
+        count: Optional[int] = None,
+        _type: Optional[str] = None,
+    ) -> Tuple[int, List[bytes]]:
+        pattern = _key_name(match) if match is not None else None
+        next_cursor, keys = self._scan_page(cursor, lambda: list(self._values), count)
+        return next_cursor, [
+            key.encode()
+            for key in keys
+            if (pattern is None or fnmatch.fnmatchcase(key, pattern))
+            and self._is_live(key)
+        ]
+
+    def get(self, name: Any) -> Optional[bytes]:
+        return self._lookup(name, bytes)
+
+    def mget(self, keys: Any, *args: Any) -> List[Optional[bytes]]:
+        names = [keys] if isinstance(keys, (str, bytes)) else list(keys)
+        names.extend(args)
+        values = []
+        for name in names:
+            value = self._lookup(name)
+            values.append(value if isinstance(value, bytes) else None)
+        return values
+
+    def set(
+        self,
+        name: Any,
+        value: Any,
+        ex: Optional[float] = None,
+        px: Optional[int] = None,
+        nx: bool = False,
+        xx: bool = False,
+        keepttl: bool = False,
+    ) -> Optional[bool]:
+        key = _key_name(name)
+        exists = self._lookup(key) is not None
+        if (nx and exists) or (xx and not exists):
+            return None
+
+        self._store(key, _to_bytes(value), keep_ttl=keepttl)
+        if ex is not None:
+            self._set_deadline(key, ex)
+        elif px is not None:
+            self._set_deadline(key, px / 1000)
+        return True
+
+    def setex(self, name: Any, seconds: int, value: Any) -> bool:
+        return self.set(name, value, ex=seconds)
+
+    def incrby(self, name: Any, amount: int = 1) -> int:
+        key = _key_name(name)
+        current_value = self._lookup(key, bytes)
+        try:
+            new_value = int(current_value or 0) + amount
+        except ValueError:
+            raise ResponseError("value is not an integer or out of range")
+        self._store(key, str(new_value).encode(), keep_ttl=True)
+        return new_value
+
+    incr = incrby
+
+    def _increment_hash_field(
+        self, name: Any, field_name: Any, increment: Callable[[bytes], bytes]
+    ) -> bytes:
+        key = _key_name(name)
+        fields = self._lookup(key, MemoryHash)
+        if fields is None:
+            fields = MemoryHash()
+            self._store(key, fields)
+
+        field = _to_bytes(field_name)
+        fields[field] = increment(fields.get(field, b"0"))
+        self._resize(key)
+        return fields[field]
+
+    def hincrby(self, name: Any, key: Any, amount: int = 1) -> int:
+        def increment(current_value: bytes) -> bytes:
+            try:
+                return str(int(current_value) + amount).encode()
+            except ValueError:
+                raise ResponseError("ERR hash value is not an integer")
+
+        return int(self._increment_hash_field(name, key, increment))
+
+    def hincrbyfloat(self, name: Any, key: Any, amount: float = 1.0) -> float:
+        def increment(current_value: bytes) -> bytes:
+            try:
+                return repr(float(current_value) + amount).encode()
+            except ValueError:
+                raise ResponseError("ERR hash value is not a float")
+
+        return float(self._increment_hash_field(name, key, increment))
+
+    def hget(self, name: Any, key: Any) -> Optional[bytes]:
+        fields = self._lookup(name, MemoryHash)
+        return None if fields is None else fields.get(_to_bytes(key))
+
+    def hgetall(self, name: Any) -> Dict[bytes, bytes]:
+        return dict(self._lookup(name, MemoryHash) or {})
+
+    def hdel(self, name: Any, *keys: Any) -> int:
+        key = _key_name(name)
+        fields = self._lookup(key, MemoryHash)
+        if fields is None:
+            return 0
+
+        removed_count = sum(
+            1 for field in keys if fields.pop(_to_bytes(field), None) is not None
+        )
+        if fields:
+            self._resize(key)
+        else:
+            self._remove(key)
+        return removed_count
+
+    def sadd(self, name: Any, *values: Any) -> int:
+        key = _key_name(name)
+        members = self._lookup(key, set)
+        if members is None:
+            members = set()
+            self._store(key, members)
+
+        added_count = 0
+        for value in values:
+            member = _to_bytes(value)
+            if member not in members:
+                members.add(member)
+                added_count += 1
+        self._resize(key)
+        return added_count
+
+    def srem(self, name: Any, *values: Any) -> int:
+        key = _key_name(name)
+        members = self._lookup(key, set)
+        if members is None:
+            return 0
+
+        removed_count = 0
+        for value in values:
+            member = _to_bytes(value)
+            if member in members:
+                members.discard(member)
+                removed_count += 1
+        if members:
+            self._resize(key)
+        else:
+            self._remove(key)
+        return removed_count
+
+    def smembers(self, name: Any) -> Set[bytes]:
+        return set(self._lookup(name, set) or ())
+
+    def spop(self, name: Any, count: Optional[int] = None) -> Any:
+        key = _key_name(name)
+        members = self._lookup(key, set)
+        if not members:
+            return [] if count is not None else None
+
+        popped_members = [members.pop() for _ in range(min(count or 1, len(members)))]
+        if members:
+            self._resize(key)
+        else:
+            self._remove(key)
+        return popped_members if count is not None else popped_members[0]
+
+    def sscan(
+        self,
+        name: Any,
+        cursor: int = 0,
+        match: Optional[Any] = None,
+        count: Optional[int] = None,
+    ) -> Tuple[int, List[bytes]]:
+        pattern = _to_bytes(match) if match is not None else None
+        next_cursor, members = self._scan_page(
+            cursor, lambda: list(self._lookup(name, set) or ()), count
+        )
+        if pattern is not None:
+            members = [
+                member
+                for member in members
+                if fnmatch.fnmatchcase(member.decode(), pattern.decode())
+            ]
+        return next_cursor, members
+
+    def zadd(
+        self,
+        name: Any,
+        mapping: Dict[Any, float],
+        nx: bool = False,
+        xx: bool = False,
+        gt: bool = False,
+        lt: bool = False,
+        incr: bool = False,
+    ) -> Any:
+        key = _key_name(name)
+        scores = self._lookup(key, dict)
+        if scores is None:
+            if xx:
+                return None if incr else 0
+            scores = {}
+            self._store(key, scores)
+
+        added_count = 0
+        new_score = None
+        for value, score in mapping.items():
+            member = _to_bytes(value)
+            current_score = scores.get(member)
+            if (nx and current_score is not None) or (xx and current_score is None):
+                continue
+
+            new_score = (current_score or 0.0) + float(score) if incr else float(score)
+            if current_score is not None and (
+                (gt and new_score <= current_score)
+                or (lt and new_score >= current_score)
+            ):
+                continue
+
+            if current_score is None:
+                added_count += 1
+            scores[member] = new_score
+
+        if scores:
+            self._resize(key)
+        else:
+            self._remove(key)
+        return new_score if incr else added_count
+
+    def zincrby(self, name: Any, amount: float, value: Any) -> float:
+        return self.zadd(name, {value: amount}, incr=True)
+
+    def zscore(self, name: Any, value: Any) -> Optional[float]:
+        scores = self._lookup(name, dict)
+        return None if scores is None else scores.get(_to_bytes(value))
+
+    def zcard(self, name: Any) -> int:
+        return len(self._lookup(name, dict) or ())
+
+    def zrem(self, name: Any, *values: Any) -> int:
+        key = _key_name(name)
+        scores = self._lookup(key, dict)
+        if scores is None:
+            return 0
+
+        removed_count = sum(
+            1 for value in values if scores.pop(_to_bytes(value), None) is not None
+        )
+        if scores:
+            self._resize(key)
+        else:
+            self._remove(key)
+        return removed_count
+
+    def zrange(
+        self,
+        name: Any,
+        start: int,
+        end: int,
+        desc: bool = False,
+        withscores: bool = False,
+    ) -> List[Any]:
+        scores = self._lookup(name, dict) or {}
+        member_count = len(scores)
+        start = max(0, start + member_count if start < 0 else start)
+        end = end + member_count if end < 0 else end
+
+        score_order = lambda member_and_score: (
+            member_and_score[1],
+            member_and_score[0],
+        )
+        if end + 1 < member_count // 2:
+            # Leaderboard reads: only the first end + 1 members need ordering
+            select_members = heapq.nlargest if desc else heapq.nsmallest
+            selected_members = select_members(end + 1, scores.items(), key=score_order)[
+                start:
+            ]
+        else:
+            ordered_members = sorted(scores.items(), key=score_order, reverse=desc)
+            selected_members = ordered_members[start : end + 1]
+        if withscores:
+            return selected_members
+        return [member for member, _ in selected_members]
+
+    def zrevrange(
+        self, name: Any, start: int, end: int, withscores: bool = False
+    ) -> List[Any]:
+        return self.zrange(name, start, end, desc=True, withscores=withscores)
+
+    def zremrangebyrank(self, name: Any, start: int, end: int) -> int:
+        members_to_remove = self.zrange(name, start, end)
+        return self.zrem(name, *members_to_remove) if members_to_remove else 0
+
+    def _stream_group(
+        self, name: Any, groupname: Any
+    ) -> Tuple[MemoryStream, MemoryConsumerGroup]:
+        stream = self._lookup(name, MemoryStream)
+        consumer_group = (
+            None if stream is None else stream.groups.get(_key_name(groupname))
+        )
+        if consumer_group is None:
+            raise ResponseError(
+                f"NOGROUP No such key '{_key_name(name)}' or consumer group '{_key_name(groupname)}'"
+            )
+        return stream, consumer_group
+
+    def xadd(
+        self,
+        name: Any,
+        fields: Dict[Any, Any],
+        id: Any = "*",
+        maxlen: Optional[int] = None,
+        approximate: bool = True,
+        nomkstream: bool = False,
+    ) -> Optional[bytes]:
+        key = _key_name(name)
+        stream = self._lookup(key, MemoryStream)
+        if stream is None:
+            if nomkstream:
+                return None
+            stream = MemoryStream()
+            self._store(key, stream)
+
+        entry_id = stream.next_id() if _key_name(id) == "*" else _parse_stream_id(id)
+        if entry_id <= stream.last_id:
+            raise ResponseError(
+                "ERR The ID specified in XADD is equal or smaller than the target stream top item"
+            )
+        stream.append(
+            entry_id,
+            {_to_bytes(field): _to_bytes(value) for field, value in fields.items()},
+        )
+        if maxlen is not None:
+            while len(stream.entries) > maxlen:
+                stream.remove(next(iter(stream.entries)))
+        self._resize(key)
+        return _format_stream_id(entry_id)
+
+    def xlen(self, name: Any) -> int:
+        stream = self._lookup(name, MemoryStream)
+        return 0 if stream is None else len(stream.entries)
+
+    def xdel(self, name: Any, *ids: Any) -> int:
+        key = _key_name(name)
+        stream = self._lookup(key, MemoryStream)
+        if stream is None:
+            return 0
+        removed_count = sum(
+            1 for entry_id in ids if stream.remove(_parse_stream_id(entry_id))
+        )
+        self._resize(key)
+        return removed_count
+
+    def xgroup_create(
+        self,
+        name: Any,
+        groupname: Any,
+        id: Any = "$",
+        mkstream: bool = False,
+        entries_read: Optional[int] = None,
+    ) -> bool:
+        key = _key_name(name)
+        stream = self._lookup(key, MemoryStream)
+        if stream is None:
+            if not mkstream:
+                raise ResponseError(
+                    "ERR The XGROUP subcommand requires the key to exist. "
+                    "Note that for CREATE you may want to use the MKSTREAM option to create an empty stream automatically."
+                )
+            stream = MemoryStream()
+            self._store(key, stream)
+
+        group_name = _key_name(groupname)
+        if group_name in stream.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        last_delivered_id = (
+            stream.last_id if _key_name(id) == "$" else _parse_stream_id(id)
+        )
+        stream.groups[group_name] = MemoryConsumerGroup(last_delivered_id)
+        return True
+
+    def xreadgroup(
+        self,
+        groupname: Any,
+        consumername: Any,
+        streams: Dict[Any, Any],
+        count: Optional[int] = None,
+        block: Optional[int] = None,
+        noack: bool = False,
+    ) -> List[Any]:
+        """
+        New entries (id ">") or this consumer's pending ones (any other id).
+
+        Never blocks: block is accepted for compatibility and ignored.
+        """
+        consumer_name = _key_name(consumername)
+        now_milliseconds = int(time.time() * 1000)
+        replies = []
+        for name, start_id in streams.items():
+            stream, consumer_group = self._stream_group(name, groupname)
+            delivered_entries = []
+            if _key_name(start_id) == ">":
+                for entry_id, fields in stream.entries.items():
+                    if count is not None and len(delivered_entries) >= count:
+                        break
+                    if entry_id <= consumer_group.last_delivered_id:
+                        continue
+                    consumer_group.last_delivered_id = entry_id
+                    if not noack:
+                        consumer_group.pending[entry_id] = (
+                            consumer_name,
+                            now_milliseconds,
+                        )
+                    delivered_entries.append(
+                        (_format_stream_id(entry_id), dict(fields))
+                    )
+            else:
+                after_id = _parse_stream_id(start_id)
+                for entry_id in sorted(consumer_group.pending):
+                    if count is not None and len(delivered_entries) >= count:
+                        break
+                    if (
+                        entry_id <= after_id
+                        or consumer_group.pending[entry_id][0] != consumer_name
+                    ):
+                        continue
+                    fields = stream.entries.get(entry_id)
+                    delivered_entries.append(
+                        (
+                            _format_stream_id(entry_id),
+                            None if fields is None else dict(fields),
+                        )
+                    )
+
+            if delivered_entries:
+                replies.append([_to_bytes(name), delivered_entries])
+        return replies
+
+    def xack(self, name: Any, groupname: Any, *ids: Any) -> int:
+        stream = self._lookup(name, MemoryStream)
+        consumer_group = (
+            None if stream is None else stream.groups.get(_key_name(groupname))
+        )
+        if consumer_group is None:
+            return 0
+        return sum(
+            1
+            for entry_id in ids
+            if consumer_group.pending.pop(_parse_stream_id(entry_id), None) is not None
+        )
+
+    def xautoclaim(
+        self,
+        name: Any,
+        groupname: Any,
+        consumername: Any,
+        min_idle_time: int,
+        start_id: Any = "0-0",
+        count: Optional[int] = None,
+        justid: bool = False,
+    ) -> List[Any]:
+        """Transfer pending entries idle for min_idle_time ms to this consumer"""
+        stream, consumer_group = self._stream_group(name, groupname)
+        consumer_name = _key_name(consumername)
+        now_milliseconds = int(time.time() * 1000)
+        first_id = _parse_stream_id(start_id)
+        page_size = count or 100
+
+        claimed_entries = []
+        deleted_ids = []
+        next_start_id = b"0-0"
+        for entry_id in sorted(consumer_group.pending):
+            if entry_id < first_id:
+                continue
+            if len(claimed_entries) + len(deleted_ids) >= page_size:
+                next_start_id = _format_stream_id(entry_id)
+                break
+            _, delivered_at = consumer_group.pending[entry_id]
+            if now_milliseconds - delivered_at < min_idle_time:
+                continue
+
+            fields = stream.entries.get(entry_id)
+            if fields is None:
+                del consumer_group.pending[entry_id]
+                deleted_ids.append(_format_stream_id(entry_id))
+                continue
+            consumer_group.pending[entry_id] = (consumer_name, now_milliseconds)
+            claimed_entries.append(
+                _format_stream_id(entry_id)
+                if justid
+                else (_format_stream_id(entry_id), dict(fields))
+            )
+
+        if justid:
+            return claimed_entries
+        return [next_start_id, claimed_entries, deleted_ids]
+
+
+KEYSPACE_COMMANDS = (
+    "ping",
+    "time",
+    "dbsize",
+    "flushdb",
+    "delete",
+    "unlink",
+    "exists",
+    "rename",
+    "expire",
+    "ttl",
+    "scan",
+    "get",
+    "mget",
+    "set",
+    "setex",
+    "incr",
+    "incrby",
+    "hincrby",
+    "hincrbyfloat",
+    "hget",
+    "hgetall",
+    "hdel",
+    "sadd",
+    "srem",
+    "smembers",
+    "spop",
+    "sscan",
+    "zadd",
+    "zincrby",
+    "zscore",
+    "zcard",
+    "zrem",
+    "zrange",
+    "zrevrange",
+    "zremrangebyrank",
+    "xadd",
+    "xlen",
+    "xdel",
+    "xgroup_create",
+    "xreadgroup",
+    "xack",
+    "xautoclaim",
+)
+
+
+# Python stand-ins for Lua scripts, keyed by script source. Each receives the
+# keyspace plus KEYS and ARGV (encoded as bytes, like Redis does) and runs
+# without yielding to the event loop, so it is atomic just like EVALSHA.
+ScriptImplementation = Callable[[MemoryKeyspace, List[str], List[bytes]], Any]
+_script_implementations: Dict[str, ScriptImplementation] = {}
+
+
+def register_script_implementation(
+    lua_script: str, implementation: ScriptImplementation
+) -> None:
+    """Provide the in-memory equivalent of a Lua script used with RedisClient.run_script"""
+    _script_implementations[lua_script] = implementation
+
+
+class InMemoryScript:
+    """Stand-in for redis-py's registered Script object"""
+
+    def __init__(self, client: "InMemoryRedis", lua_script: str):
+        self._client = client
+        self._lua_script = lua_script
+
+    async def __call__(
+        self, keys: Sequence[Any] = (), args: Sequence[Any] = (), client: Any = None
+    ) -> Any:
+        implementation = _script_implementations.get(self._lua_script)
+        if implementation is None:
+            raise ResponseError(
+                "NOSCRIPT No in-memory implementation registered for this script"
+            )
+        return self._client.run_command(
+            lambda keyspace: implementation(
+                keyspace,
+                [_key_name(key) for key in keys],
+                [_to_bytes(arg) for arg in args],
+            )
+        )
+
+
+class InMemoryPipeline:
+    """Queues commands and runs them back to back on execute()"""
+
+    def __init__(self, client: "InMemoryRedis"):
+        self._client = client
+        self._queued_commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self) -> "InMemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._queued_commands = []
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        results = []
+        for command_name, args, kwargs in self._queued_commands:
+            try:
+                results.append(
+                    self._client.run_command(
+                        lambda keyspace: getattr(keyspace, command_name)(
+                            *args, **kwargs
+                        )
+                    )
+                )
+            except ResponseError as command_error:
+                results.append(command_error)
+        self._queued_commands = []
+
+        if raise_on_error:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+
+class InMemoryPubSub:
+    """Subscriber handle; messages are delivered through an asyncio queue"""
+
+    def __init__(
+        self, client: "InMemoryRedis", ignore_subscribe_messages: bool = False
+    ):
+        self._client = client
+        self.ignore_subscribe_messages = ignore_subscribe_messages
+        self.channels: Set[str] = set()
+        self._messages: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+    def deliver(self, message: Dict[str, Any]) -> None:
+        self._messages.put_nowait(message)
+
+    async def subscribe(self, *channels: Any) -> None:
+        for channel in channels:
+            channel_name = _key_name(channel)
+            self.channels.add(channel_name)
+            self._client.add_subscriber(channel_name, self)
+            if not self.ignore_subscribe_messages:
+                self.deliver(
+                    {
+                        "type": "subscribe",
+                        "pattern": None,
+                        "channel": channel_name.encode(),
+                        "data": len(self.channels),
+                    }
+                )
+
+    async def unsubscribe(self, *channels: Any) -> None:
+        for channel_name in [_key_name(channel) for channel in channels] or list(
+            self.channels
+        ):
+            self.channels.discard(channel_name)
+            self._client.remove_subscriber(channel_name, self)
+
+    async def get_message(
+        self, ignore_subscribe_messages: bool = False, timeout: float = 0.0
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            if timeout:
+                message = await asyncio.wait_for(self._messages.get(), timeout=timeout)
+            else:
+                message = self._messages.get_nowait()
+        except (asyncio.TimeoutError, asyncio.QueueEmpty):
+            return None
+        if ignore_subscribe_messages and message["type"] != "message":
+            return None
+        return message
+
+    async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        while self.channels:
+            yield await self._messages.get()
+
+    async def aclose(self) -> None:
+        await self.unsubscribe()
+
+    close = aclose
+
+
+class InMemoryRedis:
+    """
+    In-process stand-in for redis.asyncio.Redis.
+
+    Covers the commands RedisClient uses (strings, hashes, sets, sorted sets,
+    streams with consumer groups, scans, pipelines, pub/sub and scripts with
+    a registered Python equivalent), so single-node deployments, CI and
+    benchmarks get real caching behaviour without a Redis server. Select it
+    with REDIS_URL="redis+memory://"; "?max_memory_bytes=N" overrides the
+    memory cap.
+
+    Note:
+        State lives in this process only: every worker gets its own keyspace
+        and pub/sub messages never leave the process.
+        Only cache-like keys are evicted under the memory cap: keys without a
+        TTL and keys under MEMORY_REDIS_NO_EVICT_PREFIXES (streams, counters,
+        leaderboards, ...) are kept.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = settings.MEMORY_REDIS_MAX_BYTES,
+        timer_resolution_seconds: float = settings.MEMORY_REDIS_TIMER_RESOLUTION,
+        no_evict_prefixes: Sequence[str] = tuple(
+            settings.CACHE_KEY_PREFIX + key_prefix
+            for key_prefix in settings.MEMORY_REDIS_NO_EVICT_PREFIXES
+        ),
+    ):
+        self.keyspace = MemoryKeyspace(
+            max_memory_bytes, timer_resolution_seconds, no_evict_prefixes
+        )
+        self._subscribers: Dict[str, Set[InMemoryPubSub]] = {}
+
+    @classmethod
+    def from_url(cls, url: str) -> "InMemoryRedis":
+        query = parse_qs(urlparse(url).query)
+        if "max_memory_bytes" in query:
+            return cls(max_memory_bytes=int(query["max_memory_bytes"][0]))
+        return cls()
+
+    def run_command(self, command: Callable[[MemoryKeyspace], Any]) -> Any:
+        self.keyspace.expire_due_keys()
+        return command(self.keyspace)
+
+    def pipeline(self, transaction: bool = True) -> InMemoryPipeline:
+        return InMemoryPipeline(self)
+
+    def register_script(self, lua_script: str) -> InMemoryScript:
+        return InMemoryScript(self, lua_script)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> InMemoryPubSub:
+        return InMemoryPubSub(self, ignore_subscribe_messages=ignore_subscribe_messages)
+
+    def add_subscriber(self, channel_name: str, subscriber: InMemoryPubSub) -> None:
+        self._subscribers.setdefault(channel_name, set()).add(subscriber)
+
+    def remove_subscriber(self, channel_name: str, subscriber: InMemoryPubSub) -> None:
+        channel_subscribers = self._subscribers.get(channel_name)
+        if channel_subscribers is not None:
+            channel_subscribers.discard(subscriber)
+            if not channel_subscribers:
+                del self._subscribers[channel_name]
+
+    async def publish(self, channel: Any, message: Any) -> int:
+        channel_name = _key_name(channel)
+        channel_subscribers = self._subscribers.get(channel_name, ())
+        for subscriber in channel_subscribers:
+            subscriber.deliver(
+                {
+                    "type": "message",
+                    "pattern": None,
+                    "channel": channel_name.encode(),
+                    "data": _to_bytes(message),
+                }
+            )
+        return len(channel_subscribers)
+
+    async def scan_iter(
+        self, match: Optional[Any] = None, count: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        cursor = None
+        while cursor != 0:
+            cursor, keys = self.run_command(
+                lambda keyspace: keyspace.scan(cursor or 0, match=match, count=count)
+            )
+            for key in keys:
+                yield key
+
+    def stats(self) -> Dict[str, int]:
+        """Key count, estimated memory use and eviction/expiry counters"""
+        return {
+            "keys": self.keyspace.dbsize(),
+            "memory_used_bytes": self.keyspace.memory_used,
+            "max_memory_bytes": self.keyspace.max_memory_bytes,
+            "evictions": self.keyspace.evictions,
+            "expirations": self.keyspace.expirations,
+        }
+
+    async def close(self) -> None:
+        for channel_subscribers in list(self._subscribers.values()):
+            for subscriber in list(channel_subscribers):
+                await subscriber.aclose()
+
+    aclose = close
+
+
+def _async_command(command_name: str) -> Callable[..., Any]:
+    async def command(self: InMemoryRedis, *args: Any, **kwargs: Any) -> Any:
+        return self.run_command(
+            lambda keyspace: getattr(keyspace, command_name)(*args, **kwargs)
+        )
+
+    command.__name__ = command_name
+    return command
+
+
+def _queued_command(command_name: str) -> Callable[..., Any]:
+    def command(self: InMemoryPipeline, *args: Any, **kwargs: Any) -> InMemoryPipeline:
+        self._queued_commands.append((command_name, args, kwargs))
+        return self
+
+    command.__name__ = command_name
+    return command
+
+
+for _command_name in KEYSPACE_COMMANDS:
+    setattr(InMemoryRedis, _command_name, _async_command(_command_name))
+    setattr(InMemoryPipeline, _command_name, _queued_command(_command_name))
+
+
+def is_in_memory_url(url: str) -> bool:
+    return urlparse(url).scheme == IN_MEMORY_URL_SCHEME
@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+from app.config.redis import redis_client
+from app.config.settings import settings
+
+
+class ReadYourWritesTracker:
+    """
+    Remembers which users wrote recently, so their reads skip the replica.
+
+    A write is recorded in this worker's memory straight away and in Redis
+    for the other workers; both expire after window_seconds, which should
+    comfortably exceed replication lag. If Redis is unavailable only the
+    local record is consulted.
+    """
+
+    KEY_PREFIX = "ryw:"
+
+    def __init__(
+        self,
+        window_seconds: float = settings.READ_YOUR_WRITES_SECONDS,
+        sweep_batch: int = 8,
+    ):
+        self.window_seconds = window_seconds
+        self.sweep_batch = sweep_batch
+        self._local_deadlines: "OrderedDict[str, float]" = OrderedDict()
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    def _expire_stale_entries(self, now: float) -> None:
+        for _ in range(self.sweep_batch):
+            if not self._local_deadlines:
+                return
+            oldest_writer, oldest_deadline = next(iter(self._local_deadlines.items()))
+            if oldest_deadline > now:
+                return
+            del self._local_deadlines[oldest_writer]
+
+    def mark_write_local(self, writer_id: Any) -> None:
+        """Record a write in this worker (safe to call from sync code)"""
+        writer_id = str(writer_id)
+        now = time.monotonic()
+        self._expire_stale_entries(now)
+        self._local_deadlines[writer_id] = now + self.window_seconds
+        self._local_deadlines.move_to_end(writer_id)
+
+    async def mark_write(self, writer_id: Any) -> None:
+        """Record a write in this worker and share it with the others"""
+        self.mark_write_local(writer_id)
+        await redis_client.set_value(
+            f"{self.KEY_PREFIX}{writer_id}",
+            1,
+            expiration_seconds=max(1, round(self.window_seconds)),
+        )
+
+    async def wrote_recently(self, writer_id: Any) -> bool:
+        """Whether reads for this user should go to the primary"""
+        writer_id = str(writer_id)
+        local_deadline = self._local_deadlines.get(writer_id)
+        if local_deadline is not None and local_deadline > time.monotonic():
+            return True
+        return await redis_client.key_exists(f"{self.KEY_PREFIX}{writer_id}")
+
+    def stats(self) -> Dict[str, int]:
+        """How many read sessions went to each database"""
+        return {
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads,
+        }
+
+
+read_your_writes = ReadYourWritesTracker()
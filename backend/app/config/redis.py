@@ -1,10 +1,107 @@
+import asyncio
+import secrets
 import redis.asyncio as redis
-import json
 from loguru import logger
-from typing import Optional, Any
+from typing import (
+    Optional,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from app.config.settings import settings
+from app.config.circuit_breaker import CircuitBreaker
+from app.config.memory_redis import (
+    InMemoryRedis,
+    is_in_memory_url,
+    register_script_implementation,
+)
+from app.config.serialization import SerializationError, ValueSerializer
+from redis.exceptions import (
+    ConnectionError as RedisConnectionError,
+    ResponseError,
+    TimeoutError as RedisTimeoutError,
+)
 from redis.typing import ResponseT
 
+T = TypeVar("T")
+
+# Errors that mean Redis is unreachable or too slow, as opposed to a bad
+# command; only these count towards the circuit breaker
+REDIS_AVAILABILITY_ERRORS = (
+    RedisConnectionError,
+    RedisTimeoutError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+
+RELEASE_LOCK_LUA_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _release_lock_in_memory(keyspace, keys, args):
+    if keyspace.get(keys[0]) == args[0]:
+        return keyspace.delete(keys[0])
+    return 0
+
+
+register_script_implementation(RELEASE_LOCK_LUA_SCRIPT, _release_lock_in_memory)
+
+
+# Stores ARGV[2] in KEYS[1] for ARGV[3] seconds, but only while the
+# generation in KEYS[2] still equals ARGV[1] ("" for never bumped)
+SET_IF_GENERATION_LUA_SCRIPT = """
+local current_generation = redis.call('GET', KEYS[2]) or ''
+if current_generation ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+def _set_if_generation_in_memory(keyspace, keys, args):
+    if (keyspace.get(keys[1]) or b"") != args[0]:
+        return 0
+    keyspace.set(keys[0], args[1], ex=int(args[2]))
+    return 1
+
+
+register_script_implementation(
+    SET_IF_GENERATION_LUA_SCRIPT, _set_if_generation_in_memory
+)
+
+
+# Bumps the generation in KEYS[2] (kept for ARGV[1] seconds) and deletes KEYS[1]
+DELETE_AND_BUMP_GENERATION_LUA_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return redis.call('DEL', KEYS[1])
+"""
+
+
+def _delete_and_bump_generation_in_memory(keyspace, keys, args):
+    keyspace.incr(keys[1])
+    keyspace.expire(keys[1], int(args[0]))
+    return keyspace.delete(keys[0])
+
+
+register_script_implementation(
+    DELETE_AND_BUMP_GENERATION_LUA_SCRIPT, _delete_and_bump_generation_in_memory
+)
+
 
 class RedisClient:
     """
@@ -13,105 +110,834 @@ class RedisClient:
     Note:
         Always call connect() before using any Redis operations.
         Call close() when shutting down the application to cleanup connections.
+        Set command_observer to a callable taking the command name to count
+        Redis round trips (used by the metrics layer).
+        Values are encoded with ValueSerializer, so responses are raw bytes;
+        callers using get_raw_redis_client() must decode replies themselves.
+        Every key is stored under settings.CACHE_KEY_PREFIX so the application
+        never touches keys owned by other tenants of the same Redis (Celery).
+        Raw-client callers should build key names with key().
+        A "redis+memory://" REDIS_URL selects the in-process InMemoryRedis
+        backend instead of a server.
+        Every call is bounded by REDIS_COMMAND_TIMEOUT and guarded by a circuit
+        breaker: after repeated timeouts or connection errors all operations
+        return their "unavailable" value immediately while a background task
+        probes Redis (reconnecting if needed) with exponential backoff.
     """
 
-    def __init__(self):
+    MULTI_KEY_BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        serializer: Optional[ValueSerializer] = None,
+        key_prefix: str = settings.CACHE_KEY_PREFIX,
+        command_timeout_seconds: float = settings.REDIS_COMMAND_TIMEOUT,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
         self._redis_connection = None
+        # Kept across reconnects so the in-process keyspace outlives close_connection()
+        self._in_memory_redis: Optional[InMemoryRedis] = None
+        self.key_prefix = key_prefix
+        self.command_timeout_seconds = command_timeout_seconds
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            "redis",
+            failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout_seconds=settings.REDIS_BREAKER_RESET_TIMEOUT,
+            max_reset_timeout_seconds=settings.REDIS_BREAKER_MAX_RESET_TIMEOUT,
+        )
+        self._serializer = serializer or ValueSerializer()
+        self._registered_scripts = {}
+        self._recovery_task: Optional[asyncio.Task] = None
+        self.command_observer: Optional[Callable[[str], None]] = None
+
+    def _record_command(self, command_name: str) -> None:
+        if self.command_observer is not None:
+            self.command_observer(command_name)
+
+    async def _execute(
+        self, command_name: str, operation: Callable[[], Awaitable[T]], fallback: T
+    ) -> T:
+        """
+        Run one Redis round trip within the latency budget.
+
+        Returns fallback without touching Redis while disconnected or while
+        the circuit breaker is open, and on any error.
+        """
+        if not self._redis_connection or not self.circuit_breaker.allow_request():
+            return fallback
+
+        self._record_command(command_name)
+        try:
+            result = await asyncio.wait_for(
+                operation(), timeout=self.command_timeout_seconds
+            )
+        except REDIS_AVAILABILITY_ERRORS as redis_unavailable_error:
+            self._record_unavailable(command_name, redis_unavailable_error)
+            return fallback
+        except Exception as redis_command_error:
+            logger.error(f"Redis {command_name} error: {redis_command_error}")
+            return fallback
+
+        self.circuit_breaker.record_success()
+        return result
+
+    def _record_unavailable(
+        self, command_name: str, redis_unavailable_error: BaseException
+    ) -> None:
+        logger.warning(f"Redis {command_name} failed: {redis_unavailable_error!r}")
+        if self.circuit_breaker.record_failure():
+            logger.error(
+                "Redis circuit breaker opened, bypassing the cache until Redis recovers"
+            )
+            self._start_recovery()
+
+    def _start_recovery(self) -> None:
+        if self._recovery_task is None or self._recovery_task.done():
+            self._recovery_task = asyncio.get_running_loop().create_task(
+                self._recover()
+            )
+
+    async def _recover(self) -> None:
+        """
+        Probe Redis until it answers, then close the breaker.
+
+        Each probe half-opens the breaker and either reconnects (if there is no
+        connection yet) or sends a PING; a failed probe reopens it and doubles
+        the delay before the next one.
+        """
+        while True:
+            await asyncio.sleep(self.circuit_breaker.retry_delay_seconds)
+            self.circuit_breaker.begin_probe()
+            try:
+                if self._redis_connection is None:
+                    await self._open_connection()
+                else:
+                    self._record_command("PING")
+                    await asyncio.wait_for(
+                        self._redis_connection.ping(),
+                        timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                    )
+            except Exception as redis_probe_error:
+                self.circuit_breaker.record_failure()
+                logger.warning(
+                    f"Redis health probe failed ({redis_probe_error!r}), "
+                    f"retrying in {self.circuit_breaker.retry_delay_seconds:.1f}s"
+                )
+                continue
+
+            self.circuit_breaker.record_success()
+            logger.success("Redis is reachable again, circuit breaker closed")
+            return
+
+    async def _open_connection(self) -> None:
+        if is_in_memory_url(settings.REDIS_URL):
+            self._registered_scripts = {}
+            if self._in_memory_redis is None:
+                self._in_memory_redis = InMemoryRedis.from_url(settings.REDIS_URL)
+            self._redis_connection = self._in_memory_redis
+            return
+
+        connection_pool = redis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            decode_responses=False,
+        )
+        redis_connection = redis.Redis(connection_pool=connection_pool)
+        try:
+            await asyncio.wait_for(
+                redis_connection.ping(), timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT
+            )
+        except BaseException:
+            await redis_connection.aclose()
+            raise
+
+        self._registered_scripts = {}
+        self._redis_connection = redis_connection
+
+    def key(self, redis_key: str) -> str:
+        """Full Redis key name for an application key"""
+        return f"{self.key_prefix}{redis_key}"
 
     def is_connected(self) -> bool:
-        """Check if Redis client is connected"""
-        return self._redis_connection is not None
+        """Check if Redis client is connected and its circuit breaker is closed"""
+        return self._redis_connection is not None and not self.circuit_breaker.is_open
 
     def get_raw_redis_client(self):
         """Get the internal Redis client for advanced operations"""
         return self._redis_connection
 
     async def connect_to_redis(self):
-        """Connect to Redis"""
+        """
+        Connect to Redis.
+
+        Uses a blocking connection pool sized from settings, so bursts wait up
+        to REDIS_POOL_TIMEOUT for a free connection instead of failing outright.
+        If Redis is unreachable the breaker is opened and the connection is
+        retried in the background, so startup is never blocked on Redis.
+        """
         try:
-            self._redis_connection = await redis.from_url(
-                settings.REDIS_URL,
-                decode_responses=True
-            )
-            await self._redis_connection.ping()
+            await self._open_connection()
             logger.success("Connected to Redis successfully")
         except Exception as redis_connection_error:
-            logger.error(f"Failed to connect to Redis: {redis_connection_error}")
+            logger.error(
+                f"Failed to connect to Redis: {redis_connection_error!r}, retrying in the background"
+            )
             self._redis_connection = None
+            self.circuit_breaker.trip()
+            self._start_recovery()
 
     async def get_value(self, redis_key: str) -> Optional[ResponseT]:
         """
         Retrieve and deserialize value from Redis by key.
 
-        Automatically deserializes JSON data back to Python objects.
-        Returns None if key doesn't exist or if not connected.
+        Automatically deserializes the stored payload back to Python objects.
+        Returns None if key doesn't exist or if Redis is unavailable.
         """
-        if not self._redis_connection:
+        cached_value = await self._execute(
+            "GET", lambda: self._redis_connection.get(self.key(redis_key)), None
+        )
+        if not cached_value:
             return None
 
         try:
-            cached_value = await self._redis_connection.get(redis_key)
-            if cached_value:
-                return json.loads(cached_value)
-            return None
-        except Exception as redis_get_error:
-            logger.error(f"Redis GET error: {redis_get_error}")
+            return self._serializer.loads(cached_value)
+        except ValueError as redis_decode_error:
+            logger.error(
+                f"Redis GET decode error for {redis_key}: {redis_decode_error}"
+            )
             return None
 
     async def set_value(self, redis_key: str, data_to_cache: Any, expiration_seconds: Optional[int] = None) -> bool:
         """
-        Store value in Redis with automatic JSON serialization and TTL.
+        Store value in Redis with automatic serialization and TTL.
 
-        Serializes Python objects to JSON before storing. Uses default TTL
+        Serializes Python objects with the configured codec before storing. Uses default TTL
         from settings if not specified.
         """
-        if not self._redis_connection:
+        if not self.is_connected():
             return False
 
         try:
-            time_to_live = expiration_seconds or settings.CACHE_TTL
-            serialized_data = json.dumps(data_to_cache, default=str)
-            return await self._redis_connection.setex(redis_key, time_to_live, serialized_data)
-        except Exception as redis_set_error:
-            logger.error(f"Redis SET error: {redis_set_error}")
+            serialized_data = self._serializer.dumps(data_to_cache)
+        except SerializationError as redis_encode_error:
+            logger.error(
+                f"Redis SET encode error for {redis_key}: {redis_encode_error}"
+            )
             return False
 
-    async def delete_key(self, redis_key: str) -> bool:
+        time_to_live = expiration_seconds or settings.CACHE_TTL
+        return bool(
+            await self._execute(
+                "SETEX",
+                lambda: self._redis_connection.setex(
+                    self.key(redis_key), time_to_live, serialized_data
+                ),
+                False,
+            )
+        )
+
+    async def get_generation(self, generation_key: str) -> Optional[str]:
         """
-        Delete key from Redis.
+        Current value of a generation counter, as a token for set_value_if_generation().
+
+        Returns "" if the counter was never bumped and None if Redis is unavailable.
         """
-        if not self._redis_connection:
-            return False
+        generation = await self._execute(
+            "GET", lambda: self._redis_connection.get(self.key(generation_key)), False
+        )
+        if generation is False:
+            return None
+        return generation.decode() if generation else ""
+
+    async def set_value_if_generation(
+        self,
+        redis_key: str,
+        data_to_cache: Any,
+        generation_key: str,
+        expected_generation: str,
+        expiration_seconds: Optional[int] = None,
+    ) -> Optional[bool]:
+        """
+        Store a value only if generation_key has not been bumped since get_generation().
+
+        Used to fill a cache after a database read without overwriting a
+        concurrent invalidation. Returns None if Redis is unavailable.
+        """
+        if not self.is_connected():
+            return None
 
         try:
-            return bool(await self._redis_connection.delete(redis_key))
-        except Exception as redis_delete_error:
-            logger.error(f"Redis DELETE error: {redis_delete_error}")
+            serialized_data = self._serializer.dumps(data_to_cache)
+        except SerializationError as redis_encode_error:
+            logger.error(
+                f"Redis SET encode error for {redis_key}: {redis_encode_error}"
+            )
             return False
 
+        stored = await self.run_script(
+            SET_IF_GENERATION_LUA_SCRIPT,
+            keys=[redis_key, generation_key],
+            args=[
+                expected_generation,
+                serialized_data,
+                expiration_seconds or settings.CACHE_TTL,
+            ],
+        )
+        return None if stored is None else bool(stored)
+
+    async def delete_and_bump_generation(
+        self, redis_key: str, generation_key: str, generation_ttl_seconds: int
+    ) -> bool:
+        """Delete a key and bump its generation, so fills started before now are rejected"""
+        deleted = await self.run_script(
+            DELETE_AND_BUMP_GENERATION_LUA_SCRIPT,
+            keys=[redis_key, generation_key],
+            args=[generation_ttl_seconds],
+        )
+        return deleted is not None
+
+    async def get_many(self, redis_keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Retrieve and deserialize several values in one MGET round trip.
+
+        Returns a dict containing only the keys that exist and decoded
+        successfully; a value that fails to decode is logged and left out
+        without affecting the others. Returns an empty dict if Redis is
+        unavailable.
+        """
+        redis_keys = list(redis_keys)
+        if not redis_keys:
+            return {}
+
+        cached_values = await self._execute(
+            "MGET",
+            lambda: self._redis_connection.mget(
+                [self.key(redis_key) for redis_key in redis_keys]
+            ),
+            None,
+        )
+        if cached_values is None:
+            return {}
+
+        decoded_values = {}
+        for redis_key, cached_value in zip(redis_keys, cached_values):
+            if not cached_value:
+                continue
+            try:
+                decoded_values[redis_key] = self._serializer.loads(cached_value)
+            except ValueError as redis_decode_error:
+                logger.error(
+                    f"Redis MGET decode error for {redis_key}: {redis_decode_error}"
+                )
+
+        return decoded_values
+
+    async def set_many(
+        self,
+        values_to_cache: Mapping[str, Any],
+        expiration_seconds: Optional[int] = None,
+        per_key_expiration_seconds: Optional[Mapping[str, int]] = None,
+    ) -> Dict[str, bool]:
+        """
+        Store several values in one pipelined round trip.
+
+        Each key gets its TTL from per_key_expiration_seconds, falling back to
+        expiration_seconds and then to the default TTL from settings. Returns
+        a per-key success map: a key that fails to serialize or store is
+        reported as False while the rest are still written.
+        """
+        if not self.is_connected() or not values_to_cache:
+            return {redis_key: False for redis_key in values_to_cache}
+
+        per_key_expiration_seconds = per_key_expiration_seconds or {}
+        default_time_to_live = expiration_seconds or settings.CACHE_TTL
+        stored = {}
+        pipelined_writes = []
+
+        for redis_key, data_to_cache in values_to_cache.items():
+            try:
+                serialized_data = self._serializer.dumps(data_to_cache)
+            except SerializationError as redis_encode_error:
+                logger.error(
+                    f"Redis SET encode error for {redis_key}: {redis_encode_error}"
+                )
+                stored[redis_key] = False
+                continue
+
+            time_to_live = per_key_expiration_seconds.get(
+                redis_key, default_time_to_live
+            )
+            pipelined_writes.append((redis_key, time_to_live, serialized_data))
+
+        async def execute_pipeline():
+            async with self._redis_connection.pipeline(transaction=False) as pipeline:
+                for redis_key, time_to_live, serialized_data in pipelined_writes:
+                    pipeline.setex(self.key(redis_key), time_to_live, serialized_data)
+                return await pipeline.execute(raise_on_error=False)
+
+        results = await self._execute("PIPELINE", execute_pipeline, None)
+        if results is None:
+            return {redis_key: False for redis_key in values_to_cache}
+
+        for (redis_key, _, _), result in zip(pipelined_writes, results):
+            if isinstance(result, Exception):
+                logger.error(f"Redis SET error for {redis_key}: {result}")
+                stored[redis_key] = False
+            else:
+                stored[redis_key] = bool(result)
+
+        return stored
+
+    async def delete_many(self, redis_keys: Iterable[str]) -> int:
+        """
+        Delete several keys, batching them into multi-key DEL commands.
+
+        Returns the number of keys that were actually removed.
+        """
+        redis_keys = list(redis_keys)
+        deleted_count = 0
+        for batch_start in range(0, len(redis_keys), self.MULTI_KEY_BATCH_SIZE):
+            key_batch = [
+                self.key(redis_key)
+                for redis_key in redis_keys[
+                    batch_start : batch_start + self.MULTI_KEY_BATCH_SIZE
+                ]
+            ]
+            deleted_count += await self._execute(
+                "DEL", lambda: self._redis_connection.delete(*key_batch), 0
+            )
+
+        return deleted_count
+
+    async def delete_key(self, redis_key: str) -> bool:
+        """
+        Delete key from Redis.
+        """
+        return bool(
+            await self._execute(
+                "DEL", lambda: self._redis_connection.delete(self.key(redis_key)), 0
+            )
+        )
+
     async def key_exists(self, redis_key: str) -> bool:
         """Check if key exists"""
-        if not self._redis_connection:
-            return False
+        return bool(
+            await self._execute(
+                "EXISTS", lambda: self._redis_connection.exists(self.key(redis_key)), 0
+            )
+        )
+
+    async def acquire_lock(
+        self, lock_key: str, timeout_seconds: float
+    ) -> Optional[str]:
+        """
+        Try to take a short-lived lock (SET NX PX).
+
+        Returns an ownership token to pass to release_lock, or None if the lock
+        is held elsewhere or Redis is unavailable. The lock expires on its own
+        after timeout_seconds so a crashed holder cannot wedge it.
+        """
+        ownership_token = secrets.token_hex(16)
+        acquired = await self._execute(
+            "SET",
+            lambda: self._redis_connection.set(
+                self.key(lock_key),
+                ownership_token,
+                nx=True,
+                px=max(1, int(timeout_seconds * 1000)),
+            ),
+            None,
+        )
+        return ownership_token if acquired else None
+
+    async def release_lock(self, lock_key: str, ownership_token: str) -> bool:
+        """Release a lock, but only if it is still held with the given token"""
+        released = await self.run_script(
+            RELEASE_LOCK_LUA_SCRIPT, keys=[lock_key], args=[ownership_token]
+        )
+        return bool(released)
+
+    async def publish(self, channel: str, message: str) -> bool:
+        """Publish a message on a pub/sub channel"""
+        receiver_count = await self._execute(
+            "PUBLISH", lambda: self._redis_connection.publish(channel, message), None
+        )
+        return receiver_count is not None
+
+    def create_pubsub(self):
+        """
+        Create a pub/sub handle on its own connection, or None if Redis is unavailable.
+
+        The caller owns the handle and must close it.
+        """
+        if not self.is_connected():
+            return None
+        return self._redis_connection.pubsub(ignore_subscribe_messages=True)
+
+    async def run_script(
+        self, lua_script: str, keys: Sequence[str], args: Sequence[Any]
+    ) -> Optional[ResponseT]:
+        """
+        Run a Lua script atomically on the server.
+
+        Scripts are registered once and invoked by SHA afterwards. Returns None
+        if Redis is unavailable or if the script fails, so callers can fall back.
+        """
+        if not self.is_connected():
+            return None
+
+        registered_script = self._registered_scripts.get(lua_script)
+        if registered_script is None:
+            registered_script = self._redis_connection.register_script(lua_script)
+            self._registered_scripts[lua_script] = registered_script
+
+        return await self._execute(
+            "EVALSHA",
+            lambda: registered_script(
+                keys=[self.key(redis_key) for redis_key in keys], args=list(args)
+            ),
+            None,
+        )
+
+    async def increment(self, redis_key: str, amount: int = 1) -> Optional[int]:
+        """Atomically increment an integer key, returning the new value"""
+        return await self._execute(
+            "INCRBY",
+            lambda: self._redis_connection.incrby(self.key(redis_key), amount),
+            None,
+        )
+
+    async def increment_hash_fields(
+        self,
+        increments_by_key: Mapping[str, Mapping[str, Union[int, float]]],
+        tracking_set_key: Optional[str] = None,
+    ) -> bool:
+        """
+        Add to numeric fields of several hashes in one MULTI/EXEC round trip.
+
+        Integer amounts use HINCRBY and floats HINCRBYFLOAT. The name of every
+        hash touched is also added to tracking_set_key, so a background job
+        can find the hashes that changed. Returns False if Redis is
+        unavailable, in which case no increment was applied.
+        """
+        if not increments_by_key:
+            return True
+
+        async def execute_pipeline():
+            async with self._redis_connection.pipeline(transaction=True) as pipeline:
+                for hash_key, field_increments in increments_by_key.items():
+                    for field_name, amount in field_increments.items():
+                        if isinstance(amount, int):
+                            pipeline.hincrby(self.key(hash_key), field_name, amount)
+                        else:
+                            pipeline.hincrbyfloat(
+                                self.key(hash_key), field_name, amount
+                            )
+                if tracking_set_key is not None:
+                    pipeline.sadd(self.key(tracking_set_key), *increments_by_key)
+                return await pipeline.execute()
+
+        return await self._execute("PIPELINE", execute_pipeline, None) is not None
+
+    async def get_hashes(
+        self, hash_keys: Sequence[str]
+    ) -> Optional[Dict[str, Dict[str, str]]]:
+        """
+        All fields of several hashes (pipelined HGETALL), decoded to strings.
+
+        Missing hashes map to an empty dict. Returns None if Redis is unavailable.
+        """
+        if not hash_keys:
+            return {}
+
+        async def execute_pipeline():
+            async with self._redis_connection.pipeline(transaction=False) as pipeline:
+                for hash_key in hash_keys:
+                    pipeline.hgetall(self.key(hash_key))
+                return await pipeline.execute()
+
+        hash_replies = await self._execute("PIPELINE", execute_pipeline, None)
+        if hash_replies is None:
+            return None
+
+        return {
+            hash_key: {
+                field.decode(): field_value.decode()
+                for field, field_value in hash_reply.items()
+            }
+            for hash_key, hash_reply in zip(hash_keys, hash_replies)
+        }
+
+    async def increment_sorted_set_scores(
+        self,
+        increments_by_key: Mapping[str, Mapping[str, float]],
+        ttl_seconds: Optional[int] = None,
+    ) -> bool:
+        """
+        Add to member scores of several sorted sets in one MULTI/EXEC round trip.
+
+        Each sorted set touched gets its TTL reset to ttl_seconds when given.
+        Returns False if Redis is unavailable, in which case no score changed.
+        """
+        if not increments_by_key:
+            return True
+
+        async def execute_pipeline():
+            async with self._redis_connection.pipeline(transaction=True) as pipeline:
+                for sorted_set_key, member_increments in increments_by_key.items():
+                    for member, amount in member_increments.items():
+                        pipeline.zincrby(self.key(sorted_set_key), amount, member)
+                    if ttl_seconds is not None:
+                        pipeline.expire(self.key(sorted_set_key), ttl_seconds)
+                return await pipeline.execute()
+
+        return await self._execute("PIPELINE", execute_pipeline, None) is not None
+
+    async def get_top_scored_members(
+        self, sorted_set_key: str, count: int
+    ) -> Optional[List[Tuple[str, float]]]:
+        """Highest-scoring members with their scores (ZREVRANGE); None if Redis is unavailable"""
+        scored_members = await self._execute(
+            "ZREVRANGE",
+            lambda: self._redis_connection.zrevrange(
+                self.key(sorted_set_key), 0, count - 1, withscores=True
+            ),
+            None,
+        )
+        if scored_members is None:
+            return None
+        return [(member.decode(), float(score)) for member, score in scored_members]
+
+    async def append_to_stream(self, stream_key: str, entry: Any) -> Optional[str]:
+        """
+        Append a serialized entry to a stream (XADD).
+
+        Returns the entry ID, or None if the entry could not be encoded or
+        Redis is unavailable, in which case the caller must not assume it
+        was stored.
+        """
+        if not self.is_connected():
+            return None
 
         try:
-            return bool(await self._redis_connection.exists(redis_key))
-        except Exception as redis_exists_error:
-            logger.error(f"Redis EXISTS error: {redis_exists_error}")
+            serialized_entry = self._serializer.dumps(entry)
+        except SerializationError as redis_encode_error:
+            logger.error(
+                f"Redis XADD encode error for {stream_key}: {redis_encode_error}"
+            )
+            return None
+
+        entry_id = await self._execute(
+            "XADD",
+            lambda: self._redis_connection.xadd(
+                self.key(stream_key), {"entry": serialized_entry}
+            ),
+            None,
+        )
+        return None if entry_id is None else entry_id.decode()
+
+    async def create_consumer_group(self, stream_key: str, group_name: str) -> bool:
+        """Create a consumer group reading a stream from its start (the stream is created if needed)"""
+
+        async def create_group():
+            try:
+                return await self._redis_connection.xgroup_create(
+                    self.key(stream_key), group_name, id="0", mkstream=True
+                )
+            except ResponseError as redis_group_error:
+                if str(redis_group_error).startswith("BUSYGROUP"):
+                    return True
+                raise
+
+        return bool(await self._execute("XGROUP", create_group, False))
+
+    async def read_stream_group(
+        self,
+        stream_key: str,
+        group_name: str,
+        consumer_name: str,
+        count: int,
+        min_idle_seconds: float,
+    ) -> Optional[List[Tuple[str, Any]]]:
+        """
+        Take up to count entries for this consumer, as (entry ID, entry) pairs.
+
+        Entries another consumer received but did not acknowledge within
+        min_idle_seconds (e.g. because it crashed) are claimed first, then
+        new entries are read. Entries stay pending until
+        acknowledge_stream_entries is called. Returns None if Redis is
+        unavailable. Never blocks.
+        """
+        full_stream_key = self.key(stream_key)
+        claim_reply = await self._execute(
+            "XAUTOCLAIM",
+            lambda: self._redis_connection.xautoclaim(
+                full_stream_key,
+                group_name,
+                consumer_name,
+                min_idle_time=int(min_idle_seconds * 1000),
+                count=count,
+            ),
+            None,
+        )
+        if claim_reply is None:
+            return None
+
+        stream_entries = list(claim_reply[1])
+        if len(stream_entries) < count:
+            read_reply = await self._execute(
+                "XREADGROUP",
+                lambda: self._redis_connection.xreadgroup(
+                    group_name,
+                    consumer_name,
+                    {full_stream_key: ">"},
+                    count=count - len(stream_entries),
+                ),
+                None,
+            )
+            if read_reply is None:
+                return None
+            for _, new_entries in read_reply:
+                stream_entries.extend(new_entries)
+
+        decoded_entries = []
+        for entry_id, entry_fields in stream_entries:
+            entry_id = entry_id.decode()
+            try:
+                decoded_entries.append(
+                    (entry_id, self._serializer.loads(entry_fields[b"entry"]))
+                )
+            except (KeyError, TypeError, ValueError) as redis_decode_error:
+                logger.error(
+                    f"Redis stream decode error for {stream_key} entry {entry_id}: {redis_decode_error!r}"
+                )
+                decoded_entries.append((entry_id, None))
+        return decoded_entries
+
+    async def acknowledge_stream_entries(
+        self, stream_key: str, group_name: str, entry_ids: Sequence[str]
+    ) -> bool:
+        """Acknowledge processed stream entries and delete them from the stream"""
+        if not entry_ids:
+            return True
+
+        full_stream_key = self.key(stream_key)
+
+        async def execute_pipeline():
+            async with self._redis_connection.pipeline(transaction=False) as pipeline:
+                pipeline.xack(full_stream_key, group_name, *entry_ids)
+                pipeline.xdel(full_stream_key, *entry_ids)
+                return await pipeline.execute()
+
+        return await self._execute("PIPELINE", execute_pipeline, None) is not None
+
+    async def add_to_set(
+        self,
+        set_key: str,
+        members: Iterable[str],
+        expiration_seconds: Optional[int] = None,
+    ) -> bool:
+        """
+        Add application keys to a set of key names (e.g. a tag set).
+
+        Members are stored as full Redis key names so the set can later be
+        unlinked directly. The set's TTL is only ever extended.
+        """
+        members = [self.key(member) for member in members]
+        if not members:
             return False
 
+        full_set_key = self.key(set_key)
+
+        async def execute_pipeline():
+            async with self._redis_connection.pipeline(transaction=False) as pipeline:
+                pipeline.sadd(full_set_key, *members)
+                if expiration_seconds:
+                    pipeline.expire(full_set_key, expiration_seconds, gt=True)
+                    pipeline.expire(full_set_key, expiration_seconds, nx=True)
+                return await pipeline.execute()
+
+        return await self._execute("PIPELINE", execute_pipeline, None) is not None
+
+    async def unlink_set_members(self, set_key: str) -> int:
+        """
+        Unlink every key named in a set, then the set itself.
+
+        Walks the set with SSCAN and frees keys with UNLINK in batches, so
+        even very large sets never block Redis. Returns the number of keys
+        removed.
+        """
+        full_set_key = self.key(set_key)
+        unlinked_count = 0
+        cursor = 0
+        while True:
+            scan_reply = await self._execute(
+                "SSCAN",
+                lambda: self._redis_connection.sscan(
+                    full_set_key, cursor, count=self.MULTI_KEY_BATCH_SIZE
+                ),
+                None,
+            )
+            if scan_reply is None:
+                return unlinked_count
+
+            cursor, members = scan_reply
+            if members:
+                unlinked_count += await self._execute(
+                    "UNLINK", lambda: self._redis_connection.unlink(*members), 0
+                )
+            if cursor == 0:
+                break
+
+        await self._execute(
+            "UNLINK", lambda: self._redis_connection.unlink(full_set_key), 0
+        )
+        return unlinked_count
+
+    async def unlink_matching(self, match_pattern: str) -> int:
+        """
+        Unlink every application key matching a glob pattern.
+
+        Uses cursor-based SCAN with batched UNLINK rather than KEYS/DEL, so it
+        never blocks Redis. Returns the number of keys removed.
+        """
+        full_pattern = self.key(match_pattern)
+        unlinked_count = 0
+        cursor = 0
+        while True:
+            scan_reply = await self._execute(
+                "SCAN",
+                lambda: self._redis_connection.scan(
+                    cursor, match=full_pattern, count=self.MULTI_KEY_BATCH_SIZE
+                ),
+                None,
+            )
+            if scan_reply is None:
+                return unlinked_count
+
+            cursor, full_keys = scan_reply
+            if full_keys:
+                unlinked_count += await self._execute(
+                    "UNLINK", lambda: self._redis_connection.unlink(*full_keys), 0
+                )
+            if cursor == 0:
+                return unlinked_count
+
     async def flush_entire_database(self) -> bool:
         """
-        Delete all keys from Redis database.
+        Delete all application keys from Redis.
+
+        Only keys under the application prefix are removed; the Celery broker
+        and result keys that share this Redis are left untouched.
         """
-        if not self._redis_connection:
+        if not self.is_connected():
             return False
 
-        try:
-            return await self._redis_connection.flushall()
-        except Exception as redis_flush_error:
-            logger.error(f"Redis FLUSHALL error: {redis_flush_error}")
-            return False
+        await self.unlink_matching("*")
+        return True
 
     async def close_connection(self):
         """
@@ -120,8 +946,16 @@ class RedisClient:
         Should be called during application shutdown to ensure proper cleanup
         of network connections.
         """
+        if self._recovery_task is not None:
+            self._recovery_task.cancel()
+            self._recovery_task = None
+
         if self._redis_connection:
-            await self._redis_connection.close()
+            redis_connection, self._redis_connection = self._redis_connection, None
+            try:
+                await redis_connection.aclose()
+            except Exception as redis_close_error:
+                logger.warning(f"Error closing Redis connection: {redis_close_error!r}")
 
 
 redis_client = RedisClient()
@@ -0,0 +1,258 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+import msgpack
+from loguru import logger
+
+from app.config.settings import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional dependency
+    lz4_frame = None
+
+
+# Every encoded value starts with one tag byte: 0b10CCCZZZ, where CCC is the
+# codec and ZZZ the compression. Tags are always >= 0x80, which can never be
+# the first byte of UTF-8 JSON, so untagged values written before the codec
+# layer existed are still read back as plain JSON during a rolling upgrade.
+TAG_MARKER = 0x80
+
+CODEC_IDS = {"json": 1, "orjson": 2, "msgpack": 3}
+COMPRESSION_IDS = {"none": 0, "zstd": 1, "lz4": 2}
+
+
+class SerializationError(ValueError):
+    """Raised when a cached value cannot be encoded or decoded"""
+
+    pass
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+
+def _json_loads(payload: bytes) -> Any:
+    return json.loads(payload)
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+# msgpack extension types, so datetimes, UUIDs and decimals survive a round
+# trip instead of coming back as strings
+_MSGPACK_DATETIME = 1
+_MSGPACK_DATE = 2
+_MSGPACK_UUID = 3
+_MSGPACK_DECIMAL = 4
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_MSGPACK_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(_MSGPACK_DATE, value.isoformat().encode())
+    if isinstance(value, UUID):
+        return msgpack.ExtType(_MSGPACK_UUID, value.bytes)
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(_MSGPACK_DECIMAL, str(value).encode())
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _msgpack_ext_hook(ext_code: int, ext_data: bytes) -> Any:
+    if ext_code == _MSGPACK_DATETIME:
+        return datetime.fromisoformat(ext_data.decode())
+    if ext_code == _MSGPACK_DATE:
+        return date.fromisoformat(ext_data.decode())
+    if ext_code == _MSGPACK_UUID:
+        return UUID(bytes=ext_data)
+    if ext_code == _MSGPACK_DECIMAL:
+        return Decimal(ext_data.decode())
+    return msgpack.ExtType(ext_code, ext_data)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(
+        value, default=_msgpack_default, use_bin_type=True, datetime=False
+    )
+
+
+def _msgpack_loads(payload: bytes) -> Any:
+    return msgpack.unpackb(
+        payload, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False
+    )
+
+
+def dumps_json(value: Any) -> bytes:
+    """Compact JSON bytes, encoded with orjson when it is installed"""
+    if orjson is not None:
+        return _orjson_dumps(value)
+    return _json_dumps(value)
+
+
+def _codec_functions(
+    codec_name: str,
+) -> Optional[Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    if codec_name == "json":
+        return _json_dumps, _json_loads
+    if codec_name == "orjson" and orjson is not None:
+        return _orjson_dumps, orjson.loads
+    if codec_name == "msgpack":
+        return _msgpack_dumps, _msgpack_loads
+    return None
+
+
+def _compression_functions(
+    compression_name: str,
+) -> Optional[Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    if compression_name == "none":
+        return (lambda payload: payload), (lambda payload: payload)
+    if compression_name == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3)
+        decompressor = zstandard.ZstdDecompressor()
+        return compressor.compress, decompressor.decompress
+    if compression_name == "lz4" and lz4_frame is not None:
+        return lz4_frame.compress, lz4_frame.decompress
+    return None
+
+
+class ValueSerializer:
+    """
+    Encodes cached values with a pluggable codec and optional compression.
+
+    Payloads larger than compression_threshold bytes are compressed. Decoding
+    reads the tag byte, so values written with any codec/compression pair
+    (or legacy untagged JSON) can be read regardless of the current settings.
+
+    Note:
+        Only the msgpack codec (the default) round-trips datetimes, dates,
+        UUIDs and decimals; the JSON codecs turn them into strings.
+        orjson, zstandard and lz4 are optional. If the configured codec or
+        compression is not installed, the serializer falls back to stdlib
+        JSON / no compression and logs a warning.
+    """
+
+    def __init__(
+        self,
+        codec_name: str = settings.CACHE_CODEC,
+        compression_name: str = settings.CACHE_COMPRESSION,
+        compression_threshold: int = settings.CACHE_COMPRESSION_THRESHOLD,
+    ):
+        if codec_name not in CODEC_IDS:
+            raise ValueError(f"Unknown cache codec: {codec_name}")
+        if compression_name not in COMPRESSION_IDS:
+            raise ValueError(f"Unknown cache compression: {compression_name}")
+
+        if _codec_functions(codec_name) is None:
+            logger.warning(
+                f"Cache codec {codec_name} is not installed, falling back to json"
+            )
+            codec_name = "json"
+        if _compression_functions(compression_name) is None:
+            logger.warning(
+                f"Cache compression {compression_name} is not installed, disabling compression"
+            )
+            compression_name = "none"
+
+        self.codec_name = codec_name
+        self.compression_name = compression_name
+        self.compression_threshold = compression_threshold
+        self._encode, _ = _codec_functions(codec_name)
+        self._compress, _ = _compression_functions(compression_name)
+        self._decoders: Dict[
+            int, Tuple[Callable[[bytes], Any], Callable[[bytes], bytes]]
+        ] = {}
+
+    def _tag(self, codec_name: str, compression_name: str) -> int:
+        return (
+            TAG_MARKER
+            | (CODEC_IDS[codec_name] << 3)
+            | COMPRESSION_IDS[compression_name]
+        )
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value into a tagged payload"""
+        try:
+            payload = self._encode(value)
+        except Exception as encode_error:
+            raise SerializationError(
+                f"Could not encode value with {self.codec_name}: {encode_error}"
+            )
+
+        compression_name = "none"
+        if (
+            self.compression_name != "none"
+            and len(payload) > self.compression_threshold
+        ):
+            payload = self._compress(payload)
+            compression_name = self.compression_name
+
+        return bytes((self._tag(self.codec_name, compression_name),)) + payload
+
+    def loads(self, payload: bytes) -> Any:
+        """Decode a tagged (or legacy untagged JSON) payload"""
+        if isinstance(payload, str):
+            payload = payload.encode()
+
+        if not payload or payload[0] < TAG_MARKER:
+            return _json_loads(payload)
+
+        tag = payload[0]
+        decode, decompress = self._decoder_for_tag(tag)
+        try:
+            return decode(decompress(payload[1:]))
+        except Exception as decode_error:
+            raise SerializationError(
+                f"Could not decode cached value with tag {tag:#x}: {decode_error}"
+            )
+
+    def _decoder_for_tag(
+        self, tag: int
+    ) -> Tuple[Callable[[bytes], Any], Callable[[bytes], bytes]]:
+        decoder = self._decoders.get(tag)
+        if decoder is not None:
+            return decoder
+
+        codec_id = (tag >> 3) & 0b111
+        compression_id = tag & 0b111
+        codec_name = next(
+            (name for name, known_id in CODEC_IDS.items() if known_id == codec_id), None
+        )
+        compression_name = next(
+            (
+                name
+                for name, known_id in COMPRESSION_IDS.items()
+                if known_id == compression_id
+            ),
+            None,
+        )
+
+        codec_functions = _codec_functions(codec_name) if codec_name else None
+        compression_functions = (
+            _compression_functions(compression_name) if compression_name else None
+        )
+        if codec_functions is None or compression_functions is None:
+            raise SerializationError(
+                f"Cannot decode cached value with tag {tag:#x}: "
+                f"codec {codec_name} / compression {compression_name} unavailable"
+            )
+
+        decoder = (codec_functions[1], compression_functions[1])
+        self._decoders[tag] = decoder
+        return decoder
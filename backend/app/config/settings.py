@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import field_validator, AnyHttpUrl
 from pydantic_settings import BaseSettings
 from enum import Enum
@@ -24,14 +24,110 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     ALGORITHM: str = "HS256"
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+
+    # Password hashing (bcrypt runs off the event loop)
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
     # Database
     DATABASE_URL: str = "sqlite:///./infinity.db"
     DATABASE_ECHO: bool = False
+    # Connection pool; None picks the per-environment default from database.POOL_DEFAULTS
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None  # seconds to wait for a free connection
+    DB_POOL_PRE_PING: Optional[bool] = None
+    DB_POOL_RECYCLE: int = 1800  # seconds, keep below the server/proxy idle timeout
+    DATABASE_READ_REPLICA_URL: Optional[str] = None  # read-only routes use it when set
+    READ_YOUR_WRITES_SECONDS: float = (
+        5.0  # a user's reads stay on the primary this long after a write
+    )
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = (
+        500  # asyncpg only; use 0 behind PgBouncer in transaction mode
+    )
+    COUNT_CACHE_TTL: int = (
+        60  # seconds, bounds staleness of counts changed outside the ORM
+    )
+    COUNT_ESTIMATE_THRESHOLD: int = (
+        10000  # PostgreSQL only; larger results report the planner estimate
+    )
 
     # Redis Cache
     REDIS_URL: str = "redis://localhost:6379"
     CACHE_TTL: int = 300  # 5 minutes
+    CACHE_KEY_PREFIX: str = "infinity:"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 2.0  # seconds to wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5.0
+    REDIS_COMMAND_TIMEOUT: float = 0.25  # per-call latency budget, seconds
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = (
+        5  # consecutive failures before bypassing Redis
+    )
+    REDIS_BREAKER_RESET_TIMEOUT: float = 1.0  # seconds before the first health probe
+    REDIS_BREAKER_MAX_RESET_TIMEOUT: float = 30.0  # cap on the probe backoff
+    # In-process Redis stand-in, used when REDIS_URL is "redis+memory://"
+    MEMORY_REDIS_MAX_BYTES: int = 64 * 1024 * 1024
+    MEMORY_REDIS_TIMER_RESOLUTION: float = 0.1  # seconds per expiry timer wheel slot
+    # Never evicted by the in-process backend's memory cap (relative to CACHE_KEY_PREFIX)
+    MEMORY_REDIS_NO_EVICT_PREFIXES: List[str] = [
+        "stream:",
+        "counters:",
+        "trending:",
+        "tag:",
+        "lock:",
+        "ryw:",
+    ]
+    CACHE_CODEC: str = (
+        "msgpack"  # "msgpack" (keeps datetimes, UUIDs, decimals), "json" or "orjson"
+    )
+    CACHE_COMPRESSION: str = "zstd"  # "none", "zstd" or "lz4"
+    CACHE_COMPRESSION_THRESHOLD: int = 1024  # bytes
+
+    # In-process near-cache in front of Redis (kept coherent via pub/sub)
+    NEAR_CACHE_MAX_SIZE: int = 10000
+    NEAR_CACHE_TTL: int = (
+        60  # seconds, upper bound on staleness if an invalidation is missed
+    )
+    NAMESPACE_VERSION_LOCAL_TTL: int = 5  # seconds
+
+    # Authenticated user cache
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_LOCAL_TTL: int = 30  # seconds, bounds staleness across workers
+    USER_CACHE_TTL: int = 300  # seconds, Redis tier
+
+    # Card interaction ingestion (POST /learning/session/{id}/metrics)
+    INTERACTION_DURABILITY: str = (
+        "memory"  # "sync" (write per request), "memory" or "redis" (survives worker crashes)
+    )
+    INTERACTION_FLUSH_INTERVAL: float = 1.0  # seconds between bulk writes
+    INTERACTION_FLUSH_BATCH_SIZE: int = 1000
+    INTERACTION_BUFFER_MAX_SIZE: int = (
+        50000  # "memory" only; beyond this requests write synchronously
+    )
+    INTERACTION_CLAIM_IDLE_SECONDS: float = (
+        30.0  # "redis" only; retry entries unacknowledged this long
+    )
+
+    # Hot row counters (card and learning session statistics)
+    HOT_COUNTERS_ENABLED: bool = (
+        True  # count in Redis and reconcile into the rows periodically
+    )
+    COUNTER_RECONCILE_INTERVAL: float = 5.0  # seconds
+    COUNTER_RECONCILE_BATCH_SIZE: int = 500  # rows per reconcile round trip
+    COUNTER_PROCESSING_TIMEOUT: float = (
+        300.0  # seconds before a dead worker's reconcile batch is restored
+    )
+
+    # Trending topics (exponentially decayed activity leaderboards)
+    TRENDING_HALF_LIFE_SECONDS: float = (
+        6 * 3600
+    )  # activity counts half as much after this long
+    TRENDING_SESSION_WEIGHT: float = 5.0  # score for starting a learning session
+    TRENDING_INTERACTION_WEIGHT: float = 1.0  # score per card interaction
+    TRENDING_CACHE_TTL: int = 30  # seconds, how stale the trending list may be
 
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = [
@@ -83,6 +179,21 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_JSON: bool = False
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 256
+    LOG_FLUSH_INTERVAL: float = 0.5  # seconds
+    # Fraction of access log records kept per response status class
+    ACCESS_LOG_SAMPLE_RATES: Dict[str, float] = {
+        "2xx": 0.01,
+        "3xx": 0.01,
+        "4xx": 1.0,
+        "5xx": 1.0,
+    }
+
+    # Metrics (/metrics answers scrapers from an allowed network or with the token)
+    METRICS_TOKEN: Optional[str] = None  # sent as "Authorization: Bearer <token>"
+    METRICS_ALLOWED_NETWORKS: List[str] = ["127.0.0.1/32", "::1/128"]
 
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
@@ -90,6 +201,13 @@ class Settings(BaseSettings):
 
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_AUTHENTICATED_PER_MINUTE: int = 120
+    # Path prefix -> requests per minute, overrides the default for matching routes
+    RATE_LIMIT_ROUTE_POLICIES: Dict[str, int] = {
+        "/auth/token": 10,
+        "/auth/register": 5,
+    }
+    RATE_LIMIT_USE_REDIS: bool = True
 
     # File Upload
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
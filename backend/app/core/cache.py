@@ -0,0 +1,749 @@
+import asyncio
+import functools
+import inspect
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from loguru import logger
+
+from app.config import redis_client, settings
+
+
+class LRUCache:
+    """
+    Bounded, TTL-aware in-process LRU cache.
+
+    Entries are evicted least-recently-used first once max_size is reached,
+    and lazily on read once their deadline has passed. Individual entries may
+    override the default TTL.
+
+    Note:
+        Not thread-safe. Intended to be used from a single event loop.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[Any, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, cache_key: Hashable) -> bool:
+        return self._lookup(cache_key) is not _MISSING
+
+    def _lookup(self, cache_key: Hashable) -> Any:
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return _MISSING
+
+        cached_value, deadline = entry
+        if deadline is not None and deadline <= time.monotonic():
+            del self._entries[cache_key]
+            return _MISSING
+
+        return cached_value
+
+    def get(self, cache_key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired"""
+        cached_value = self._lookup(cache_key)
+        if cached_value is _MISSING:
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(cache_key)
+        self.hits += 1
+        return cached_value
+
+    def set(
+        self, cache_key: Hashable, value: Any, ttl_seconds: Optional[float] = None
+    ) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        A ttl_seconds of None falls back to the cache default; a non-positive
+        TTL means the value is already expired and is not stored.
+        """
+        time_to_live = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        if time_to_live is not None and time_to_live <= 0:
+            self._entries.pop(cache_key, None)
+            return
+
+        deadline = time.monotonic() + time_to_live if time_to_live is not None else None
+        self._entries[cache_key] = (value, deadline)
+        self._entries.move_to_end(cache_key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, cache_key: Hashable) -> bool:
+        """Remove a key, returning whether it was present"""
+        return self._entries.pop(cache_key, None) is not None
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Remove every entry for which predicate(key, value) is true.
+
+        This is a full scan, so reserve it for rare bulk invalidations.
+        """
+        matching_keys = [
+            cache_key
+            for cache_key, (cached_value, _) in self._entries.items()
+            if predicate(cache_key, cached_value)
+        ]
+        for cache_key in matching_keys:
+            del self._entries[cache_key]
+        return len(matching_keys)
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+_MISSING = object()
+# Stored locally by NearCache(cache_misses=True) for keys Redis does not have
+_ABSENT = object()
+
+
+class InvalidationBus:
+    """
+    Broadcasts near-cache invalidations to every worker over Redis pub/sub.
+
+    Each message names the originating process, the near-cache namespace and
+    the key. Workers drop their local copy when they receive it; the sender
+    ignores its own messages. Whenever the subscription is (re)established,
+    all near-caches are cleared, since invalidations may have been missed
+    while disconnected.
+
+    Other per-process state can listen on the same channel under its own
+    namespace with add_handler(); the handler gets the key of each message.
+    """
+
+    CHANNEL = "cache:invalidations"
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self):
+        self.origin_id = uuid.uuid4().hex
+        self._near_caches: Dict[str, "NearCache"] = {}
+        self._handlers: Dict[str, Callable[[str], None]] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+        self.received = 0
+
+    def register(self, near_cache: "NearCache") -> None:
+        self._near_caches[near_cache.namespace] = near_cache
+
+    def add_handler(self, namespace: str, handler: Callable[[str], None]) -> None:
+        """Call handler with the key of every message other workers publish under namespace"""
+        self._handlers[namespace] = handler
+
+    def near_caches(self) -> Iterable["NearCache"]:
+        return self._near_caches.values()
+
+    async def publish(self, namespace: str, cache_key: str) -> None:
+        await redis_client.publish(
+            self.CHANNEL, f"{self.origin_id}|{namespace}|{cache_key}"
+        )
+
+    def handle_message(self, message: Any) -> None:
+        if isinstance(message, bytes):
+            message = message.decode()
+
+        origin_id, _, namespaced_key = message.partition("|")
+        namespace, _, cache_key = namespaced_key.partition("|")
+        if origin_id == self.origin_id:
+            return
+
+        near_cache = self._near_caches.get(namespace)
+        if near_cache is not None:
+            self.received += 1
+            near_cache.drop_local(cache_key)
+            return
+
+        handler = self._handlers.get(namespace)
+        if handler is not None:
+            self.received += 1
+            handler(cache_key)
+
+    async def start(self) -> None:
+        """Start listening for invalidations in the background"""
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop the background listener"""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = redis_client.create_pubsub()
+            if pubsub is None:
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+                continue
+
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                for near_cache in self._near_caches.values():
+                    near_cache.clear_local()
+
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.handle_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as listener_error:
+                logger.warning(f"Cache invalidation listener error: {listener_error}")
+            finally:
+                await pubsub.aclose()
+
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+
+invalidation_bus = InvalidationBus()
+
+
+class NearCache:
+    """
+    In-process LRU in front of Redis for small, extremely hot keys.
+
+    Reads check the local LRU, then Redis, populating the local tier on the
+    way back. Writes and deletes go to Redis and are broadcast through the
+    invalidation bus so other workers drop their stale copy within
+    milliseconds; the local TTL bounds staleness if a message is missed.
+
+    Fills after a miss should use fill_token() and set_if_unchanged(), so a
+    value loaded before a concurrent delete() cannot be written back after it.
+
+    With cache_misses=True, keys Redis does not have are remembered locally
+    for the same TTL as hits, for caches where absence is the common answer.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int = settings.NEAR_CACHE_MAX_SIZE,
+        ttl_seconds: float = settings.NEAR_CACHE_TTL,
+        redis_ttl_seconds: int = settings.CACHE_TTL,
+        cache_misses: bool = False,
+        bus: InvalidationBus = invalidation_bus,
+    ):
+        self.namespace = namespace
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.cache_misses = cache_misses
+        self._local_cache = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._bus = bus
+        self._local_invalidations = 0
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.rejected_fills = 0
+        bus.register(self)
+
+    def _redis_key(self, cache_key: str) -> str:
+        return f"{self.namespace}{cache_key}"
+
+    def _generation_key(self, cache_key: str) -> str:
+        return f"{self.namespace}generation:{cache_key}"
+
+    async def get(self, cache_key: Any) -> Any:
+        """Return the cached value, or None if neither tier has it"""
+        cache_key = str(cache_key)
+        cached_value = self._local_cache.get(cache_key)
+        if cached_value is not None:
+            return None if cached_value is _ABSENT else cached_value
+
+        local_invalidations = self._local_invalidations
+        cached_value = await redis_client.get_value(self._redis_key(cache_key))
+        if cached_value is None:
+            self.redis_misses += 1
+            # A miss because Redis is unavailable says nothing about the key
+            if self.cache_misses and redis_client.is_connected():
+                self._fill_local(cache_key, _ABSENT, local_invalidations)
+            return None
+
+        self.redis_hits += 1
+        self._fill_local(cache_key, cached_value, local_invalidations)
+        return cached_value
+
+    def _fill_local(self, cache_key: str, value: Any, local_invalidations: int) -> None:
+        # Skipped if an invalidation arrived while Redis was being read
+        if local_invalidations == self._local_invalidations:
+            self._local_cache.set(cache_key, value)
+
+    async def set(self, cache_key: Any, value: Any, broadcast: bool = True) -> None:
+        """
+        Store a value in both tiers.
+
+        Pass broadcast=False when merely populating after a miss, where other
+        workers cannot be holding a different value.
+        """
+        cache_key = str(cache_key)
+        self._local_cache.set(cache_key, value)
+        await redis_client.set_value(
+            self._redis_key(cache_key), value, expiration_seconds=self.redis_ttl_seconds
+        )
+        if broadcast:
+            await self._bus.publish(self.namespace, cache_key)
+
+    async def fill_token(self, cache_key: Any) -> Tuple[int, Optional[str]]:
+        """Snapshot to take before loading a value from its source, for set_if_unchanged()"""
+        cache_key = str(cache_key)
+        return self._local_invalidations, await redis_client.get_generation(
+            self._generation_key(cache_key)
+        )
+
+    async def set_if_unchanged(
+        self, cache_key: Any, value: Any, fill_token: Tuple[int, Optional[str]]
+    ) -> bool:
+        """
+        Populate both tiers after a miss, unless the key was deleted since fill_token().
+
+        Returns whether the value was stored.
+        """
+        cache_key = str(cache_key)
+        local_invalidations, generation = fill_token
+        stored = None
+        if generation is not None:
+            stored = await redis_client.set_value_if_generation(
+                self._redis_key(cache_key),
+                value,
+                self._generation_key(cache_key),
+                generation,
+                expiration_seconds=self.redis_ttl_seconds,
+            )
+
+        # Any local invalidation may have been for this key; skipping the
+        # local fill only costs a Redis read later
+        if stored is False or local_invalidations != self._local_invalidations:
+            self.rejected_fills += 1
+            return False
+
+        self._local_cache.set(cache_key, value)
+        return True
+
+    async def delete(self, cache_key: Any) -> None:
+        """
+        Remove a key from both tiers and from every other worker's local tier.
+
+        The key's generation is bumped too, so fills that started before the
+        delete are rejected.
+        """
+        cache_key = str(cache_key)
+        self.drop_local(cache_key)
+        await redis_client.delete_and_bump_generation(
+            self._redis_key(cache_key),
+            self._generation_key(cache_key),
+            self.redis_ttl_seconds,
+        )
+        await self._bus.publish(self.namespace, cache_key)
+
+    async def broadcast_invalidation(self, cache_key: Any) -> None:
+        """Drop a key from every worker's local tier, leaving Redis as is"""
+        cache_key = str(cache_key)
+        self.drop_local(cache_key)
+        await self._bus.publish(self.namespace, cache_key)
+
+    def drop_local(self, cache_key: str) -> None:
+        """Forget a key in this worker only (used by the invalidation bus)"""
+        self._local_invalidations += 1
+        self._local_cache.delete(cache_key)
+
+    def clear_local(self) -> None:
+        """Forget every key in this worker only"""
+        self._local_invalidations += 1
+        self._local_cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-layer hit counters and hit ratios"""
+        local_stats = self._local_cache.stats()
+        redis_lookups = self.redis_hits + self.redis_misses
+        total_lookups = local_stats["hits"] + local_stats["misses"]
+        return {
+            "size": local_stats["size"],
+            "max_size": local_stats["max_size"],
+            "local_hits": local_stats["hits"],
+            "redis_hits": self.redis_hits,
+            "misses": self.redis_misses,
+            "rejected_fills": self.rejected_fills,
+            "local_hit_ratio": local_stats["hit_ratio"],
+            "redis_hit_ratio": (
+                (self.redis_hits / redis_lookups) if redis_lookups else 0.0
+            ),
+            "overall_hit_ratio": (
+                ((local_stats["hits"] + self.redis_hits) / total_lookups)
+                if total_lookups
+                else 0.0
+            ),
+        }
+
+
+TAG_PREFIX = "tag:"
+
+
+class CacheNamespace:
+    """
+    Versioned key namespace.
+
+    Keys are stored as ns:<name>:v<version>:<key>. Invalidating the whole
+    namespace is a single INCR of its version: readers immediately start
+    using fresh keys and the orphaned ones age out through their TTL, so no
+    keys ever need to be enumerated. Namespaces are cheap to construct, so
+    fine-grained ones like "cards:topic:42" can be created on demand.
+
+    The current version is read through a near-cache and bumps are broadcast
+    to every worker.
+    """
+
+    KEY_PREFIX = "ns:"
+    VERSION_PREFIX = "ns:version:"
+
+    def __init__(self, name: str, ttl_seconds: int = settings.CACHE_TTL):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+
+    async def version(self) -> int:
+        """Current version of the namespace (0 if never invalidated)"""
+        current_version = await _namespace_versions.get(self.name)
+        return int(current_version or 0)
+
+    async def key(self, cache_key: str) -> str:
+        """Full versioned key for an entry in this namespace"""
+        return f"{self.KEY_PREFIX}{self.name}:v{await self.version()}:{cache_key}"
+
+    async def get(self, cache_key: str) -> Any:
+        return await redis_client.get_value(await self.key(cache_key))
+
+    async def set(
+        self,
+        cache_key: str,
+        value: Any,
+        expiration_seconds: Optional[int] = None,
+        tags: Sequence[str] = (),
+    ) -> bool:
+        """Store an entry, optionally registering it under tags"""
+        time_to_live = expiration_seconds or self.ttl_seconds
+        versioned_key = await self.key(cache_key)
+        stored = await redis_client.set_value(
+            versioned_key, value, expiration_seconds=time_to_live
+        )
+        if stored and tags:
+            await tag_keys([versioned_key], tags, time_to_live)
+        return stored
+
+    async def delete(self, cache_key: str) -> bool:
+        return await redis_client.delete_key(await self.key(cache_key))
+
+    async def invalidate(self) -> Optional[int]:
+        """Invalidate every entry in the namespace in O(1); returns the new version"""
+        new_version = await redis_client.increment(f"{self.VERSION_PREFIX}{self.name}")
+        await _namespace_versions.broadcast_invalidation(self.name)
+        logger.debug(f"Invalidated cache namespace {self.name} (now v{new_version})")
+        return new_version
+
+
+async def tag_keys(
+    cache_keys: Sequence[str], tags: Sequence[str], ttl_seconds: int
+) -> None:
+    """Record cache keys under each tag so they can be dropped together"""
+    for tag in tags:
+        await redis_client.add_to_set(
+            f"{TAG_PREFIX}{tag}", cache_keys, expiration_seconds=ttl_seconds
+        )
+
+
+async def invalidate_tag(tag: str) -> int:
+    """
+    Drop every key recorded under a tag, e.g. "user:42".
+
+    The tag set is walked with SSCAN and keys are freed with UNLINK in
+    batches, so this never blocks Redis. Returns the number of keys removed.
+    """
+    return await redis_client.unlink_set_members(f"{TAG_PREFIX}{tag}")
+
+
+# Most namespaces are never invalidated, so "no version yet" is cached too
+_namespace_versions = NearCache(
+    CacheNamespace.VERSION_PREFIX,
+    ttl_seconds=settings.NAMESPACE_VERSION_LOCAL_TTL,
+    cache_misses=True,
+)
+
+
+class CacheAside:
+    """
+    Cache-aside wrapper for one async function, with stampede protection.
+
+    - Keys are rendered from key_template using the call's bound arguments,
+      e.g. "topics:trending:{limit}".
+    - Concurrent misses for the same key inside a worker share one in-flight
+      computation; across workers, a short Redis lock elects a single
+      recomputer while the others poll for its result.
+    - Probabilistic early refresh (XFetch): each read may volunteer to
+      recompute slightly before expiry, with a probability that grows as
+      expiry approaches and with how long the value took to compute, so hot
+      keys are refreshed before they ever expire under load.
+    - Optional namespace and tag templates (rendered like the key) place the
+      entry in a versioned CacheNamespace and in tag sets, so it can be
+      dropped in bulk with CacheNamespace.invalidate() or invalidate_tag().
+
+    Note:
+        Cached values go through the Redis codec, so the wrapped function must
+        return serializable data (dicts, lists, model_dump() output), not ORM
+        instances.
+    """
+
+    KEY_PREFIX = "cache:"
+    LOCK_PREFIX = "lock:"
+
+    def __init__(
+        self,
+        compute_function: Callable[..., Awaitable[Any]],
+        key_template: str,
+        ttl_seconds: int = settings.CACHE_TTL,
+        lock_timeout_seconds: float = 10.0,
+        lock_poll_interval_seconds: float = 0.05,
+        early_refresh_beta: float = 1.0,
+        namespace_template: Optional[str] = None,
+        tag_templates: Sequence[str] = (),
+    ):
+        self.compute_function = compute_function
+        self.key_template = key_template
+        self.namespace_template = namespace_template
+        self.tag_templates = tuple(tag_templates)
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.lock_poll_interval_seconds = lock_poll_interval_seconds
+        self.early_refresh_beta = early_refresh_beta
+        self._signature = inspect.signature(compute_function)
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.early_refreshes = 0
+        self.recomputations = 0
+
+    def _bound_arguments(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        bound_arguments = self._signature.bind(*args, **kwargs)
+        bound_arguments.apply_defaults()
+        return bound_arguments.arguments
+
+    async def cache_key(self, *args: Any, **kwargs: Any) -> str:
+        """Render the cache key for a call (resolving the namespace version)"""
+        arguments = self._bound_arguments(*args, **kwargs)
+        rendered_key = self.key_template.format(**arguments)
+        if self.namespace_template is None:
+            return self.KEY_PREFIX + rendered_key
+
+        namespace = CacheNamespace(self.namespace_template.format(**arguments))
+        return await namespace.key(rendered_key)
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        cache_key = await self.cache_key(*args, **kwargs)
+        cached_entry = await redis_client.get_value(cache_key)
+
+        if cached_entry is not None:
+            if not self._should_refresh_early(cached_entry):
+                self.hits += 1
+                return cached_entry["value"]
+            self.early_refreshes += 1
+        else:
+            self.misses += 1
+
+        value = await self._compute_once(
+            cache_key, lambda: self.compute_function(*args, **kwargs), cached_entry
+        )
+
+        if self.tag_templates and cached_entry is None:
+            arguments = self._bound_arguments(*args, **kwargs)
+            await tag_keys(
+                [cache_key],
+                [
+                    tag_template.format(**arguments)
+                    for tag_template in self.tag_templates
+                ],
+                self.ttl_seconds,
+            )
+
+        return value
+
+    async def invalidate(self, *args: Any, **kwargs: Any) -> bool:
+        """Drop the cached value for a call"""
+        return await redis_client.delete_key(await self.cache_key(*args, **kwargs))
+
+    def _should_refresh_early(self, cached_entry: Dict[str, Any]) -> bool:
+        compute_seconds = cached_entry.get("delta", 0.0)
+        early_by = (
+            -compute_seconds * self.early_refresh_beta * math.log(1.0 - random.random())
+        )
+        return time.time() + early_by >= cached_entry["expires_at"]
+
+    async def _compute_once(
+        self,
+        cache_key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cached_entry: Optional[Dict[str, Any]],
+    ) -> Any:
+        """
+        Run compute once per key in this worker; concurrent callers wait for it.
+
+        Note:
+            If the caller running the computation is cancelled, the shared
+            future is cancelled rather than failed, and the first waiter takes
+            over the computation with its own arguments; the others wait for
+            that one. A cancelled waiter only stops waiting.
+        """
+        while (in_flight := self._in_flight.get(cache_key)) is not None:
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        computation = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = computation
+        try:
+            value = await self._compute_with_lock(cache_key, compute, cached_entry)
+            computation.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            computation.cancel()
+            raise
+        except BaseException as compute_error:
+            computation.set_exception(compute_error)
+            computation.exception()
+            raise
+        finally:
+            del self._in_flight[cache_key]
+
+    async def _compute_with_lock(
+        self,
+        cache_key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cached_entry: Optional[Dict[str, Any]],
+    ) -> Any:
+        lock_key = self.LOCK_PREFIX + cache_key
+        ownership_token = await redis_client.acquire_lock(
+            lock_key, self.lock_timeout_seconds
+        )
+
+        if ownership_token is None and redis_client.is_connected():
+            if cached_entry is not None:
+                # Another worker is already refreshing; the current value is still valid
+                return cached_entry["value"]
+
+            refreshed_entry = await self._wait_for_refresh(cache_key)
+            if refreshed_entry is not None:
+                return refreshed_entry["value"]
+            logger.warning(f"Timed out waiting for {cache_key} to be recomputed")
+
+        try:
+            self.recomputations += 1
+            start_time = time.perf_counter()
+            value = await compute()
+            compute_seconds = time.perf_counter() - start_time
+
+            await redis_client.set_value(
+                cache_key,
+                {
+                    "value": value,
+                    "delta": compute_seconds,
+                    "expires_at": time.time() + self.ttl_seconds,
+                },
+                expiration_seconds=self.ttl_seconds,
+            )
+            return value
+        finally:
+            if ownership_token is not None:
+                await redis_client.release_lock(lock_key, ownership_token)
+
+    async def _wait_for_refresh(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.lock_poll_interval_seconds)
+            cached_entry = await redis_client.get_value(cache_key)
+            if cached_entry is not None:
+                return cached_entry
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/refresh counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "early_refreshes": self.early_refreshes,
+            "recomputations": self.recomputations,
+        }
+
+
+def cached(
+    key_template: str,
+    ttl_seconds: int = settings.CACHE_TTL,
+    lock_timeout_seconds: float = 10.0,
+    early_refresh_beta: float = 1.0,
+    namespace: Optional[str] = None,
+    tags: Sequence[str] = (),
+) -> Callable[[Callable[..., Awaitable[Any]]], CacheAside]:
+    """
+    Decorate an async function with Redis cache-aside and stampede protection.
+
+    Example:
+        @cached("trending:{limit}", ttl_seconds=60, namespace="topics")
+        async def get_trending_topic_rows(db: AsyncSession, limit: int) -> list[dict]:
+            ...
+
+        @cached("saved:{skip}:{limit}", namespace="cards:user:{user_id}", tags=["user:{user_id}"])
+        async def get_saved_card_rows(db: AsyncSession, user_id: int, skip: int, limit: int):
+            ...
+
+    The decorated function gains invalidate(*args, **kwargs) and stats().
+    """
+
+    def decorator(compute_function: Callable[..., Awaitable[Any]]) -> CacheAside:
+        cache_aside = CacheAside(
+            compute_function,
+            key_template,
+            ttl_seconds=ttl_seconds,
+            lock_timeout_seconds=lock_timeout_seconds,
+            early_refresh_beta=early_refresh_beta,
+            namespace_template=namespace,
+            tag_templates=tags,
+        )
+        functools.update_wrapper(cache_aside, compute_function)
+        return cache_aside
+
+    return decorator
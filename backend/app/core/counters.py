@@ -0,0 +1,480 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Union
+
+from loguru import logger
+from sqlalchemy import Integer, bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import redis_client, settings
+from app.config.database import AsyncSessionLocal
+from app.config.memory_redis import register_script_implementation
+from app.models import Card, LearningSession
+
+Number = Union[int, float]
+
+# Takes up to ARGV[1] dirty counters (KEYS[1]) for one reconcile batch. Each
+# hash ARGV[2] .. name is renamed to its processing key ARGV[3] .. row id
+# (the name minus its first ARGV[4] characters) and the row id added to the
+# batch's member set KEYS[3]; batch ARGV[5] is registered in KEYS[2] with
+# its start time ARGV[6]. Rows whose previous batch is still processing go
+# back into the dirty set. Returns {names popped, {{row id, fields}, ...}}.
+TAKE_COUNTERS_LUA_SCRIPT = """
+local counter_names = redis.call('SPOP', KEYS[1], ARGV[1])
+local taken = {}
+local busy = {}
+for _, counter_name in ipairs(counter_names) do
+    local row_id = string.sub(counter_name, tonumber(ARGV[4]) + 1)
+    local processing_key = ARGV[3] .. row_id
+    if redis.call('EXISTS', processing_key) == 1 then
+        busy[#busy + 1] = counter_name
+    elseif redis.call('EXISTS', ARGV[2] .. counter_name) == 1 then
+        redis.call('RENAME', ARGV[2] .. counter_name, processing_key)
+        redis.call('SADD', KEYS[3], row_id)
+        taken[#taken + 1] = {row_id, redis.call('HGETALL', processing_key)}
+    end
+end
+if #busy > 0 then
+    redis.call('SADD', KEYS[1], unpack(busy))
+end
+if #taken > 0 then
+    redis.call('ZADD', KEYS[2], ARGV[6], ARGV[5])
+end
+return {#counter_names, taken}
+"""
+
+# Drops batch ARGV[2] once its deltas are committed: deletes the processing
+# hashes ARGV[1] .. row id of its members (KEYS[2]) and its entry in KEYS[1]
+FINISH_COUNTERS_LUA_SCRIPT = """
+local row_ids = redis.call('SMEMBERS', KEYS[2])
+for _, row_id in ipairs(row_ids) do
+    redis.call('DEL', ARGV[1] .. row_id)
+end
+redis.call('DEL', KEYS[2])
+redis.call('ZREM', KEYS[1], ARGV[2])
+return #row_ids
+"""
+
+# Puts batch ARGV[4] back: adds each member's processing hash ARGV[1] .. row id
+# into its counter hash ARGV[2] .. row id (HINCRBY for the integer fields
+# ARGV[5..], HINCRBYFLOAT otherwise), marks ARGV[3] .. row id dirty in
+# KEYS[3], then drops the batch like FINISH_COUNTERS_LUA_SCRIPT
+RESTORE_COUNTERS_LUA_SCRIPT = """
+local integer_fields = {}
+for index = 5, #ARGV do
+    integer_fields[ARGV[index]] = true
+end
+local row_ids = redis.call('SMEMBERS', KEYS[2])
+for _, row_id in ipairs(row_ids) do
+    local processing_key = ARGV[1] .. row_id
+    local field_values = redis.call('HGETALL', processing_key)
+    for index = 1, #field_values, 2 do
+        if integer_fields[field_values[index]] then
+            redis.call('HINCRBY', ARGV[2] .. row_id, field_values[index], field_values[index + 1])
+        else
+            redis.call('HINCRBYFLOAT', ARGV[2] .. row_id, field_values[index], field_values[index + 1])
+        end
+    end
+    redis.call('DEL', processing_key)
+    redis.call('SADD', KEYS[3], ARGV[3] .. row_id)
+end
+redis.call('DEL', KEYS[2])
+redis.call('ZREM', KEYS[1], ARGV[4])
+return #row_ids
+"""
+
+# Batches in KEYS[1] started at or before ARGV[1]
+STALE_COUNTER_BATCHES_LUA_SCRIPT = """
+return redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+"""
+
+
+def _take_counters_in_memory(keyspace, keys, args):
+    counter_names = keyspace.spop(keys[0], int(args[0]))
+    taken = []
+    busy = []
+    for counter_name in counter_names:
+        row_id = counter_name[int(args[3]) :]
+        processing_key = args[2] + row_id
+        if keyspace.exists(processing_key):
+            busy.append(counter_name)
+        elif keyspace.exists(args[1] + counter_name):
+            field_values = keyspace.hgetall(args[1] + counter_name)
+            keyspace.rename(args[1] + counter_name, processing_key)
+            keyspace.sadd(keys[2], row_id)
+            taken.append(
+                [
+                    row_id,
+                    [
+                        item
+                        for field_and_value in field_values.items()
+                        for item in field_and_value
+                    ],
+                ]
+            )
+    if busy:
+        keyspace.sadd(keys[0], *busy)
+    if taken:
+        keyspace.zadd(keys[1], {args[4]: float(args[5])})
+    return [len(counter_names), taken]
+
+
+def _finish_counters_in_memory(keyspace, keys, args):
+    row_ids = keyspace.smembers(keys[1])
+    for row_id in row_ids:
+        keyspace.delete(args[0] + row_id)
+    keyspace.delete(keys[1])
+    keyspace.zrem(keys[0], args[1])
+    return len(row_ids)
+
+
+def _restore_counters_in_memory(keyspace, keys, args):
+    integer_fields = set(args[4:])
+    row_ids = keyspace.smembers(keys[1])
+    for row_id in row_ids:
+        for field_name, field_value in keyspace.hgetall(args[0] + row_id).items():
+            if field_name in integer_fields:
+                keyspace.hincrby(args[1] + row_id, field_name, int(field_value))
+            else:
+                keyspace.hincrbyfloat(args[1] + row_id, field_name, float(field_value))
+        keyspace.delete(args[0] + row_id)
+        keyspace.sadd(keys[2], args[2] + row_id)
+    keyspace.delete(keys[1])
+    keyspace.zrem(keys[0], args[3])
+    return len(row_ids)
+
+
+def _stale_counter_batches_in_memory(keyspace, keys, args):
+    return [
+        batch_token
+        for batch_token, started_at in keyspace.zrange(keys[0], 0, -1, withscores=True)
+        if started_at <= float(args[0])
+    ]
+
+
+register_script_implementation(TAKE_COUNTERS_LUA_SCRIPT, _take_counters_in_memory)
+register_script_implementation(FINISH_COUNTERS_LUA_SCRIPT, _finish_counters_in_memory)
+register_script_implementation(RESTORE_COUNTERS_LUA_SCRIPT, _restore_counters_in_memory)
+register_script_implementation(
+    STALE_COUNTER_BATCHES_LUA_SCRIPT, _stale_counter_batches_in_memory
+)
+
+
+class HotCounters:
+    """
+    Counter columns of one table, incremented in Redis and reconciled into the rows.
+
+    increment() adds to a Redis hash per row ("counters:<table>:<id>")
+    instead of updating the row, so concurrent writers to one row never queue
+    on its lock. reconcile() atomically moves the accumulated deltas to a
+    processing hash per row ("counters:processing:<table>:<id>"), adds them
+    to the columns and deletes the processing hashes only once that commit
+    succeeded. Until then readers add pending() to the stored values, which
+    counts both hashes (overlay() does this for a loaded row).
+
+    Note:
+        If Redis is unavailable increment() returns False and the caller
+        should apply() the deltas to the rows instead. Deltas that fail to
+        commit are put back. A batch left behind by a crashed worker is put
+        back after COUNTER_PROCESSING_TIMEOUT; if that worker had committed
+        but not yet deleted it, those deltas are counted twice.
+    """
+
+    KEY_PREFIX = "counters:"
+
+    def __init__(self, model: Any, counter_columns: Sequence[str]):
+        table = model.__table__
+        primary_key_column = list(table.primary_key.columns)[0]
+        self.table_name = table.name
+        self.counter_columns = tuple(counter_columns)
+        self._integer_columns = {
+            column_name
+            for column_name in counter_columns
+            if isinstance(table.c[column_name].type, Integer)
+        }
+        self._primary_key_type = primary_key_column.type.python_type
+        self._dirty_set_key = f"{self.KEY_PREFIX}dirty:{table.name}"
+        self._processing_key_prefix = f"{self.KEY_PREFIX}processing:{table.name}:"
+        self._batches_key = f"{self.KEY_PREFIX}batches:{table.name}"
+        self._apply_statement = (
+            update(table)
+            .where(primary_key_column == bindparam("row_id"))
+            .values(
+                {
+                    column_name: table.c[column_name]
+                    + bindparam(f"delta_{column_name}")
+                    for column_name in counter_columns
+                }
+            )
+        )
+        self.increments = 0
+        self.fallbacks = 0
+        self.reconciled_rows = 0
+        self.failed_reconciles = 0
+        self.restored_batches = 0
+
+    def _counter_key(self, row_id: Any) -> str:
+        return f"{self.KEY_PREFIX}{self.table_name}:{row_id}"
+
+    def _processing_key(self, row_id: Any) -> str:
+        return f"{self._processing_key_prefix}{row_id}"
+
+    def _batch_members_key(self, batch_token: str) -> str:
+        return f"{self.KEY_PREFIX}batch:{self.table_name}:{batch_token}"
+
+    def _parse_deltas(self, field_values: Mapping[str, str]) -> Dict[str, Number]:
+        return {
+            column_name: (int if column_name in self._integer_columns else float)(
+                field_values[column_name]
+            )
+            for column_name in self.counter_columns
+            if column_name in field_values
+        }
+
+    async def increment(self, deltas: Mapping[Any, Mapping[str, Number]]) -> bool:
+        """Add {row id: {column: amount}} in Redis; False if Redis is unavailable"""
+        if not settings.HOT_COUNTERS_ENABLED:
+            return False
+
+        increments_by_key = {
+            self._counter_key(row_id): {
+                column_name: (
+                    int(amount)
+                    if column_name in self._integer_columns
+                    else float(amount)
+                )
+                for column_name, amount in column_deltas.items()
+            }
+            for row_id, column_deltas in deltas.items()
+        }
+        incremented = await redis_client.increment_hash_fields(
+            increments_by_key, self._dirty_set_key
+        )
+        if incremented:
+            self.increments += len(deltas)
+        else:
+            self.fallbacks += len(deltas)
+        return incremented
+
+    async def apply(
+        self, db: AsyncSession, deltas: Mapping[Any, Mapping[str, Number]]
+    ) -> None:
+        """Add {row id: {column: amount}} to the rows in db's transaction (the caller commits)"""
+        if not deltas:
+            return
+
+        await db.execute(
+            self._apply_statement,
+            [
+                {
+                    "row_id": self._primary_key_type(row_id),
+                    **{
+                        f"delta_{column_name}": deltas[row_id].get(column_name, 0)
+                        for column_name in self.counter_columns
+                    },
+                }
+                for row_id in sorted(deltas, key=str)
+            ],
+        )
+
+    async def pending(self, row_ids: Iterable[Any]) -> Dict[Any, Dict[str, Number]]:
+        """Deltas not yet reconciled into the rows, by row id (empty if Redis is unavailable)"""
+        row_ids = list(row_ids)
+        counter_keys = [self._counter_key(row_id) for row_id in row_ids]
+        processing_keys = [self._processing_key(row_id) for row_id in row_ids]
+        counter_hashes = await redis_client.get_hashes(counter_keys + processing_keys)
+        if not counter_hashes:
+            return {}
+
+        pending_deltas = {}
+        for row_id, counter_key, processing_key in zip(
+            row_ids, counter_keys, processing_keys
+        ):
+            column_deltas = self._parse_deltas(counter_hashes[counter_key])
+            for column_name, amount in self._parse_deltas(
+                counter_hashes[processing_key]
+            ).items():
+                column_deltas[column_name] = column_deltas.get(column_name, 0) + amount
+            if column_deltas:
+                pending_deltas[row_id] = column_deltas
+        return pending_deltas
+
+    async def overlay(self, entity: Any) -> Any:
+        """
+        Add pending deltas to a loaded row's counter attributes.
+
+        The values are set as if loaded from the database, so the row is not
+        marked dirty and nothing is written back.
+        """
+        if entity is None:
+            return entity
+
+        row_id = list(entity.__mapper__.primary_key_from_instance(entity))[0]
+        column_deltas = (await self.pending([row_id])).get(row_id, {})
+        for column_name, amount in column_deltas.items():
+            set_committed_value(
+                entity, column_name, (getattr(entity, column_name) or 0) + amount
+            )
+        return entity
+
+    async def reconcile(
+        self, batch_size: int = settings.COUNTER_RECONCILE_BATCH_SIZE
+    ) -> int:
+        """Move pending deltas into the rows; returns how many rows were updated"""
+        await self._restore_stale_batches()
+
+        reconciled_count = 0
+        while True:
+            batch_token = uuid.uuid4().hex
+            take_reply = await redis_client.run_script(
+                TAKE_COUNTERS_LUA_SCRIPT,
+                keys=[
+                    self._dirty_set_key,
+                    self._batches_key,
+                    self._batch_members_key(batch_token),
+                ],
+                args=[
+                    batch_size,
+                    redis_client.key(""),
+                    redis_client.key(self._processing_key_prefix),
+                    len(self._counter_key("")),
+                    batch_token,
+                    time.time(),
+                ],
+            )
+            if not take_reply or not take_reply[1]:
+                return reconciled_count
+            popped_count, taken_counters = take_reply
+
+            deltas: Dict[Any, Dict[str, Number]] = {}
+            for row_id, field_values in taken_counters:
+                field_values = [item.decode() for item in field_values]
+                column_deltas = self._parse_deltas(
+                    dict(zip(field_values[::2], field_values[1::2]))
+                )
+                if column_deltas:
+                    deltas[row_id.decode()] = column_deltas
+
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.apply(db, deltas)
+                    await db.commit()
+            except Exception as reconcile_error:
+                self.failed_reconciles += 1
+                logger.error(
+                    f"Failed to reconcile {self.table_name} counters, restoring them: {reconcile_error!r}"
+                )
+                await self._restore_batch(batch_token)
+                return reconciled_count
+
+            await redis_client.run_script(
+                FINISH_COUNTERS_LUA_SCRIPT,
+                keys=[self._batches_key, self._batch_members_key(batch_token)],
+                args=[redis_client.key(self._processing_key_prefix), batch_token],
+            )
+            reconciled_count += len(deltas)
+            self.reconciled_rows += len(deltas)
+            if popped_count < batch_size:
+                return reconciled_count
+
+    async def _restore_batch(self, batch_token: str) -> None:
+        await redis_client.run_script(
+            RESTORE_COUNTERS_LUA_SCRIPT,
+            keys=[
+                self._batches_key,
+                self._batch_members_key(batch_token),
+                self._dirty_set_key,
+            ],
+            args=[
+                redis_client.key(self._processing_key_prefix),
+                redis_client.key(self._counter_key("")),
+                self._counter_key(""),
+                batch_token,
+                *self._integer_columns,
+            ],
+        )
+
+    async def _restore_stale_batches(self) -> None:
+        """Put back batches whose worker has not finished them within COUNTER_PROCESSING_TIMEOUT"""
+        stale_batches = await redis_client.run_script(
+            STALE_COUNTER_BATCHES_LUA_SCRIPT,
+            keys=[self._batches_key],
+            args=[time.time() - settings.COUNTER_PROCESSING_TIMEOUT],
+        )
+        for batch_token in stale_batches or ():
+            logger.warning(
+                f"Restoring abandoned {self.table_name} counter batch {batch_token.decode()}"
+            )
+            self.restored_batches += 1
+            await self._restore_batch(batch_token.decode())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "increments": self.increments,
+            "fallbacks": self.fallbacks,
+            "reconciled_rows": self.reconciled_rows,
+            "failed_reconciles": self.failed_reconciles,
+            "restored_batches": self.restored_batches,
+        }
+
+
+card_counters = HotCounters(Card, ("total_views", "total_time_spent"))
+session_counters = HotCounters(LearningSession, ("cards_viewed", "total_time_seconds"))
+
+
+class CounterReconciler:
+    """Background task reconciling hot counters into their rows every interval_seconds"""
+
+    def __init__(
+        self,
+        counters: Sequence[HotCounters],
+        interval_seconds: float = settings.COUNTER_RECONCILE_INTERVAL,
+    ):
+        self.counters = list(counters)
+        self.interval_seconds = interval_seconds
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self._stop_requested = asyncio.Event()
+
+    async def reconcile_all(self) -> int:
+        reconciled_count = 0
+        for hot_counters in self.counters:
+            reconciled_count += await hot_counters.reconcile()
+        return reconciled_count
+
+    async def start(self) -> None:
+        if not settings.HOT_COUNTERS_ENABLED or self._reconcile_task is not None:
+            return
+        self._stop_requested.clear()
+        self._reconcile_task = asyncio.get_running_loop().create_task(
+            self._reconcile_periodically()
+        )
+
+    async def stop(self) -> None:
+        """Stop the task once its current pass is done, then reconcile one last time"""
+        if self._reconcile_task is None:
+            return
+
+        self._stop_requested.set()
+        await self._reconcile_task
+        self._reconcile_task = None
+        await self.reconcile_all()
+
+    async def _reconcile_periodically(self) -> None:
+        while not self._stop_requested.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._stop_requested.wait(), timeout=self.interval_seconds
+                )
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.reconcile_all()
+            except Exception as reconcile_error:
+                logger.error(f"Counter reconciliation failed: {reconcile_error!r}")
+
+
+counter_reconciler = CounterReconciler([card_counters, session_counters])
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from typing import Any, Iterable, NamedTuple, Optional, Set
+
+from loguru import logger
+from sqlalchemy import Select, event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.config import settings
+from app.config.database import PrimarySession
+
+from .cache import CacheNamespace
+
+COUNT_NAMESPACE_PREFIX = "counts:"
+WRITTEN_TABLES_KEY = "written_tables"
+
+
+class TotalCount(NamedTuple):
+    """Total for a paginated response; value is None when the count was skipped"""
+
+    value: Optional[int]
+    approximate: bool = False
+
+
+def count_namespace(table_name: str) -> CacheNamespace:
+    """Cache namespace holding the exact counts for one table"""
+    return CacheNamespace(
+        f"{COUNT_NAMESPACE_PREFIX}{table_name}", ttl_seconds=settings.COUNT_CACHE_TTL
+    )
+
+
+async def invalidate_counts(table_names: Iterable[str]) -> None:
+    """Drop every cached count for the given tables"""
+    for table_name in table_names:
+        await count_namespace(table_name).invalidate()
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a select, keeping its bound parameters (PostgreSQL only)"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kwargs) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kwargs)}"
+
+
+def planner_row_estimate(explain_output: Any) -> int:
+    """Row estimate of the top plan node (asyncpg returns the JSON as text)"""
+    if isinstance(explain_output, str):
+        explain_output = json.loads(explain_output)
+    return int(explain_output[0]["Plan"]["Plan Rows"])
+
+
+# Write-driven invalidation: tables written in a transaction are collected
+# on the session and their cached counts dropped once it commits.
+
+_pending_invalidations: Set[asyncio.Task] = set()
+
+
+def _written_tables(session: Session) -> Set[str]:
+    return session.info.setdefault(WRITTEN_TABLES_KEY, set())
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _collect_flushed_tables(session: Session, flush_context: Any) -> None:
+    written_tables = _written_tables(session)
+    for entity in (*session.new, *session.dirty, *session.deleted):
+        written_tables.update(table.name for table in sa_inspect(entity).mapper.tables)
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _collect_statement_tables(orm_execute_state: ORMExecuteState) -> None:
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is not None:
+        _written_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _invalidate_committed_counts(session: Session) -> None:
+    written_tables = session.info.pop(WRITTEN_TABLES_KEY, None)
+    if not written_tables:
+        return
+
+    try:
+        event_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Outside the event loop (scripts, workers); cached counts expire on their own
+        return
+
+    invalidation_task = event_loop.create_task(invalidate_counts(written_tables))
+    _pending_invalidations.add(invalidation_task)
+    invalidation_task.add_done_callback(_finish_invalidation)
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _discard_written_tables(session: Session) -> None:
+    session.info.pop(WRITTEN_TABLES_KEY, None)
+
+
+def _finish_invalidation(invalidation_task: asyncio.Task) -> None:
+    _pending_invalidations.discard(invalidation_task)
+    if not invalidation_task.cancelled() and invalidation_task.exception() is not None:
+        logger.warning(
+            f"Count cache invalidation failed: {invalidation_task.exception()!r}"
+        )
@@ -1,6 +1,16 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List, Sequence
 from enum import Enum
+from sqlalchemy import Select, bindparam, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from .exceptions import ValidationError
 
 
 class SortOrder(str, Enum):
@@ -45,12 +55,14 @@ class DBOperationOptions(BaseModel):
 
 class PaginationMeta(BaseModel):
     """Pagination metadata for responses"""
-    total: int
+    total: Optional[int]
     page: int
     per_page: int
-    pages: int
+    pages: Optional[int]
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
+    approximate: bool = False
 
 
 class PaginatedResponse(BaseModel):
@@ -69,19 +81,283 @@ class DBResult(BaseModel):
 
 # Utility functions
 def create_pagination_meta(
-    total: int,
+    total: Optional[int],
     skip: int,
-    limit: int
+    limit: int,
+    next_cursor: Optional[str] = None,
+    keyset: bool = False,
+    approximate: bool = False,
+    has_more: Optional[bool] = None,
 ) -> PaginationMeta:
-    """Create pagination metadata"""
+    """
+    Create pagination metadata.
+
+    For keyset pages pass keyset=True and the page's next_cursor; has_next
+    then follows the cursor rather than offset arithmetic. total may be an
+    estimate (approximate=True) or None when counting was skipped, in which
+    case pass has_more (e.g. from fetching limit + 1 rows).
+    """
     page = (skip // limit) + 1 if limit else 1
-    pages = (total + limit - 1) // limit if limit else 1
+    if total is None:
+        pages = None
+    else:
+        pages = (total + limit - 1) // limit if limit else 1
+
+    if keyset:
+        has_next = next_cursor is not None
+    elif has_more is not None:
+        has_next = has_more
+    else:
+        has_next = pages is not None and page < pages
 
     return PaginationMeta(
         total=total,
         page=page,
-        per_page=limit or total,
+        per_page=limit or total or 0,
         pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        has_next=has_next,
+        has_prev=page > 1,
+        next_cursor=next_cursor,
+        approximate=approximate,
+    )
+
+
+def _encode_cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"uuid": str(value)}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    if "d" in value:
+        return date.fromisoformat(value["d"])
+    if "uuid" in value:
+        return UUID(value["uuid"])
+    if "dec" in value:
+        return Decimal(value["dec"])
+    raise ValueError("unknown cursor value")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque keyset cursor for the sort key of the last row on a page"""
+    payload = json.dumps(
+        [_encode_cursor_value(value) for value in values], separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    key_length: int,
+    keyset_columns: Optional[Sequence[ColumnElement]] = None,
+) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    With keyset_columns, every value is checked against its column's Python
+    type (ints are accepted for float and Decimal columns) and None only for
+    nullable columns, so a tampered cursor fails here instead of in the
+    database driver.
+
+    Raises:
+        ValidationError: if the cursor is malformed or has the wrong shape
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_cursor_value(value) for value in json.loads(payload)]
+    except (ValueError, TypeError) as cursor_error:
+        raise ValidationError(f"Invalid pagination cursor: {cursor_error}")
+
+    if len(values) != key_length:
+        raise ValidationError("Invalid pagination cursor: wrong key length")
+    if keyset_columns is not None:
+        values = [
+            _check_cursor_value(column, value)
+            for column, value in zip(keyset_columns, values)
+        ]
+    return values
+
+
+def _check_cursor_value(column: ColumnElement, value: Any) -> Any:
+    if value is None:
+        if not _is_nullable(column):
+            raise ValidationError(
+                f"Invalid pagination cursor: {column.key} cannot be null"
+            )
+        return None
+
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    if isinstance(value, bool) and python_type is not bool:
+        raise ValidationError(
+            f"Invalid pagination cursor: expected {python_type.__name__} for {column.key}"
+        )
+    if python_type in (float, Decimal) and isinstance(value, int):
+        return python_type(value)
+    if not isinstance(value, python_type) or (
+        python_type is date and isinstance(value, datetime)
+    ):
+        raise ValidationError(
+            f"Invalid pagination cursor: expected {python_type.__name__} for {column.key}"
+        )
+    return value
+
+
+def _is_nullable(column: ColumnElement) -> bool:
+    return getattr(getattr(column, "expression", column), "nullable", True)
+
+
+def _keyset_range(
+    statement: Select,
+    keyset_columns: Sequence[ColumnElement],
+    cursor_values: Optional[Sequence[Any]],
+    descending: bool,
+    first_index: int = 0,
+) -> Select:
+    if cursor_values is not None and keyset_columns:
+        cursor_row = tuple_(
+            *[
+                bindparam(
+                    f"keyset_{first_index + column_index}",
+                    value=cursor_value,
+                    type_=column.type,
+                )
+                for column_index, (column, cursor_value) in enumerate(
+                    zip(keyset_columns, cursor_values)
+                )
+            ]
+        )
+        keyset_row = tuple_(*keyset_columns)
+        statement = statement.where(
+            keyset_row < cursor_row if descending else keyset_row > cursor_row
+        )
+
+    return statement.order_by(
+        *[column.desc() if descending else column.asc() for column in keyset_columns]
     )
+
+
+def keyset_order_by(
+    keyset_columns: Sequence[ColumnElement], descending: bool = False
+) -> List[ColumnElement]:
+    """ORDER BY clauses matching keyset_segments, NULLs sorting after every value"""
+    return [
+        (
+            (column.desc().nulls_first() if descending else column.asc().nulls_last())
+            if _is_nullable(column)
+            else (column.desc() if descending else column.asc())
+        )
+        for column in keyset_columns
+    ]
+
+
+def apply_keyset(
+    statement: Select,
+    keyset_columns: Sequence[ColumnElement],
+    cursor_values: Optional[Sequence[Any]],
+    descending: bool = False,
+) -> Select:
+    """
+    Order a statement by keyset_columns and resume after cursor_values.
+
+    Uses a row-value comparison, e.g. (saved_at, id) < (:keyset_0, :keyset_1),
+    which a composite index on the same columns answers with a single range
+    scan, so every page costs the same regardless of how deep it is. The
+    last column must be unique (normally the primary key).
+
+    Note:
+        A row-value comparison never matches a NULL key, so rows with NULL
+        key columns are skipped; use keyset_segments when the leading
+        column is nullable.
+    """
+    return _keyset_range(statement, keyset_columns, cursor_values, descending)
+
+
+def keyset_segments(
+    statement: Select,
+    keyset_columns: Sequence[ColumnElement],
+    cursor_values: Optional[Sequence[Any]],
+    descending: bool = False,
+) -> List[Select]:
+    """
+    Keyset statements to run in order until a page is full.
+
+    Like apply_keyset, but the leading column may be nullable: NULLs sort
+    after every value (PostgreSQL's default, so the same index serves both
+    directions) and live in their own segment, "leading IS NULL" ordered by
+    the remaining columns. Each segment is a plain range scan; only a page
+    that crosses from one segment to the other costs a second query.
+    Columns after the leading one must be NOT NULL.
+
+    The statements are unlimited; fetch_keyset_page applies the limit.
+    """
+    leading_column, remaining_columns = keyset_columns[0], keyset_columns[1:]
+    if any(_is_nullable(column) for column in remaining_columns):
+        raise ValueError("Only the leading keyset column may be nullable")
+    if not _is_nullable(leading_column):
+        return [_keyset_range(statement, keyset_columns, cursor_values, descending)]
+
+    def value_segment(segment_cursor: Optional[Sequence[Any]]) -> Select:
+        return _keyset_range(
+            statement.where(leading_column.is_not(None)),
+            keyset_columns,
+            segment_cursor,
+            descending,
+        )
+
+    def null_segment(segment_cursor: Optional[Sequence[Any]]) -> Select:
+        return _keyset_range(
+            statement.where(leading_column.is_(None)),
+            remaining_columns,
+            segment_cursor,
+            descending,
+            first_index=1,
+        )
+
+    in_null_segment = cursor_values is not None and cursor_values[0] is None
+    if descending:
+        if cursor_values is None:
+            return [null_segment(None), value_segment(None)]
+        if in_null_segment:
+            return [null_segment(cursor_values[1:]), value_segment(None)]
+        return [value_segment(cursor_values)]
+
+    if in_null_segment:
+        return [null_segment(cursor_values[1:])]
+    return [value_segment(cursor_values), null_segment(None)]
+
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    segments: Sequence[Select],
+    page_size: int,
+    parameters: Optional[Dict[str, Any]] = None,
+) -> List[Any]:
+    """
+    Up to page_size + 1 rows from keyset_segments statements.
+
+    The extra row tells whether there is a next page. Each statement must
+    end in LIMIT :limit, which is set to the rows still missing.
+    """
+    rows: List[Any] = []
+    for segment in segments:
+        result = await db.execute(
+            segment, {**(parameters or {}), "limit": page_size + 1 - len(rows)}
+        )
+        rows.extend(result.scalars().all())
+        if len(rows) > page_size:
+            break
+    return rows
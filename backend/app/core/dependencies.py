@@ -1,14 +1,17 @@
-from typing import Optional
+from typing import Any, AsyncGenerator, Optional
 from loguru import logger
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from app.models.user import User
 from app.config import redis_client, get_db
+from app.config.database import AsyncSessionLocal, ReadSessionLocal, has_read_replica
+from app.config.read_your_writes import read_your_writes
 from .security import verify_token
+from .user_cache import user_cache
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
@@ -21,9 +24,10 @@ async def get_current_user(
     This dependency:
     1. Extracts the JWT token from the Authorization header
     2. Verifies the token and gets the user ID
-    3. Queries the database for the user
+    3. Resolves the user through the user cache (falling back to the database)
     4. Checks if the user exists and is active
-    5. Returns the authenticated user object
+    5. Tags the request's session with the user, for read-your-writes routing
+    6. Returns the authenticated user object
 
     Raises:
         HTTPException: 401 if token is invalid
@@ -40,9 +44,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Execute query and get the user object
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    user = await user_cache.get_user(db, int(user_id))
 
     if not user:
         raise HTTPException(
@@ -56,6 +58,7 @@ async def get_current_user(
             detail="Inactive user"
         )
 
+    db.info["writer_id"] = user.id
     return user
 
 
@@ -79,8 +82,7 @@ async def get_optional_current_user(
         if not user_id:
             return None
 
-        result = await db.execute(select(User).where(User.id == int(user_id)))
-        user = result.scalar_one_or_none()
+        user = await user_cache.get_user(db, int(user_id))
 
         if not user or not user.is_active:
             return None
@@ -91,6 +93,42 @@ async def get_optional_current_user(
         return None
 
 
+async def read_session_factory(user_id: Optional[Any]) -> async_sessionmaker:
+    """
+    Session factory for read-only work on behalf of user_id.
+
+    The read replica when one is configured, except for users who wrote
+    within the last READ_YOUR_WRITES_SECONDS: their reads go to the primary
+    so they always see their own changes despite replication lag.
+    """
+    use_primary = not has_read_replica()
+    if not use_primary and user_id is not None:
+        use_primary = await read_your_writes.wrote_recently(user_id)
+
+    if use_primary:
+        read_your_writes.primary_reads += 1
+        return AsyncSessionLocal
+    read_your_writes.replica_reads += 1
+    return ReadSessionLocal
+
+
+async def get_read_db(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get a database session for read-only routes.
+
+    Routed by read_session_factory. Never write through this session.
+    """
+    user_id = None
+    if credentials is not None and has_read_replica():
+        user_id = verify_token(credentials.credentials, token_type="access")
+
+    session_factory = await read_session_factory(user_id)
+    async with session_factory() as session:
+        yield session
+
+
 def get_redis_client():
     """
     Get Redis client dependency
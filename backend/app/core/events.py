@@ -1,6 +1,12 @@
 from fastapi import FastAPI
 from app.config.database import create_tables
 from app.config.redis import redis_client
+from app.config.logging import log_sink
+from app.core.security import password_hasher
+from app.core.cache import invalidation_bus
+from app.core.interaction_buffer import interaction_buffer
+from app.core.counters import counter_reconciler
+from app.core.search import topic_search
 from loguru import logger
 
 
@@ -17,14 +23,17 @@ async def startup_event():
         logger.error(f"Failed to create database tables: {e}")
         raise
 
-    try:
-        if redis_client.has_client():
-            await redis_client.connect()
-            logger.info("Redis connection established")
-        else:
-            logger.warning("Redis client not available")
-    except Exception as e:
-        logger.warning(f"Redis connection failed: {e}")
+    await topic_search.detect()
+
+    await redis_client.connect_to_redis()
+    if not redis_client.is_connected():
+        logger.warning(
+            "Redis client not available, caching is bypassed until it reconnects"
+        )
+
+    await invalidation_bus.start()
+    await interaction_buffer.start()
+    await counter_reconciler.start()
 
     logger.info("Application startup completed successfully")
 
@@ -35,14 +44,20 @@ async def shutdown_event():
     """
     logger.info("Shutting down Infinity Learning Platform...")
 
+    await interaction_buffer.stop()
+    await counter_reconciler.stop()
+    await invalidation_bus.stop()
+
     try:
-        if redis_client.has_client():
-            await redis_client.close()
-            logger.info("Redis connections closed")
+        await redis_client.close_connection()
+        logger.info("Redis connections closed")
     except Exception as e:
         logger.error(f"Error closing Redis connections: {e}")
 
+    password_hasher.shutdown()
+
     logger.info("Application shutdown completed")
+    log_sink.stop()
 
 
 def setup_events(app: FastAPI) -> None:
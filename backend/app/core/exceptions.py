@@ -74,6 +74,14 @@ class RateLimitError(InfinityException):
     pass
 
 
+class ServiceOverloadedError(InfinityException):
+    """
+    Raised when a bounded worker pool rejects work because it is saturated
+    """
+
+    pass
+
+
 class DatabaseError(InfinityException):
     """
     Raised when database operation fails
@@ -0,0 +1,111 @@
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.serialization import dumps_json
+
+from .db import DBOperationOptions
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_BATCH_SIZE = 1000
+GZIP_COMPRESSION_LEVEL = 6
+
+_column_keys: Dict[type, Tuple[str, ...]] = {}
+
+
+def row_to_dict(entity: Any) -> Dict[str, Any]:
+    """Column values of an ORM row (relationships are left out)"""
+    model = type(entity)
+    column_keys = _column_keys.get(model)
+    if column_keys is None:
+        column_keys = tuple(
+            column_attr.key for column_attr in sa_inspect(model).column_attrs
+        )
+        _column_keys[model] = column_keys
+    return {column_key: getattr(entity, column_key) for column_key in column_keys}
+
+
+async def stream_in_session(
+    session_factory: Callable[[], AsyncSession],
+    repository: Any,
+    options: DBOperationOptions,
+) -> AsyncIterator[Sequence[Any]]:
+    """
+    repository.stream() in a session of its own, opened when the body starts.
+
+    Note:
+        Export routes must not stream from a dependency session: FastAPI
+        closes yield dependencies once the endpoint returns, before a
+        StreamingResponse body is sent.
+    """
+    async with session_factory() as db:
+        async for batch in repository.stream(db, options):
+            yield batch
+
+
+async def ndjson_chunks(
+    batches: AsyncIterable[Sequence[Any]],
+    to_dict: Callable[[Any], Dict[str, Any]] = row_to_dict,
+) -> AsyncIterator[bytes]:
+    """Encode each batch of rows as one chunk of newline-delimited JSON"""
+    async for batch in batches:
+        if batch:
+            yield b"".join(dumps_json(to_dict(row)) + b"\n" for row in batch)
+
+
+async def gzip_chunks(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member as it is produced"""
+    compressor = zlib.compressobj(
+        GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    async for chunk in chunks:
+        compressed_chunk = compressor.compress(chunk)
+        if compressed_chunk:
+            yield compressed_chunk
+    yield compressor.flush()
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Whether the client's Accept-Encoding allows gzip"""
+    for accepted_encoding in request.headers.get("accept-encoding", "").split(","):
+        encoding_name, _, encoding_parameters = accepted_encoding.partition(";")
+        if encoding_name.strip().lower() not in ("gzip", "*"):
+            continue
+
+        encoding_parameters = encoding_parameters.strip()
+        if not encoding_parameters.startswith("q="):
+            return True
+        try:
+            return float(encoding_parameters[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def ndjson_response(
+    request: Request,
+    batches: AsyncIterable[Sequence[Any]],
+    filename: str,
+    to_dict: Callable[[Any], Dict[str, Any]] = row_to_dict,
+) -> StreamingResponse:
+    """
+    Stream rows to the client as an NDJSON download.
+
+    Rows are encoded batch by batch as they arrive from the database (pair
+    with stream_in_session), so memory use does not depend on how many rows
+    are exported. The body is gzip-compressed when the client accepts it.
+    """
+    chunks = ndjson_chunks(batches, to_dict)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE, headers=headers)
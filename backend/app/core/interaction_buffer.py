@@ -0,0 +1,359 @@
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import redis_client, settings
+from app.config.database import AsyncSessionLocal
+from app.models import CardInteraction
+
+from .counters import card_counters, session_counters
+from .trending import trending_topics
+
+DURABILITY_MODES = ("sync", "memory", "redis")
+
+INTERACTION_STREAM_KEY = "stream:card_interactions"
+INTERACTION_CONSUMER_GROUP = "interaction-writers"
+
+_interaction_columns = set(CardInteraction.__table__.c.keys())
+
+
+def _interaction_rows(entries: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    interaction_rows = []
+    for entry in entries:
+        interaction_row = {
+            key: value for key, value in entry.items() if key != "recorded_at"
+        }
+        if "created_at" in _interaction_columns:
+            interaction_row["created_at"] = datetime.fromtimestamp(
+                entry["recorded_at"], timezone.utc
+            ).replace(tzinfo=None)
+        interaction_rows.append(interaction_row)
+    return interaction_rows
+
+
+def _counter_deltas(
+    entries: Sequence[Dict[str, Any]],
+    key_field: str,
+    view_column: str,
+    time_column: str,
+) -> Dict[Any, Dict[str, Any]]:
+    deltas: Dict[Any, Dict[str, Any]] = {}
+    for entry in entries:
+        column_deltas = deltas.setdefault(
+            entry[key_field], {view_column: 0, time_column: 0.0}
+        )
+        column_deltas[view_column] += 1
+        column_deltas[time_column] += entry["time_spent_seconds"] or 0
+    return deltas
+
+
+async def write_interactions(
+    db: AsyncSession, entries: Sequence[Dict[str, Any]]
+) -> None:
+    """
+    Write a batch of interactions and add them to the card and session counters.
+
+    The interactions go in with one bulk INSERT. View counts and time spent
+    are summed per card and per session first, so each distinct card and
+    session gets a single increment: in Redis through the hot counters once
+    the interactions are committed, or, with hot counters off or Redis
+    unavailable, as row updates (in key order, so concurrent batches lock
+    rows in the same order). Each session's interactions then count towards
+    its topic in the trending leaderboards.
+    """
+    if not entries:
+        return
+
+    card_deltas = _counter_deltas(entries, "card_id", "total_views", "total_time_spent")
+    session_deltas = _counter_deltas(
+        entries, "session_id", "cards_viewed", "total_time_seconds"
+    )
+    counter_deltas = ((card_counters, card_deltas), (session_counters, session_deltas))
+
+    await db.execute(insert(CardInteraction), _interaction_rows(entries))
+    if not settings.HOT_COUNTERS_ENABLED:
+        for hot_counters, deltas in counter_deltas:
+            await hot_counters.apply(db, deltas)
+        await db.commit()
+    else:
+        await db.commit()
+        try:
+            for hot_counters, deltas in counter_deltas:
+                if not await hot_counters.increment(deltas):
+                    await hot_counters.apply(db, deltas)
+                    await db.commit()
+        except Exception as counter_error:
+            # The interactions are already committed; retrying the batch would duplicate them
+            await db.rollback()
+            logger.error(
+                f"Failed to update counters for {len(entries)} card interactions: {counter_error!r}"
+            )
+
+    try:
+        await trending_topics.record_interactions(
+            db,
+            {
+                session_id: column_deltas["cards_viewed"]
+                for session_id, column_deltas in session_deltas.items()
+            },
+        )
+    except Exception as trending_error:
+        logger.error(
+            f"Failed to record trending activity for {len(entries)} card interactions: {trending_error!r}"
+        )
+
+
+class InteractionBuffer:
+    """
+    Write-behind ingestion for card interactions.
+
+    record() returns as soon as an interaction is buffered; a background task
+    writes buffered interactions every flush_interval_seconds (sooner once a
+    full batch is waiting) with write_interactions, so a popular card's
+    counters are incremented once per batch instead of once per view.
+
+    Durability modes:
+    - "sync": nothing is buffered, every interaction is written in the
+      request's own transaction.
+    - "memory": buffered in this worker. A crash loses at most the last
+      flush interval; stop() writes out everything on shutdown.
+    - "redis": appended to a Redis stream before record() returns and read
+      back through a consumer group, so buffered interactions survive a
+      worker crash (entries left unacknowledged for claim_idle_seconds are
+      picked up by any worker). Delivery is at-least-once: a crash between
+      the commit and the acknowledgement writes that batch twice.
+
+    Note:
+        When buffering is not possible (flusher not started, memory buffer
+        full, Redis unavailable) record() falls back to a synchronous write,
+        so interactions are never dropped. Rows the database rejects (e.g. an
+        unknown card) are retried one by one and only those are discarded.
+        Session and card counters lag by up to one flush interval.
+    """
+
+    def __init__(
+        self,
+        durability: str = settings.INTERACTION_DURABILITY,
+        flush_interval_seconds: float = settings.INTERACTION_FLUSH_INTERVAL,
+        batch_size: int = settings.INTERACTION_FLUSH_BATCH_SIZE,
+        max_buffer_size: int = settings.INTERACTION_BUFFER_MAX_SIZE,
+        claim_idle_seconds: float = settings.INTERACTION_CLAIM_IDLE_SECONDS,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown interaction durability mode: {durability}")
+
+        self.durability = durability
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+        self.max_buffer_size = max_buffer_size
+        self.claim_idle_seconds = claim_idle_seconds
+        self.consumer_name = ""
+        self._buffered_entries: List[Dict[str, Any]] = []
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._consumer_group_ready = False
+        self.buffered = 0
+        self.written = 0
+        self.sync_writes = 0
+        self.rejected = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    async def record(self, db: AsyncSession, interaction: Dict[str, Any]) -> None:
+        """
+        Ingest one interaction (CardInteraction column values).
+
+        Falls back to writing it, and its counter updates, through db.
+        """
+        entry = {**interaction, "recorded_at": time.time()}
+
+        if self._flush_task is not None:
+            if (
+                self.durability == "memory"
+                and len(self._buffered_entries) < self.max_buffer_size
+            ):
+                self._buffered_entries.append(entry)
+                self.buffered += 1
+                if len(self._buffered_entries) >= self.batch_size:
+                    self._flush_requested.set()
+                return
+
+            if self.durability == "redis" and await redis_client.append_to_stream(
+                INTERACTION_STREAM_KEY, entry
+            ):
+                self.buffered += 1
+                return
+
+        self.sync_writes += 1
+        await write_interactions(db, [entry])
+
+    async def start(self) -> None:
+        """Start the background flusher (nothing to do in "sync" mode)"""
+        if self.durability == "sync" or self._flush_task is not None:
+            return
+
+        self._stopping = False
+        self.consumer_name = f"{socket.gethostname()}-{os.getpid()}"
+        if self.durability == "redis":
+            await self._ensure_consumer_group()
+        self._flush_task = asyncio.get_running_loop().create_task(
+            self._flush_periodically()
+        )
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is still buffered"""
+        if self._flush_task is None:
+            return
+
+        self._stopping = True
+        self._flush_requested.set()
+        await self._flush_task
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered interactions in batches; returns how many were written"""
+        async with self._flush_lock:
+            if self.durability == "redis":
+                return await self._flush_stream()
+            return await self._flush_memory()
+
+    async def _flush_periodically(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            try:
+                await self.flush()
+            except Exception as flush_error:
+                logger.error(f"Card interaction flush failed: {flush_error!r}")
+
+    async def _flush_memory(self) -> int:
+        written_count = 0
+        while self._buffered_entries:
+            batch = self._buffered_entries[: self.batch_size]
+            del self._buffered_entries[: len(batch)]
+            retry_positions = await self._write_batch(batch)
+            written_count += len(batch) - len(retry_positions)
+            if retry_positions:
+                self._buffered_entries[:0] = [
+                    batch[position] for position in retry_positions
+                ]
+                break
+        return written_count
+
+    async def _ensure_consumer_group(self) -> bool:
+        if not self._consumer_group_ready:
+            self._consumer_group_ready = await redis_client.create_consumer_group(
+                INTERACTION_STREAM_KEY, INTERACTION_CONSUMER_GROUP
+            )
+        return self._consumer_group_ready
+
+    async def _flush_stream(self) -> int:
+        if not await self._ensure_consumer_group():
+            return 0
+
+        written_count = 0
+        while True:
+            stream_entries = await redis_client.read_stream_group(
+                INTERACTION_STREAM_KEY,
+                INTERACTION_CONSUMER_GROUP,
+                self.consumer_name,
+                count=self.batch_size,
+                min_idle_seconds=self.claim_idle_seconds,
+            )
+            if not stream_entries:
+                return written_count
+
+            decoded_entries = [
+                (entry_id, entry)
+                for entry_id, entry in stream_entries
+                if entry is not None
+            ]
+            retry_positions = await self._write_batch(
+                [entry for _, entry in decoded_entries]
+            )
+            retry_ids = {decoded_entries[position][0] for position in retry_positions}
+
+            # Entries to retry stay pending and are claimed again once idle for
+            # claim_idle_seconds; the rest are written (or rejected) for good
+            await redis_client.acknowledge_stream_entries(
+                INTERACTION_STREAM_KEY,
+                INTERACTION_CONSUMER_GROUP,
+                [
+                    entry_id
+                    for entry_id, _ in stream_entries
+                    if entry_id not in retry_ids
+                ],
+            )
+            written_count += len(decoded_entries) - len(retry_ids)
+            if retry_ids or len(stream_entries) < self.batch_size:
+                return written_count
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> List[int]:
+        """
+        Write one batch in its own session; returns the positions of the
+        entries to retry later (empty once everything is written or rejected).
+
+        When the database rejects the batch its entries are written one by
+        one, so only the rejected rows are dropped and only those that failed
+        for another reason are retried; the rows already committed are not.
+        """
+        if not batch:
+            return []
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await write_interactions(db, batch)
+        except (IntegrityError, DataError) as rejected_error:
+            if len(batch) > 1:
+                return [
+                    position
+                    for position, entry in enumerate(batch)
+                    if await self._write_batch([entry])
+                ]
+            self.rejected += 1
+            logger.error(
+                f"Dropping card interaction rejected by the database: {batch[0]} ({rejected_error!r})"
+            )
+            return []
+        except Exception as write_error:
+            self.failed_batches += 1
+            logger.error(
+                f"Failed to write {len(batch)} card interactions, will retry: {write_error!r}"
+            )
+            return list(range(len(batch)))
+
+        self.batches += 1
+        self.written += len(batch)
+        return []
+
+    def stats(self) -> Dict[str, int]:
+        """Ingestion counters and the number of interactions waiting in this worker"""
+        return {
+            "queued": len(self._buffered_entries),
+            "buffered": self.buffered,
+            "written": self.written,
+            "sync_writes": self.sync_writes,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+        }
+
+
+interaction_buffer = InteractionBuffer()
@@ -0,0 +1,676 @@
+import hmac
+import ipaddress
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.config.database import TimedQueuePool
+from app.config.logging import log_sink
+from app.config.read_your_writes import read_your_writes
+from app.config.redis import RedisClient, redis_client
+
+from .cache import invalidation_bus
+from .counters import counter_reconciler
+from .interaction_buffer import interaction_buffer
+from .security import token_claims_cache
+from .user_cache import user_cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+POOL_WAIT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+class MetricFamily(NamedTuple):
+    """A metric as rendered by collectors: name, type, help and labelled samples"""
+
+    name: str
+    metric_type: str
+    help_text: str
+    samples: List[Tuple[Dict[str, str], float]]
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str]) -> str:
+    if not label_names:
+        return ""
+    pairs = ",".join(
+        f'{label_name}="{_escape_label_value(label_value)}"'
+        for label_name, label_value in zip(label_names, label_values)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape_label_value(label_value: Any) -> str:
+    return (
+        str(label_value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, label_values)} {value}"
+            for label_values, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+
+    metric_type = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str) -> None:
+        self._values[label_values] = value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label set.
+
+    observe() only bumps one bucket (found by bisection) plus the sum and
+    count; cumulative bucket counts are computed at render time.
+    """
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._series[label_values] = series
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        bucket_label_names = self.label_names + ("le",)
+        for label_values, (bucket_counts, total, count) in self._series.items():
+            cumulative_count = 0
+            for upper_bound, bucket_count in zip(
+                self.buckets + (float("inf"),), bucket_counts
+            ):
+                cumulative_count += bucket_count
+                bound_label = (
+                    "+Inf" if upper_bound == float("inf") else repr(upper_bound)
+                )
+                labels = _format_labels(
+                    bucket_label_names, label_values + (bound_label,)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative_count}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds metrics and renders them in the Prometheus text exposition format.
+
+    Collectors are callables invoked at scrape time that return MetricFamily
+    objects, for values that are cheaper to read on demand (cache stats, pool
+    state) than to track on every request.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def register(self, metric: Any) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, help_text: str, label_names: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, help_text, label_names))
+
+    def gauge(
+        self, name: str, help_text: str, label_names: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, help_text, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def register_collector(
+        self, collector: Callable[[], Iterable[MetricFamily]]
+    ) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.render())
+
+        for collector in self._collectors:
+            for family in collector():
+                lines.append(f"# HELP {family.name} {family.help_text}")
+                lines.append(f"# TYPE {family.name} {family.metric_type}")
+                for labels, value in family.samples:
+                    lines.append(
+                        f"{family.name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+http_requests_in_flight = metrics_registry.gauge(
+    "http_requests_in_flight", "Requests currently being processed", ("method",)
+)
+http_request_duration_seconds = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route and status",
+    ("method", "route", "status"),
+)
+http_request_db_queries = metrics_registry.histogram(
+    "http_request_db_queries",
+    "Database queries issued per request",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_seconds = metrics_registry.histogram(
+    "http_request_db_seconds",
+    "Time spent in database queries per request",
+    ("method", "route"),
+)
+http_request_redis_calls = metrics_registry.histogram(
+    "http_request_redis_calls",
+    "Redis round trips per request",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_queries_total = metrics_registry.counter(
+    "db_queries_total", "Database queries executed"
+)
+db_query_seconds_total = metrics_registry.counter(
+    "db_query_seconds_total", "Total time spent executing database queries"
+)
+redis_commands_total = metrics_registry.counter(
+    "redis_commands_total", "Redis commands issued", ("command",)
+)
+db_pool_checkout_wait_seconds = metrics_registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ("pool",),
+    buckets=POOL_WAIT_BUCKETS,
+)
+db_pool_checkout_timeouts_total = metrics_registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+    ("pool",),
+)
+
+
+class RequestStats:
+    """Per-request resource counters, carried in a context variable"""
+
+    __slots__ = ("db_queries", "db_seconds", "redis_calls")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.redis_calls = 0
+
+
+_current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+def record_redis_command(command_name: str) -> None:
+    redis_commands_total.inc(command_name)
+    request_stats = _current_request_stats.get()
+    if request_stats is not None:
+        request_stats.redis_calls += 1
+
+
+def instrument_redis(client: RedisClient) -> None:
+    """Count every Redis command issued through the client"""
+    client.command_observer = record_redis_command
+
+
+def instrument_engine(engine: AsyncEngine, pool_name: str = "primary") -> None:
+    """Count and time every statement executed on the engine, and export its pool state"""
+    sync_engine = engine.sync_engine
+
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_cursor_error)
+
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.checkout_observer = _pool_checkout_observer(pool_name)
+        _instrumented_pools[pool_name] = engine.pool
+
+
+_instrumented_pools: Dict[str, TimedQueuePool] = {}
+
+
+def _pool_checkout_observer(pool_name: str) -> Callable[[float, bool], None]:
+    def record_checkout(wait_seconds: float, timed_out: bool) -> None:
+        db_pool_checkout_wait_seconds.observe(wait_seconds, pool_name)
+        if timed_out:
+            db_pool_checkout_timeouts_total.inc(pool_name)
+
+    return record_checkout
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_times"].pop()
+    db_queries_total.inc()
+    db_query_seconds_total.inc(amount=elapsed)
+
+    request_stats = _current_request_stats.get()
+    if request_stats is not None:
+        request_stats.db_queries += 1
+        request_stats.db_seconds += elapsed
+
+
+def _handle_cursor_error(exception_context):
+    # after_cursor_execute does not run for a failed statement; drop its start time
+    connection = exception_context.connection
+    if connection is None or exception_context.execution_context is None:
+        return
+
+    query_start_times = connection.info.get("query_start_times")
+    if query_start_times:
+        query_start_times.pop()
+
+
+def metrics_access_allowed(
+    client_host: Optional[str], authorization_header: Optional[str]
+) -> bool:
+    """
+    Whether a /metrics request may be answered.
+
+    Scrapers are let in from METRICS_ALLOWED_NETWORKS, or from anywhere with
+    the METRICS_TOKEN bearer token when one is configured.
+    """
+    if settings.METRICS_TOKEN and authorization_header:
+        scheme, _, token = authorization_header.partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(
+            token.encode(), settings.METRICS_TOKEN.encode()
+        ):
+            return True
+
+    try:
+        client_address = ipaddress.ip_address(client_host or "")
+    except ValueError:
+        return False
+
+    return any(
+        client_address in ipaddress.ip_network(allowed_network, strict=False)
+        for allowed_network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+class MetricsMiddleware:
+    """
+    Records latency, in-flight requests and per-request DB/Redis usage.
+
+    Routes are labelled by their path template (e.g. /cards/{card_id}) rather
+    than the raw path, so label cardinality stays bounded. Requests that do
+    not match any route are grouped under "unmatched".
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        response_status = 500
+        request_stats = RequestStats()
+        stats_token = _current_request_stats.set(request_stats)
+        http_requests_in_flight.inc(method)
+        start_time = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            http_requests_in_flight.dec(method)
+            _current_request_stats.reset(stats_token)
+
+            matched_route = scope.get("route")
+            route = getattr(matched_route, "path", None) or "unmatched"
+
+            http_request_duration_seconds.observe(
+                elapsed, method, route, str(response_status)
+            )
+            http_request_db_queries.observe(request_stats.db_queries, method, route)
+            http_request_db_seconds.observe(request_stats.db_seconds, method, route)
+            http_request_redis_calls.observe(request_stats.redis_calls, method, route)
+
+
+def collect_cache_stats() -> Iterable[MetricFamily]:
+    """Hit/miss counters and hit ratios of the in-process caches"""
+    near_cache_stats = {
+        near_cache.namespace: near_cache.stats()
+        for near_cache in invalidation_bus.near_caches()
+    }
+    token_cache_stats = token_claims_cache.stats()
+
+    hit_samples = [
+        ({"cache": "token_claims", "tier": "local"}, token_cache_stats["hits"])
+    ]
+    miss_samples = [({"cache": "token_claims"}, token_cache_stats["misses"])]
+    ratio_samples = [
+        ({"cache": "token_claims", "tier": "local"}, token_cache_stats["hit_ratio"])
+    ]
+    for namespace, cache_stats in near_cache_stats.items():
+        hit_samples.append(
+            ({"cache": namespace, "tier": "local"}, cache_stats["local_hits"])
+        )
+        hit_samples.append(
+            ({"cache": namespace, "tier": "redis"}, cache_stats["redis_hits"])
+        )
+        miss_samples.append(({"cache": namespace}, cache_stats["misses"]))
+        ratio_samples.append(
+            ({"cache": namespace, "tier": "local"}, cache_stats["local_hit_ratio"])
+        )
+        ratio_samples.append(
+            ({"cache": namespace, "tier": "redis"}, cache_stats["redis_hit_ratio"])
+        )
+
+    yield MetricFamily(
+        "cache_hits_total", "counter", "Cache hits by cache and tier", hit_samples
+    )
+    yield MetricFamily(
+        "cache_misses_total",
+        "counter",
+        "Cache misses that fell through every tier",
+        miss_samples,
+    )
+    yield MetricFamily(
+        "cache_hit_ratio", "gauge", "Hit ratio of each cache tier", ratio_samples
+    )
+    yield MetricFamily(
+        "user_cache_database_loads_total",
+        "counter",
+        "Users loaded from the database by the auth cache",
+        [({}, user_cache.stats()["database_loads"])],
+    )
+
+
+metrics_registry.register_collector(collect_cache_stats)
+
+
+def collect_log_stats() -> Iterable[MetricFamily]:
+    """Throughput and drops of the batched log sink"""
+    log_stats = log_sink.stats()
+
+    yield MetricFamily(
+        "log_records_total",
+        "counter",
+        "Log records by outcome",
+        [
+            ({"outcome": "written"}, log_stats["written"]),
+            ({"outcome": "dropped"}, log_stats["dropped"]),
+        ],
+    )
+    yield MetricFamily(
+        "log_queue_depth",
+        "gauge",
+        "Log records waiting to be written",
+        [({}, log_stats["queued"])],
+    )
+
+
+metrics_registry.register_collector(collect_log_stats)
+
+
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def collect_redis_stats() -> Iterable[MetricFamily]:
+    """State of the Redis circuit breaker"""
+    breaker_stats = redis_client.circuit_breaker.stats()
+
+    yield MetricFamily(
+        "redis_circuit_state",
+        "gauge",
+        "Redis circuit breaker state (0 closed, 1 half-open, 2 open)",
+        [({}, CIRCUIT_STATE_VALUES[breaker_stats["state"]])],
+    )
+    yield MetricFamily(
+        "redis_circuit_trips_total",
+        "counter",
+        "Times the Redis circuit breaker opened",
+        [({}, breaker_stats["trips"])],
+    )
+    yield MetricFamily(
+        "redis_circuit_rejected_calls_total",
+        "counter",
+        "Redis calls bypassed while the breaker was open",
+        [({}, breaker_stats["rejected_calls"])],
+    )
+
+
+metrics_registry.register_collector(collect_redis_stats)
+
+
+def collect_pool_stats() -> Iterable[MetricFamily]:
+    """Live state of every instrumented database connection pool"""
+    size_samples = []
+    checked_out_samples = []
+    overflow_samples = []
+    for pool_name, pool in _instrumented_pools.items():
+        size_samples.append(({"pool": pool_name}, pool.size()))
+        checked_out_samples.append(({"pool": pool_name}, pool.checkedout()))
+        overflow_samples.append(({"pool": pool_name}, max(0, pool.overflow())))
+
+    yield MetricFamily(
+        "db_pool_size",
+        "gauge",
+        "Configured persistent connections per pool",
+        size_samples,
+    )
+    yield MetricFamily(
+        "db_pool_checked_out",
+        "gauge",
+        "Connections currently checked out",
+        checked_out_samples,
+    )
+    yield MetricFamily(
+        "db_pool_overflow",
+        "gauge",
+        "Overflow connections currently open",
+        overflow_samples,
+    )
+
+    routing_stats = read_your_writes.stats()
+    yield MetricFamily(
+        "db_read_sessions_total",
+        "counter",
+        "Read-only sessions by target database",
+        [
+            ({"target": "primary"}, routing_stats["primary_reads"]),
+            ({"target": "replica"}, routing_stats["replica_reads"]),
+        ],
+    )
+
+
+metrics_registry.register_collector(collect_pool_stats)
+
+
+def collect_interaction_buffer_stats() -> Iterable[MetricFamily]:
+    """Throughput and backlog of the write-behind interaction buffer"""
+    buffer_stats = interaction_buffer.stats()
+
+    yield MetricFamily(
+        "interactions_ingested_total",
+        "counter",
+        "Card interactions by how they were handled",
+        [
+            ({"outcome": "buffered"}, buffer_stats["buffered"]),
+            ({"outcome": "written"}, buffer_stats["written"]),
+            ({"outcome": "sync"}, buffer_stats["sync_writes"]),
+            ({"outcome": "rejected"}, buffer_stats["rejected"]),
+        ],
+    )
+    yield MetricFamily(
+        "interaction_flush_batches_total",
+        "counter",
+        "Bulk interaction writes by outcome",
+        [
+            ({"outcome": "ok"}, buffer_stats["batches"]),
+            ({"outcome": "failed"}, buffer_stats["failed_batches"]),
+        ],
+    )
+    yield MetricFamily(
+        "interaction_buffer_depth",
+        "gauge",
+        "Card interactions buffered in this worker",
+        [({}, buffer_stats["queued"])],
+    )
+
+
+metrics_registry.register_collector(collect_interaction_buffer_stats)
+
+
+def collect_hot_counter_stats() -> Iterable[MetricFamily]:
+    """Redis-side counter increments and their reconciliation into rows"""
+    hot_counters_stats = [
+        (hot_counters.table_name, hot_counters.stats())
+        for hot_counters in counter_reconciler.counters
+    ]
+
+    yield MetricFamily(
+        "hot_counter_increments_total",
+        "counter",
+        "Row counter increments by where they were applied",
+        [
+            sample
+            for table_name, counter_stats in hot_counters_stats
+            for sample in (
+                ({"table": table_name, "target": "redis"}, counter_stats["increments"]),
+                (
+                    {"table": table_name, "target": "database"},
+                    counter_stats["fallbacks"],
+                ),
+            )
+        ],
+    )
+    yield MetricFamily(
+        "hot_counter_reconciled_rows_total",
+        "counter",
+        "Rows updated with reconciled counter deltas",
+        [
+            ({"table": table_name}, counter_stats["reconciled_rows"])
+            for table_name, counter_stats in hot_counters_stats
+        ],
+    )
+    yield MetricFamily(
+        "hot_counter_failed_reconciles_total",
+        "counter",
+        "Reconcile batches that failed and were put back",
+        [
+            ({"table": table_name}, counter_stats["failed_reconciles"])
+            for table_name, counter_stats in hot_counters_stats
+        ],
+    )
+    yield MetricFamily(
+        "hot_counter_restored_batches_total",
+        "counter",
+        "Abandoned reconcile batches put back after COUNTER_PROCESSING_TIMEOUT",
+        [
+            ({"table": table_name}, counter_stats["restored_batches"])
+            for table_name, counter_stats in hot_counters_stats
+        ],
+    )
+
+
+metrics_registry.register_collector(collect_hot_counter_stats)
@@ -1,95 +1,181 @@
 import time
 from loguru import logger
-from typing import Callable
-from fastapi import FastAPI, Request, Response
+from typing import Optional
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.config import settings
+from app.config.logging import AccessLogSampler
+from .metrics import MetricsMiddleware
+from .rate_limit import build_rate_limiter
+from .security import token_claims_cache, verify_token
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
     """
     Middleware to log requests and responses
+
+    Emits one structured access record per request once the response starts,
+    sampled by status class so it is cheap enough to keep on in production.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp, sampler: Optional[AccessLogSampler] = None):
+        self.app = app
+        self.sampler = sampler or AccessLogSampler()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
 
-        logger.info(
-            f"Request: {request.method} {request.url.path} "
-            f"from {request.client.host if request.client else 'unknown'}"
-        )
+        async def send_with_process_time(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = time.time() - start_time
+                status_code = message["status"]
 
-        response = await call_next(request)
-        process_time = time.time() - start_time
+                if self.sampler.should_log(status_code):
+                    client = scope.get("client")
+                    logger.bind(
+                        method=scope["method"],
+                        path=scope["path"],
+                        status=status_code,
+                        duration_ms=round(process_time * 1000, 3),
+                        client=client[0] if client else "unknown",
+                    ).info(
+                        f"{scope['method']} {scope['path']} {status_code} "
+                        f"processed in {process_time:.3f}s"
+                    )
 
-        logger.info(
-            f"Response: {response.status_code} "
-            f"processed in {process_time:.3f}s"
-        )
+                MutableHeaders(scope=message)["X-Process-Time"] = str(process_time)
+            await send(message)
 
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
+        await self.app(scope, receive, send_with_process_time)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """
     Middleware to add security headers
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
+    SECURITY_HEADERS = {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "X-XSS-Protection": "1; mode=block",
+        "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+        "Referrer-Policy": "strict-origin-when-cross-origin",
+    }
 
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = (
-            "max-age=31536000; includeSubDomains"
-        )
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_security_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for header_name, header_value in self.SECURITY_HEADERS.items():
+                    response_headers[header_name] = header_value
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_security_headers)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """
-    Simple rate limiting middleware
+    Rate limiting middleware backed by a GCRA limiter
+
+    Authenticated requests are limited per user, everything else per client IP.
+    A bearer token that is not in the claims cache yet is charged to the
+    client IP before its signature is checked, so a flood of junk tokens is
+    throttled like anonymous traffic instead of costing a decode each; that
+    request is not charged to the user as well.
     """
 
-    def __init__(self, app, calls: int = 100, period: int = 60):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, calls: int = 100, period: int = 60):
+        self.app = app
         self.calls = calls
         self.period = period
-        self.clients = {}
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        client_ip = request.client.host if request.client else "unknown"
-        current_time = time.time()
-
-        self.clients = {
-            ip: timestamps for ip, timestamps in self.clients.items()
-            if any(ts > current_time - self.period for ts in timestamps)
-        }
-
-        if client_ip in self.clients:
-            self.clients[client_ip] = [
-                ts for ts in self.clients[client_ip]
-                if ts > current_time - self.period
-            ]
-
-            if len(self.clients[client_ip]) >= self.calls:
-                logger.warning(f"Rate limit exceeded for {client_ip}")
-                return Response(
-                    content="Rate limit exceeded",
-                    status_code=429,
-                    headers={"Retry-After": str(self.period)}
-                )
+        self.limiter = build_rate_limiter(calls, period)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        ip_identity = f"ip:{client[0] if client else 'unknown'}"
+        token = _bearer_token(Headers(scope=scope).get("authorization"))
+
+        charged_ip = False
+        user_id = None
+        if token is not None:
+            if token not in token_claims_cache:
+                charged_ip = True
+                if not await self._hit(
+                    scope, receive, send, ip_identity, is_authenticated=False
+                ):
+                    return
+            user_id = verify_token(token, token_type="access")
+
+        if charged_ip:
+            # Counted once already; a valid token is charged to its user from
+            # the next request on, once its claims are cached
+            allowed = True
+        elif user_id:
+            allowed = await self._hit(
+                scope, receive, send, f"user:{user_id}", is_authenticated=True
+            )
         else:
-            self.clients[client_ip] = []
+            allowed = await self._hit(
+                scope, receive, send, ip_identity, is_authenticated=False
+            )
+
+        if allowed:
+            await self.app(scope, receive, send)
+
+    async def _hit(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        client_identity: str,
+        is_authenticated: bool,
+    ) -> bool:
+        """Count the request against client_identity; sends the 429 and returns False if over the limit"""
+        policy = self.limiter.resolve_policy(
+            scope["path"], is_authenticated=is_authenticated
+        )
+        result = await self.limiter.hit(client_identity, policy)
+        if result.allowed:
+            return True
+
+        logger.warning(f"Rate limit exceeded for {client_identity} on {policy.name}")
+        response = Response(
+            content="Rate limit exceeded",
+            status_code=429,
+            headers={"Retry-After": self.limiter.retry_after_header(result)},
+        )
+        await response(scope, receive, send)
+        return False
+
 
-        self.clients[client_ip].append(current_time)
-        return await call_next(request)
+def _bearer_token(authorization_header: Optional[str]) -> Optional[str]:
+    """Token of a bearer Authorization header, if any"""
+    if not authorization_header:
+        return None
+
+    scheme, _, token = authorization_header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    return token
 
 
 def setup_middleware(app: FastAPI) -> None:
@@ -99,17 +185,19 @@ def setup_middleware(app: FastAPI) -> None:
 
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=[str(origin)
-                       for origin in settings.BACKEND_CORS_ORIGINS],
+        # AnyHttpUrl renders with a trailing slash; browsers send the bare origin
+        allow_origins=[
+            str(origin).rstrip("/") for origin in settings.BACKEND_CORS_ORIGINS
+        ],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Total-Kind"],
     )
 
     app.add_middleware(SecurityHeadersMiddleware)
 
-    if settings.ENVIRONMENT != "production":
-        app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(RequestLoggingMiddleware)
 
     app.add_middleware(
         RateLimitMiddleware,
@@ -117,6 +205,8 @@ def setup_middleware(app: FastAPI) -> None:
         period=60
     )
 
+    app.add_middleware(MetricsMiddleware)
+
     if settings.ENVIRONMENT == "production":
         app.add_middleware(
             TrustedHostMiddleware,
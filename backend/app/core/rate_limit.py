@@ -0,0 +1,225 @@
+import heapq
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.config import redis_client, settings
+from app.config.memory_redis import register_script_implementation
+
+
+class RateLimitPolicy(BaseModel):
+    """A named limit of `limit` requests per `period_seconds`"""
+
+    name: str
+    limit: int = Field(ge=1)
+    period_seconds: float = Field(default=60, gt=0)
+
+    @property
+    def emission_interval(self) -> float:
+        """Seconds between requests at the sustained rate"""
+        return self.period_seconds / self.limit
+
+    @property
+    def burst_tolerance(self) -> float:
+        """How far ahead of now the theoretical arrival time may run"""
+        return self.period_seconds
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+# GCRA, evaluated atomically on the server. Uses the Redis clock so that all
+# workers agree on "now". Returns {allowed, retry_after, remaining}; floats are
+# returned as strings because Lua numbers are truncated to integers on reply.
+GCRA_LUA_SCRIPT = """
+local server_time = redis.call('TIME')
+local now = tonumber(server_time[1]) + tonumber(server_time[2]) / 1000000
+local emission_interval = tonumber(ARGV[1])
+local burst_tolerance = tonumber(ARGV[2])
+
+local theoretical_arrival = tonumber(redis.call('GET', KEYS[1]))
+if not theoretical_arrival or theoretical_arrival < now then
+    theoretical_arrival = now
+end
+
+local new_theoretical_arrival = theoretical_arrival + emission_interval
+local allow_at = new_theoretical_arrival - burst_tolerance
+if now < allow_at then
+    return {0, tostring(allow_at - now), 0}
+end
+
+local ttl_ms = math.ceil((new_theoretical_arrival - now) * 1000)
+redis.call('SET', KEYS[1], tostring(new_theoretical_arrival), 'PX', ttl_ms)
+return {1, '0', math.floor((now - allow_at) / emission_interval)}
+"""
+
+
+def _gcra_in_memory(keyspace, keys, args):
+    """GCRA_LUA_SCRIPT for the in-process Redis backend"""
+    server_seconds, server_microseconds = keyspace.time()
+    now = server_seconds + server_microseconds / 1000000
+    emission_interval = float(args[0])
+    burst_tolerance = float(args[1])
+
+    stored_arrival = keyspace.get(keys[0])
+    theoretical_arrival = (
+        max(float(stored_arrival), now) if stored_arrival is not None else now
+    )
+
+    new_theoretical_arrival = theoretical_arrival + emission_interval
+    allow_at = new_theoretical_arrival - burst_tolerance
+    if now < allow_at:
+        return [0, str(allow_at - now).encode(), 0]
+
+    ttl_ms = math.ceil((new_theoretical_arrival - now) * 1000)
+    keyspace.set(keys[0], repr(new_theoretical_arrival), px=ttl_ms)
+    return [1, b"0", math.floor((now - allow_at) / emission_interval)]
+
+
+register_script_implementation(GCRA_LUA_SCRIPT, _gcra_in_memory)
+
+
+class InMemoryRateLimiter:
+    """
+    Per-process GCRA limiter with amortized expiry.
+
+    Only one float (the theoretical arrival time) is stored per key, so each
+    check is O(log n) at most. Every key has one entry in a min-heap ordered
+    by the arrival time it was last scheduled for; each check pops at most
+    sweep_batch due entries, dropping keys that have expired and rescheduling
+    keys whose arrival time has since moved on. Stale clients are reclaimed
+    without ever rescanning the whole table, whatever mix of policy
+    intervals they were limited under.
+    """
+
+    def __init__(self, sweep_batch: int = 8):
+        self.sweep_batch = sweep_batch
+        self._theoretical_arrivals: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._theoretical_arrivals)
+
+    def _expire_stale_keys(self, now: float) -> None:
+        for _ in range(self.sweep_batch):
+            if not self._expiry_heap or self._expiry_heap[0][0] > now:
+                return
+            _, limiter_key = heapq.heappop(self._expiry_heap)
+            theoretical_arrival = self._theoretical_arrivals[limiter_key]
+            if theoretical_arrival > now:
+                heapq.heappush(self._expiry_heap, (theoretical_arrival, limiter_key))
+            else:
+                del self._theoretical_arrivals[limiter_key]
+
+    def hit(
+        self, limiter_key: str, policy: RateLimitPolicy, now: Optional[float] = None
+    ) -> RateLimitResult:
+        """Record one request against limiter_key and decide whether it is allowed"""
+        now = time.monotonic() if now is None else now
+        self._expire_stale_keys(now)
+
+        theoretical_arrival = max(self._theoretical_arrivals.get(limiter_key, now), now)
+        new_theoretical_arrival = theoretical_arrival + policy.emission_interval
+        allow_at = new_theoretical_arrival - policy.burst_tolerance
+
+        if now < allow_at:
+            return RateLimitResult(
+                allowed=False, remaining=0, retry_after=allow_at - now
+            )
+
+        if limiter_key not in self._theoretical_arrivals:
+            heapq.heappush(self._expiry_heap, (new_theoretical_arrival, limiter_key))
+        self._theoretical_arrivals[limiter_key] = new_theoretical_arrival
+        remaining = int((now - allow_at) // policy.emission_interval)
+        return RateLimitResult(allowed=True, remaining=remaining, retry_after=0.0)
+
+
+class RateLimiter:
+    """
+    Resolves the policy for a request and enforces it.
+
+    Limits are enforced in Redis when it is available, so the configured rate
+    holds across all workers; otherwise each process falls back to its own
+    in-memory limiter. Route policies are matched by longest path prefix and
+    take precedence over the anonymous/authenticated defaults.
+    """
+
+    KEY_PREFIX = "ratelimit:"
+
+    def __init__(
+        self,
+        default_policy: RateLimitPolicy,
+        authenticated_policy: Optional[RateLimitPolicy] = None,
+        route_policies: Optional[Dict[str, RateLimitPolicy]] = None,
+        use_redis: bool = True,
+    ):
+        self.default_policy = default_policy
+        self.authenticated_policy = authenticated_policy or default_policy
+        self._route_policies = sorted(
+            (route_policies or {}).items(),
+            key=lambda prefix_and_policy: len(prefix_and_policy[0]),
+            reverse=True,
+        )
+        self.use_redis = use_redis
+        self._local_limiter = InMemoryRateLimiter()
+
+    def resolve_policy(self, path: str, is_authenticated: bool) -> RateLimitPolicy:
+        """Pick the policy that applies to a request path"""
+        for route_prefix, route_policy in self._route_policies:
+            if path.startswith(route_prefix):
+                return route_policy
+        return self.authenticated_policy if is_authenticated else self.default_policy
+
+    async def hit(
+        self, client_identity: str, policy: RateLimitPolicy
+    ) -> RateLimitResult:
+        """Record one request for a client under a policy"""
+        limiter_key = f"{self.KEY_PREFIX}{policy.name}:{client_identity}"
+
+        if self.use_redis and redis_client.is_connected():
+            script_reply = await redis_client.run_script(
+                GCRA_LUA_SCRIPT,
+                keys=[limiter_key],
+                args=[policy.emission_interval, policy.burst_tolerance],
+            )
+            if script_reply is not None:
+                allowed, retry_after, remaining = script_reply
+                return RateLimitResult(
+                    allowed=bool(int(allowed)),
+                    remaining=int(remaining),
+                    retry_after=float(retry_after),
+                )
+
+        return self._local_limiter.hit(limiter_key, policy)
+
+    @staticmethod
+    def retry_after_header(result: RateLimitResult) -> str:
+        """Retry-After value in whole seconds"""
+        return str(max(1, math.ceil(result.retry_after)))
+
+
+def build_rate_limiter(calls: int, period: int) -> RateLimiter:
+    """Build a RateLimiter from settings, with `calls` per `period` as the anonymous default"""
+    authenticated_calls = settings.RATE_LIMIT_AUTHENTICATED_PER_MINUTE * period / 60
+    return RateLimiter(
+        default_policy=RateLimitPolicy(
+            name="default", limit=calls, period_seconds=period
+        ),
+        authenticated_policy=RateLimitPolicy(
+            name="authenticated",
+            limit=max(1, int(authenticated_calls)),
+            period_seconds=period,
+        ),
+        route_policies={
+            route_prefix: RateLimitPolicy(
+                name=route_prefix, limit=route_calls, period_seconds=60
+            )
+            for route_prefix, route_calls in settings.RATE_LIMIT_ROUTE_POLICIES.items()
+        },
+        use_redis=settings.RATE_LIMIT_USE_REDIS,
+    )
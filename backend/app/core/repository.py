@@ -0,0 +1,611 @@
+import hashlib
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from sqlalchemy import Select, bindparam, func
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+
+from app.config import settings
+from app.config.database import AsyncSessionLocal, engine
+from app.config.redis import redis_client
+
+from .cache import LRUCache
+from .counts import Explain, TotalCount, count_namespace, planner_row_estimate
+from .db import (
+    DBOperationOptions,
+    SortOrder,
+    decode_cursor,
+    encode_cursor,
+    fetch_keyset_page,
+    keyset_order_by,
+    keyset_segments,
+)
+from .exceptions import NotFoundError, ValidationError
+
+ModelT = TypeVar("ModelT")
+
+LIKE_ESCAPE = "\\"
+
+# Filter keys may carry an operator suffix, e.g. {"created_at__gte": since}
+FILTER_OPERATORS = {
+    "eq": lambda column, parameter: column == parameter,
+    "ne": lambda column, parameter: column != parameter,
+    "gt": lambda column, parameter: column > parameter,
+    "gte": lambda column, parameter: column >= parameter,
+    "lt": lambda column, parameter: column < parameter,
+    "lte": lambda column, parameter: column <= parameter,
+    "like": lambda column, parameter: column.like(parameter),
+    "ilike": lambda column, parameter: column.ilike(parameter),
+    "in": lambda column, parameter: column.in_(parameter),
+    # Case-insensitive substring; % and _ in the value match literally
+    "icontains": lambda column, parameter: column.ilike(parameter, escape=LIKE_ESCAPE),
+}
+
+SOFT_DELETE_COLUMN = "deleted_at"
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards (and the escape character) so value matches literally"""
+    return (
+        value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+
+class Repository(Generic[ModelT]):
+    """
+    Generic async repository that compiles DBOperationOptions into SQL.
+
+    - filters: {"field": value} for equality, a list/tuple/set for IN, None
+      for IS NULL, or {"field__op": value} with an operator from
+      FILTER_OPERATORS. {"name|description__icontains": value} matches
+      rows where any of the fields matches.
+    - sort_by/sort_order, with the primary key as a tie-breaker so pages
+      are stable; skip/limit become OFFSET/LIMIT.
+    - eager_load_relations: collections are loaded with selectinload,
+      many-to-one relations with joinedload. lazy_load=False makes any
+      other relationship access raise instead of emitting a query.
+    - lock_rows: SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers
+      can claim different rows.
+    - batch_size: stream() yields results in chunks of this size.
+    - count_total() serves paginated totals from a per-filter cache, or
+      from the planner's estimate on PostgreSQL for large results.
+    - isolation_level is applied to the session's connection, which must
+      not have started a transaction yet.
+    - Writes honor commit/refresh/close.
+
+    Statements are built once per option "shape" (which filters, operators,
+    sort and loader options are used) with bound parameters for the values,
+    and kept in an LRU, so repeated queries skip statement construction and
+    hit SQLAlchemy's compiled-SQL cache.
+    """
+
+    def __init__(self, model: Type[ModelT], statement_cache_size: int = 256):
+        self.model = model
+        mapper = sa_inspect(model)
+        self._columns = {
+            column_attr.key: column_attr for column_attr in mapper.column_attrs
+        }
+        self._relationships = {
+            relationship.key: relationship for relationship in mapper.relationships
+        }
+        self._primary_key_columns = mapper.primary_key
+        self._table_name = mapper.local_table.name
+        self._statement_cache = LRUCache(max_size=statement_cache_size)
+
+    async def get(
+        self,
+        db: AsyncSession,
+        entity_id: Any,
+        options: Optional[DBOperationOptions] = None,
+    ) -> Optional[ModelT]:
+        """Load one row by primary key, applying loader and locking options"""
+        options = options or DBOperationOptions()
+        primary_key_column = self._primary_key_columns[0]
+        filters = {**(options.filters or {}), primary_key_column.key: entity_id}
+        statement, parameters = self._select_statement(
+            options.model_copy(update={"filters": filters, "skip": 0, "limit": None})
+        )
+        await self._apply_isolation_level(db, options)
+        result = await db.execute(statement, parameters)
+        return result.scalars().first()
+
+    async def get_or_raise(
+        self,
+        db: AsyncSession,
+        entity_id: Any,
+        options: Optional[DBOperationOptions] = None,
+    ) -> ModelT:
+        entity = await self.get(db, entity_id, options)
+        if entity is None:
+            raise NotFoundError(f"{self.model.__name__} {entity_id} not found")
+        return entity
+
+    async def list(
+        self, db: AsyncSession, options: Optional[DBOperationOptions] = None
+    ) -> List[ModelT]:
+        """Load all rows matching the options"""
+        options = options or DBOperationOptions()
+        statement, parameters = self._select_statement(options)
+        await self._apply_isolation_level(db, options)
+        result = await db.execute(statement, parameters)
+        return list(result.scalars().all())
+
+    async def count(
+        self, db: AsyncSession, options: Optional[DBOperationOptions] = None
+    ) -> int:
+        """Count rows matching the options' filters (ignores paging and sorting)"""
+        options = options or DBOperationOptions()
+        statement, parameters = self._count_statement(options)
+        result = await db.execute(statement, parameters)
+        return result.scalar_one()
+
+    async def count_total(
+        self,
+        db: AsyncSession,
+        options: Optional[DBOperationOptions] = None,
+        include_total: bool = True,
+    ) -> TotalCount:
+        """
+        Total for a paginated response, as cheaply as the database allows.
+
+        Exact counts are cached per filter signature until a commit writes
+        to the table. On PostgreSQL a query the planner expects to match at
+        least COUNT_ESTIMATE_THRESHOLD rows reports that estimate instead,
+        flagged approximate. include_total=False skips counting altogether.
+
+        Note:
+            Cached counts are always computed on the primary, even when db
+            is a replica session, so a lagging replica never fills the
+            cache with a stale total. The entry is written under the
+            namespace version read before counting, so a commit that lands
+            mid-count leaves it unreachable.
+        """
+        if not include_total:
+            return TotalCount(None)
+
+        options = options or DBOperationOptions()
+        namespace = count_namespace(self._table_name)
+        versioned_key = await namespace.key(self._count_cache_key(options))
+        cached_total = await redis_client.get_value(versioned_key)
+        if cached_total is not None:
+            return TotalCount(cached_total)
+
+        if db.get_bind().dialect.name == "postgresql":
+            estimated_total = await self.estimate_count(db, options)
+            if estimated_total >= settings.COUNT_ESTIMATE_THRESHOLD:
+                return TotalCount(estimated_total, approximate=True)
+
+        if db.bind is engine:
+            total = await self.count(db, options)
+        else:
+            async with AsyncSessionLocal() as primary_db:
+                total = await self.count(primary_db, options)
+        await redis_client.set_value(
+            versioned_key, total, expiration_seconds=namespace.ttl_seconds
+        )
+        return TotalCount(total)
+
+    async def estimate_count(
+        self, db: AsyncSession, options: Optional[DBOperationOptions] = None
+    ) -> int:
+        """Planner's row estimate for the options' filters (PostgreSQL only)"""
+        options = options or DBOperationOptions()
+        filter_shape, parameters = self._filter_shape(options)
+        statement_shape = ("estimate", filter_shape, options.include_soft_deleted)
+
+        statement = self._statement_cache.get(statement_shape)
+        if statement is None:
+            statement = Explain(
+                self._apply_filters(
+                    select(*self._primary_key_columns),
+                    filter_shape,
+                    options.include_soft_deleted,
+                )
+            )
+            self._statement_cache.set(statement_shape, statement)
+
+        result = await db.execute(statement, parameters)
+        return planner_row_estimate(result.scalar_one())
+
+    async def list_with_total(
+        self, db: AsyncSession, options: Optional[DBOperationOptions] = None
+    ) -> Tuple[List[ModelT], int]:
+        """One page of rows plus the total number of matching rows"""
+        options = options or DBOperationOptions()
+        return await self.list(db, options), await self.count(db, options)
+
+    async def list_keyset(
+        self,
+        db: AsyncSession,
+        keyset_fields: Sequence[str],
+        options: Optional[DBOperationOptions] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[ModelT], Optional[str]]:
+        """
+        One keyset page ordered by keyset_fields (in options.sort_order).
+
+        Returns the rows and the cursor for the next page, or None on the
+        last page. Without a cursor, options.skip offsets into the same
+        order, so offset pages and cursor pages never disagree; with one it
+        is ignored. options.sort_by is ignored; the last keyset field must
+        be unique.
+
+        Raises:
+            ValidationError: if the cursor is malformed or its values do not
+                match the keyset columns' types
+        """
+        options = options or DBOperationOptions()
+        keyset_fields = tuple(keyset_fields)
+        for field_name in keyset_fields:
+            if field_name not in self._columns:
+                raise ValidationError(
+                    f"Unknown keyset field for {self.model.__name__}: {field_name}"
+                )
+        page_size = options.limit or 20
+        cursor_values = (
+            decode_cursor(
+                cursor,
+                len(keyset_fields),
+                [
+                    self._columns[field_name].class_attribute
+                    for field_name in keyset_fields
+                ],
+            )
+            if cursor
+            else None
+        )
+        skip = options.skip if cursor_values is None else 0
+
+        filter_shape, parameters = self._filter_shape(options)
+        eager_relations = tuple(options.eager_load_relations or ())
+        statement_shape = (
+            "keyset",
+            filter_shape,
+            keyset_fields,
+            options.sort_order,
+            eager_relations,
+            options.lazy_load,
+            options.include_soft_deleted,
+            # NULL cursor values change the predicate, not just its parameters
+            (
+                None
+                if cursor_values is None
+                else tuple(value is None for value in cursor_values)
+            ),
+            bool(skip),
+        )
+
+        segments = self._statement_cache.get(statement_shape)
+        if segments is None:
+            segments = self._build_keyset_segments(
+                options,
+                filter_shape,
+                eager_relations,
+                keyset_fields,
+                cursor_values,
+                bool(skip),
+            )
+            self._statement_cache.set(statement_shape, segments)
+
+        if cursor_values is not None:
+            for key_index, cursor_value in enumerate(cursor_values):
+                if cursor_value is not None:
+                    parameters[f"keyset_{key_index}"] = cursor_value
+        if skip:
+            parameters["skip"] = skip
+
+        await self._apply_isolation_level(db, options)
+        rows = await fetch_keyset_page(db, segments, page_size, parameters)
+
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        return rows, encode_cursor(
+            [getattr(rows[-1], field_name) for field_name in keyset_fields]
+        )
+
+    async def stream(
+        self, db: AsyncSession, options: Optional[DBOperationOptions] = None
+    ) -> AsyncIterator[List[ModelT]]:
+        """
+        Yield matching rows in chunks of options.batch_size (default 500).
+
+        Rows are fetched with a server-side cursor where the driver supports
+        one, so memory stays bounded however many rows match.
+        """
+        options = options or DBOperationOptions()
+        batch_size = options.batch_size or 500
+        statement, parameters = self._select_statement(options)
+        await self._apply_isolation_level(db, options)
+        result = await db.stream_scalars(
+            statement.execution_options(yield_per=batch_size), parameters
+        )
+        async for batch in result.partitions(batch_size):
+            yield list(batch)
+
+    async def create(
+        self,
+        db: AsyncSession,
+        values: Dict[str, Any],
+        options: Optional[DBOperationOptions] = None,
+    ) -> ModelT:
+        entity = self.model(**values)
+        db.add(entity)
+        await self._finish_write(db, entity, options or DBOperationOptions())
+        return entity
+
+    async def update(
+        self,
+        db: AsyncSession,
+        entity: ModelT,
+        values: Dict[str, Any],
+        options: Optional[DBOperationOptions] = None,
+    ) -> ModelT:
+        for field_name, value in values.items():
+            if field_name not in self._columns:
+                raise ValidationError(
+                    f"Unknown field for {self.model.__name__}: {field_name}"
+                )
+            setattr(entity, field_name, value)
+        await self._finish_write(db, entity, options or DBOperationOptions())
+        return entity
+
+    async def delete(
+        self,
+        db: AsyncSession,
+        entity: ModelT,
+        options: Optional[DBOperationOptions] = None,
+    ) -> None:
+        options = options or DBOperationOptions()
+        await db.delete(entity)
+        await self._finish_write(
+            db, None, options.model_copy(update={"refresh": False})
+        )
+
+    async def _finish_write(
+        self, db: AsyncSession, entity: Optional[ModelT], options: DBOperationOptions
+    ) -> None:
+        if options.commit:
+            await db.commit()
+        else:
+            await db.flush()
+
+        if options.refresh and entity is not None:
+            await db.refresh(entity)
+        if options.close:
+            await db.close()
+
+    async def _apply_isolation_level(
+        self, db: AsyncSession, options: DBOperationOptions
+    ) -> None:
+        if options.isolation_level is not None:
+            await db.connection(
+                execution_options={
+                    "isolation_level": options.isolation_level.value.replace("_", " ")
+                }
+            )
+
+    def _select_statement(
+        self, options: DBOperationOptions
+    ) -> Tuple[Select, Dict[str, Any]]:
+        filter_shape, parameters = self._filter_shape(options)
+        eager_relations = tuple(options.eager_load_relations or ())
+        statement_shape = (
+            "select",
+            filter_shape,
+            options.sort_by,
+            options.sort_order,
+            eager_relations,
+            options.lazy_load,
+            options.include_soft_deleted,
+            options.lock_rows,
+            bool(options.skip),
+            options.limit is not None,
+        )
+
+        if options.skip:
+            parameters["skip"] = options.skip
+        if options.limit is not None:
+            parameters["limit"] = options.limit
+
+        statement = self._statement_cache.get(statement_shape)
+        if statement is None:
+            statement = self._build_select(options, filter_shape, eager_relations)
+            self._statement_cache.set(statement_shape, statement)
+        return statement, parameters
+
+    def _count_statement(
+        self, options: DBOperationOptions
+    ) -> Tuple[Select, Dict[str, Any]]:
+        filter_shape, parameters = self._filter_shape(options)
+        statement_shape = ("count", filter_shape, options.include_soft_deleted)
+
+        statement = self._statement_cache.get(statement_shape)
+        if statement is None:
+            statement = self._apply_filters(
+                select(func.count()).select_from(self.model),
+                filter_shape,
+                options.include_soft_deleted,
+            )
+            self._statement_cache.set(statement_shape, statement)
+        return statement, parameters
+
+    def _count_cache_key(self, options: DBOperationOptions) -> str:
+        filter_shape, parameters = self._filter_shape(options)
+        filter_signature = repr(
+            (filter_shape, sorted(parameters.items()), options.include_soft_deleted)
+        )
+        return hashlib.sha1(filter_signature.encode()).hexdigest()
+
+    def _filter_shape(
+        self, options: DBOperationOptions
+    ) -> Tuple[Tuple[Hashable, ...], Dict[str, Any]]:
+        """
+        Split filters into a hashable shape and bound parameter values.
+
+        Shape entries are (field, operator, parameter name); equality with None
+        becomes ("field", "is_null", None) and needs no parameter. The field
+        may name several fields separated by "|".
+        """
+        filter_shape = []
+        parameters = {}
+        for filter_index, (filter_key, value) in enumerate(
+            sorted((options.filters or {}).items())
+        ):
+            field_name, _, operator = filter_key.partition("__")
+            operator = operator or "eq"
+            for name in field_name.split("|"):
+                if name not in self._columns:
+                    raise ValidationError(
+                        f"Unknown filter field for {self.model.__name__}: {name}"
+                    )
+            if operator not in FILTER_OPERATORS:
+                raise ValidationError(f"Unknown filter operator: {operator}")
+
+            if operator == "eq" and isinstance(value, (list, tuple, set, frozenset)):
+                operator = "in"
+            if operator in ("eq", "ne") and value is None:
+                filter_shape.append(
+                    (field_name, "is_null" if operator == "eq" else "is_not_null", None)
+                )
+                continue
+
+            parameter_name = f"filter_{filter_index}"
+            if operator == "in":
+                value = list(value)
+            elif operator == "icontains":
+                value = f"%{escape_like(str(value))}%"
+            parameters[parameter_name] = value
+            filter_shape.append((field_name, operator, parameter_name))
+
+        return tuple(filter_shape), parameters
+
+    def _apply_filters(
+        self,
+        statement: Select,
+        filter_shape: Sequence[Tuple[Hashable, ...]],
+        include_soft_deleted: bool,
+    ) -> Select:
+        for field_name, operator, parameter_name in filter_shape:
+            conditions = []
+            for name in field_name.split("|"):
+                column = self._columns[name].class_attribute
+                if operator == "is_null":
+                    conditions.append(column.is_(None))
+                elif operator == "is_not_null":
+                    conditions.append(column.is_not(None))
+                else:
+                    parameter = bindparam(parameter_name, expanding=(operator == "in"))
+                    conditions.append(FILTER_OPERATORS[operator](column, parameter))
+            statement = statement.where(or_(*conditions))
+
+        if not include_soft_deleted and SOFT_DELETE_COLUMN in self._columns:
+            statement = statement.where(
+                self._columns[SOFT_DELETE_COLUMN].class_attribute.is_(None)
+            )
+        return statement
+
+    def _build_select(
+        self,
+        options: DBOperationOptions,
+        filter_shape: Sequence[Tuple[Hashable, ...]],
+        eager_relations: Sequence[str],
+    ) -> Select:
+        statement = self._apply_filters(
+            select(self.model), filter_shape, options.include_soft_deleted
+        )
+        statement = self._apply_loader_options(statement, options, eager_relations)
+
+        order_by = []
+        if options.sort_by:
+            if options.sort_by not in self._columns:
+                raise ValidationError(
+                    f"Unknown sort field for {self.model.__name__}: {options.sort_by}"
+                )
+            sort_column = self._columns[options.sort_by].class_attribute
+            order_by.append(
+                sort_column.desc()
+                if options.sort_order == SortOrder.DESC
+                else sort_column.asc()
+            )
+        order_by.extend(self._primary_key_columns)
+        statement = statement.order_by(*order_by)
+
+        if options.skip:
+            statement = statement.offset(bindparam("skip"))
+        if options.limit is not None:
+            statement = statement.limit(bindparam("limit"))
+
+        if options.lock_rows:
+            statement = statement.with_for_update(skip_locked=True, of=self.model)
+        return statement
+
+    def _build_keyset_segments(
+        self,
+        options: DBOperationOptions,
+        filter_shape: Sequence[Tuple[Hashable, ...]],
+        eager_relations: Sequence[str],
+        keyset_fields: Sequence[str],
+        cursor_values: Optional[Sequence[Any]],
+        has_skip: bool,
+    ) -> List[Select]:
+        statement = self._apply_filters(
+            select(self.model), filter_shape, options.include_soft_deleted
+        )
+        statement = self._apply_loader_options(statement, options, eager_relations)
+        keyset_columns = [
+            self._columns[field_name].class_attribute for field_name in keyset_fields
+        ]
+        descending = options.sort_order == SortOrder.DESC
+
+        if has_skip:
+            # Offset pages walk the whole order in one statement, NULL keys included
+            statement = statement.order_by(*keyset_order_by(keyset_columns, descending))
+            return [statement.offset(bindparam("skip")).limit(bindparam("limit"))]
+
+        return [
+            segment.limit(bindparam("limit"))
+            for segment in keyset_segments(
+                statement, keyset_columns, cursor_values, descending
+            )
+        ]
+
+    def _apply_loader_options(
+        self,
+        statement: Select,
+        options: DBOperationOptions,
+        eager_relations: Sequence[str],
+    ) -> Select:
+        loader_options = []
+        for relation_name in eager_relations:
+            relationship = self._relationships.get(relation_name)
+            if relationship is None:
+                raise ValidationError(
+                    f"Unknown relation for {self.model.__name__}: {relation_name}"
+                )
+            relation_attribute = getattr(self.model, relation_name)
+            if relationship.uselist:
+                loader_options.append(selectinload(relation_attribute))
+            else:
+                loader_options.append(joinedload(relation_attribute))
+        if not options.lazy_load:
+            loader_options.append(raiseload("*"))
+        if loader_options:
+            statement = statement.options(*loader_options)
+        return statement
@@ -0,0 +1,256 @@
+import re
+from typing import Any, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import engine
+from app.models import Topic
+
+MAX_SEARCH_TERMS = 8
+# A shorter last word is matched whole: as a prefix it would match (and
+# have to rank) a large share of the catalog
+MIN_PREFIX_LENGTH = 3
+
+SQLITE_INDEX_TABLE = "topics_fts"
+
+# Topic name and description as a weighted document; the index and the
+# queries must use this exact expression for PostgreSQL to pick the index
+POSTGRES_SEARCH_VECTOR = (
+    "(setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B'))"
+)
+
+POSTGRES_INDEX_NAME = "ix_topics_search"
+
+POSTGRES_INSTALL_STATEMENTS = (
+    f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX_NAME} ON topics USING GIN ({POSTGRES_SEARCH_VECTOR})",
+)
+
+POSTGRES_DROP_STATEMENTS = (f"DROP INDEX IF EXISTS {POSTGRES_INDEX_NAME}",)
+
+# External-content FTS5 table over topics, kept in sync by triggers
+SQLITE_INSTALL_STATEMENTS = (
+    f"""
+    CREATE VIRTUAL TABLE {SQLITE_INDEX_TABLE} USING fts5(
+        name, description, content='topics', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {SQLITE_INDEX_TABLE}_after_insert AFTER INSERT ON topics BEGIN
+        INSERT INTO {SQLITE_INDEX_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SQLITE_INDEX_TABLE}_after_delete AFTER DELETE ON topics BEGIN
+        INSERT INTO {SQLITE_INDEX_TABLE}({SQLITE_INDEX_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SQLITE_INDEX_TABLE}_after_update AFTER UPDATE ON topics BEGIN
+        INSERT INTO {SQLITE_INDEX_TABLE}({SQLITE_INDEX_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {SQLITE_INDEX_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"INSERT INTO {SQLITE_INDEX_TABLE}({SQLITE_INDEX_TABLE}) VALUES ('rebuild')",
+)
+
+SQLITE_DROP_STATEMENTS = tuple(
+    f"DROP TRIGGER IF EXISTS {SQLITE_INDEX_TABLE}_after_{event}"
+    for event in ("insert", "delete", "update")
+) + (f"DROP TABLE IF EXISTS {SQLITE_INDEX_TABLE}",)
+
+_sqlite_index_table = table(SQLITE_INDEX_TABLE, column("rowid"))
+
+
+def index_installed(sync_connection) -> bool:
+    """Whether the search index exists on this connection's database"""
+    if sync_connection.dialect.name == "postgresql":
+        existence_query = (
+            "SELECT 1 FROM pg_indexes WHERE tablename = 'topics' AND indexname = :name"
+        )
+        index_name = POSTGRES_INDEX_NAME
+    else:
+        existence_query = (
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        )
+        index_name = SQLITE_INDEX_TABLE
+    return (
+        sync_connection.execute(text(existence_query), {"name": index_name}).first()
+        is not None
+    )
+
+
+def install_index(sync_connection) -> None:
+    """Create (and backfill) the search index if it does not exist yet; used by the migrations"""
+    if sync_connection.dialect.name not in TopicSearchIndex.SUPPORTED_DIALECTS:
+        return
+    if sync_connection.dialect.name == "postgresql":
+        install_statements = POSTGRES_INSTALL_STATEMENTS
+    else:
+        install_statements = (
+            () if index_installed(sync_connection) else SQLITE_INSTALL_STATEMENTS
+        )
+
+    for install_statement in install_statements:
+        sync_connection.execute(text(install_statement))
+
+
+def drop_index(sync_connection) -> None:
+    """Remove the search index and, on SQLite, the triggers that maintain it"""
+    if sync_connection.dialect.name == "postgresql":
+        drop_statements = POSTGRES_DROP_STATEMENTS
+    elif sync_connection.dialect.name == "sqlite":
+        drop_statements = SQLITE_DROP_STATEMENTS
+    else:
+        return
+
+    for drop_statement in drop_statements:
+        sync_connection.execute(text(drop_statement))
+
+
+def search_terms(search_text: str) -> List[str]:
+    """Lower-cased words of a search string (punctuation and query syntax are dropped)"""
+    return re.findall(r"\w+", search_text.lower())[:MAX_SEARCH_TERMS]
+
+
+def _with_prefix_flags(terms: List[str]) -> List[Tuple[str, bool]]:
+    """(term, whether it matches as a prefix): only the last term, if long enough"""
+    return [
+        (term, term_index == len(terms) - 1 and len(term) >= MIN_PREFIX_LENGTH)
+        for term_index, term in enumerate(terms)
+    ]
+
+
+class TopicSearchIndex:
+    """
+    Full-text search over topic names and descriptions.
+
+    On SQLite this is an FTS5 table kept in sync with topics by triggers,
+    ranked with bm25; on PostgreSQL a GIN index on a weighted tsvector of the
+    two columns (maintained by PostgreSQL itself), ranked with ts_rank. Name
+    matches rank above description matches.
+
+    Every word must match and the last one (from MIN_PREFIX_LENGTH
+    characters) matches as a prefix, so results narrow as the user types.
+    search() returns None on other databases or when the index is not
+    installed; callers keep their unindexed search for that case.
+
+    Note:
+        The index is created by a migration (install_index), not on
+        startup: on PostgreSQL the first build over a large topics table
+        holds a write lock on it while it runs. detect() only checks that
+        it exists.
+    """
+
+    SUPPORTED_DIALECTS = ("sqlite", "postgresql")
+
+    def __init__(self):
+        self.available = False
+
+    async def detect(self) -> bool:
+        """Check whether the migration has installed the index"""
+        if engine.dialect.name not in self.SUPPORTED_DIALECTS:
+            return False
+
+        try:
+            async with engine.connect() as conn:
+                self.available = await conn.run_sync(index_installed)
+        except Exception as detect_error:
+            logger.warning(
+                f"Could not check the topic search index, using substring search: {detect_error!r}"
+            )
+            self.available = False
+            return False
+
+        if not self.available:
+            logger.warning(
+                "Topic search index is not installed (run the migrations), using substring search"
+            )
+        return self.available
+
+    def _sqlite_match(self, terms: List[str]) -> Any:
+        match_expression = " ".join(
+            f'"{term}"*' if is_prefix else f'"{term}"'
+            for term, is_prefix in _with_prefix_flags(terms)
+        )
+        return literal_column(SQLITE_INDEX_TABLE).op("MATCH")(match_expression)
+
+    def _ranked_select(self, dialect_name: str, terms: List[str]) -> Tuple[Any, Any]:
+        """(filtered select of Topic, rank ordering) for the given terms"""
+        if dialect_name == "postgresql":
+            search_vector = literal_column(POSTGRES_SEARCH_VECTOR)
+            search_query = func.to_tsquery(
+                literal_column("'simple'"),
+                " & ".join(
+                    f"{term}:*" if is_prefix else term
+                    for term, is_prefix in _with_prefix_flags(terms)
+                ),
+            )
+            return (
+                select(Topic).where(search_vector.op("@@")(search_query)),
+                func.ts_rank(search_vector, search_query).desc(),
+            )
+
+        return (
+            select(Topic)
+            .join(_sqlite_index_table, _sqlite_index_table.c.rowid == Topic.id)
+            .where(self._sqlite_match(terms)),
+            # bm25 is lower for better matches; name weighs 10x the description
+            func.bm25(literal_column(SQLITE_INDEX_TABLE), 10.0, 1.0).asc(),
+        )
+
+    async def search(
+        self,
+        db: AsyncSession,
+        search_text: str,
+        category: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+        include_total: bool = True,
+    ) -> Optional[Tuple[List[Any], Optional[int]]]:
+        """
+        Topics matching search_text, best first, and the number of matches.
+
+        The total is None when include_total is false. Returns None when the
+        index cannot serve this database.
+        """
+        dialect_name = db.bind.dialect.name
+        if not self.available or dialect_name not in self.SUPPORTED_DIALECTS:
+            return None
+
+        terms = search_terms(search_text)
+        if not terms:
+            return [], (0 if include_total else None)
+
+        matching_topics, rank_order = self._ranked_select(dialect_name, terms)
+        if category:
+            matching_topics = matching_topics.where(Topic.category == category)
+
+        result = await db.execute(
+            matching_topics.order_by(rank_order, Topic.id).offset(skip).limit(limit)
+        )
+        topics = list(result.scalars().all())
+
+        if not include_total:
+            return topics, None
+
+        if dialect_name == "sqlite" and not category:
+            # Counted in the FTS table alone, without joining back to topics
+            count_query = (
+                select(func.count())
+                .select_from(_sqlite_index_table)
+                .where(self._sqlite_match(terms))
+            )
+        else:
+            count_query = select(func.count()).select_from(
+                matching_topics.with_only_columns(Topic.id).subquery()
+            )
+        return topics, await db.scalar(count_query)
+
+
+topic_search = TopicSearchIndex()
@@ -1,14 +1,26 @@
+import asyncio
+import hashlib
+import heapq
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Any, Union
+from typing import Optional, Any, Callable, Dict, Hashable, List, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import secrets
 import string
 from app.config import settings
+from .exceptions import ServiceOverloadedError
+from .cache import LRUCache, invalidation_bus
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+SUBJECT_REVOCATION_SECONDS = max(
+    settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+)
+
 
 def create_access_token(
     subject: Union[str, Any],
@@ -26,8 +38,9 @@ def create_access_token(
 
     to_encode = {
         "exp": expire,
+        "iat": time.time(),
         "sub": str(subject),
-        "type": "access"
+        "type": "access",
     }
 
     encoded_jwt = jwt.encode(
@@ -43,7 +56,12 @@ def create_refresh_token(subject: Union[str, Any]) -> str:
     Create a JWT refresh token
     """
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    to_encode = {
+        "exp": expire,
+        "iat": time.time(),
+        "sub": str(subject),
+        "type": "refresh",
+    }
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -52,28 +70,235 @@ def create_refresh_token(subject: Union[str, Any]) -> str:
     return encoded_jwt
 
 
+class RevocationList:
+    """
+    Revocations held until they expire, and never evicted before that.
+
+    Unlike an LRU, nothing is dropped to make room: forgetting a revocation
+    early would silently accept a revoked token again. Size is bounded by
+    the number of revocations issued within one token lifetime; expired
+    entries are pruned on every write.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[float, float]] = {}
+        self._expiry_heap: List[Tuple[float, Hashable]] = []
+
+    def __len__(self) -> int:
+        self._prune()
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Hashable) -> Optional[float]:
+        """The value stored for key, or None if it was never added or has expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def add(self, key: Hashable, value: float, expires_at: float) -> None:
+        """Hold key until expires_at, keeping the later value and expiry if it is already held"""
+        current_entry = self._entries.get(key)
+        if current_entry is not None:
+            value = max(value, current_entry[0])
+            expires_at = max(expires_at, current_entry[1])
+        self._entries[key] = (value, expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        self._prune()
+
+    def _prune(self) -> None:
+        now = time.time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(key)
+            # A later add() for the same key pushed a later expiry
+            if entry is not None and entry[1] <= expires_at:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._expiry_heap.clear()
+
+
+class TokenClaimsCache:
+    """
+    Bounded cache of already-verified JWT claims, plus the revocation list.
+
+    Clients reuse the same access token for many requests, so the signature
+    check only needs to happen once per token. Entries are keyed by a SHA-256
+    digest of the token (the raw token is never kept) and stop being served
+    the moment the token's exp passes.
+
+    A revoked token still has a valid signature, so revocations are kept as
+    a deny list (single tokens until their exp, whole subjects for every
+    token issued before the revocation) and published over the cache
+    invalidation channel, so every worker rejects the token, not only the
+    one that handled the logout. The deny list is a RevocationList, not
+    bounded by max_size, so load on the claims cache cannot evict a
+    revocation.
+
+    Note:
+        Revocations are held in memory only. A worker that is disconnected
+        from Redis while one is published, or that starts afterwards, does
+        not learn about it and keeps accepting the token until it expires.
+    """
+
+    REVOCATION_NAMESPACE = "auth:revocations:"
+
+    def __init__(self, max_size: int = settings.TOKEN_CACHE_MAX_SIZE):
+        self._claims = LRUCache(max_size=max_size)
+        self._revoked_tokens = RevocationList()
+        self._revoked_subjects = RevocationList()
+        invalidation_bus.add_handler(self.REVOCATION_NAMESPACE, self.handle_revocation)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def __contains__(self, token: str) -> bool:
+        """Whether verified claims for the token are cached (does not count as a lookup)"""
+        return self._digest(token) in self._claims
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return cached claims for a token, or None if not cached or expired"""
+        token_digest = self._digest(token)
+        claims = self._claims.get(token_digest)
+        if claims is None:
+            return None
+
+        if claims["exp"] <= time.time():
+            self._claims.delete(token_digest)
+            return None
+
+        return claims
+
+    def store(self, token: str, claims: Dict[str, Any]) -> None:
+        """Cache verified claims until the token's exp. Tokens without exp are not cached."""
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+
+        self._claims.set(
+            self._digest(token), claims, ttl_seconds=expires_at - time.time()
+        )
+
+    def is_revoked(self, token: str, claims: Dict[str, Any]) -> bool:
+        """Whether the token, or every token of its subject issued before now, was revoked"""
+        if self._digest(token) in self._revoked_tokens:
+            return True
+
+        subject_revoked_at = self._revoked_subjects.get(str(claims.get("sub")))
+        if subject_revoked_at is None:
+            return False
+
+        issued_at = claims.get("iat")
+        return (
+            not isinstance(issued_at, (int, float)) or issued_at <= subject_revoked_at
+        )
+
+    async def revoke_token(self, token: str) -> None:
+        """Reject a single token on every worker until it expires, e.g. on logout"""
+        try:
+            expires_at = float(jwt.get_unverified_claims(token)["exp"])
+        except (JWTError, KeyError, TypeError, ValueError):
+            expires_at = time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+        token_digest = self._digest(token).hex()
+        self._revoke_token_locally(token_digest, expires_at)
+        await invalidation_bus.publish(
+            self.REVOCATION_NAMESPACE, f"token:{expires_at}:{token_digest}"
+        )
+
+    async def revoke_subject(self, subject: Union[str, Any]) -> int:
+        """
+        Reject every token issued to a subject so far, on every worker.
+
+        Used on deactivation; tokens issued afterwards are accepted again. Returns the number of locally cached entries
+        dropped.
+        """
+        revoked_at = time.time()
+        dropped = self._revoke_subject_locally(str(subject), revoked_at)
+        await invalidation_bus.publish(
+            self.REVOCATION_NAMESPACE, f"subject:{revoked_at}:{subject}"
+        )
+        return dropped
+
+    def handle_revocation(self, message: str) -> None:
+        """Apply a revocation published by another worker"""
+        kind, _, revocation = message.partition(":")
+        timestamp, _, target = revocation.partition(":")
+        try:
+            timestamp = float(timestamp)
+        except ValueError:
+            return
+
+        if kind == "token":
+            self._revoke_token_locally(target, timestamp)
+        elif kind == "subject":
+            self._revoke_subject_locally(target, timestamp)
+
+    def _revoke_token_locally(self, token_digest_hex: str, expires_at: float) -> None:
+        token_digest = bytes.fromhex(token_digest_hex)
+        self._claims.delete(token_digest)
+        self._revoked_tokens.add(token_digest, expires_at, expires_at)
+
+    def _revoke_subject_locally(self, subject: str, revoked_at: float) -> int:
+        # Long enough to outlive every token issued before the revocation
+        self._revoked_subjects.add(
+            subject, revoked_at, revoked_at + SUBJECT_REVOCATION_SECONDS
+        )
+        return self._claims.delete_where(lambda _, claims: claims.get("sub") == subject)
+
+    def clear(self) -> None:
+        """Drop every cached token"""
+        self._claims.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the claims cache"""
+        return {
+            **self._claims.stats(),
+            "revoked_tokens": len(self._revoked_tokens),
+            "revoked_subjects": len(self._revoked_subjects),
+        }
+
+
+token_claims_cache = TokenClaimsCache()
+
+
 def verify_token(token: str, token_type: str = "access") -> Optional[str]:
     """
     Verify and decode a JWT token
+
+    Verified claims are cached until the token expires, so repeated calls
+    with the same token skip the signature check. Revoked tokens are
+    rejected either way.
     """
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+    payload = token_claims_cache.get(token)
 
-        if payload.get("type") != token_type:
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+        except JWTError:
             return None
 
-        subject: str = payload.get("sub")
-        if subject is None:
-            return None
+        token_claims_cache.store(token, payload)
 
-        return subject
-    except JWTError:
+    if token_claims_cache.is_revoked(token, payload):
+        return None
+
+    if payload.get("type") != token_type:
         return None
 
+    subject: str = payload.get("sub")
+    if subject is None:
+        return None
+
+    return subject
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -89,6 +314,79 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded worker pool.
+
+    bcrypt is deliberately slow, so calling it inline blocks the event loop
+    and stalls every other request on the worker. Calls are submitted to a
+    thread or process pool instead; once max_pending calls are queued or
+    running, new calls are rejected immediately with ServiceOverloadedError
+    rather than piling up behind the pool.
+    """
+
+    def __init__(
+        self,
+        executor_type: str = settings.PASSWORD_HASH_EXECUTOR,
+        max_workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_pending: int = settings.PASSWORD_HASH_MAX_PENDING,
+    ):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor_type}")
+
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def _submit(self, hashing_function: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ServiceOverloadedError(
+                "Password hashing pool is saturated",
+                error_code="PASSWORD_HASHER_SATURATED",
+                details={"pending": self.pending, "max_pending": self.max_pending},
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), hashing_function, *args
+            )
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a plain password against its hash off the event loop"""
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop"""
+        return await self._submit(get_password_hash, password)
+
+    def shutdown(self) -> None:
+        """Release pool workers. Should be called on application shutdown."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
 def generate_password_reset_token(email: str) -> str:
     """
     Generate a password reset token
@@ -0,0 +1,74 @@
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CardInteraction, LearningSession
+
+
+class SessionInteractionStats(NamedTuple):
+    """A learning session with totals over its card interactions"""
+
+    session: Any
+    interaction_count: int
+    mastered_count: int
+    interaction_time: float
+
+    @property
+    def average_time_per_card(self) -> float:
+        return self.interaction_time / max(self.interaction_count, 1)
+
+    @property
+    def completion_rate(self) -> float:
+        return self.mastered_count / max(self.interaction_count, 1) * 100
+
+
+async def load_session_stats(
+    db: AsyncSession, session_id: str, user_id: Any
+) -> Optional[SessionInteractionStats]:
+    """
+    The user's session and its interaction totals, in one query.
+
+    The session row is outer-joined to a grouped aggregate of its
+    interactions (served by ix_card_interactions_session_stats), so no
+    interaction rows are loaded. A NULL confidence_rating counts as not
+    mastered. Returns None if the session does not exist or belongs to
+    someone else.
+    """
+    interaction_stats = (
+        select(
+            CardInteraction.session_id,
+            func.count().label("interaction_count"),
+            func.count()
+            .filter(CardInteraction.confidence_rating >= 4)
+            .label("mastered_count"),
+            func.sum(CardInteraction.time_spent_seconds).label("interaction_time"),
+        )
+        .where(CardInteraction.session_id == session_id)
+        .group_by(CardInteraction.session_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            LearningSession,
+            interaction_stats.c.interaction_count,
+            interaction_stats.c.mastered_count,
+            interaction_stats.c.interaction_time,
+        )
+        .outerjoin(
+            interaction_stats, interaction_stats.c.session_id == LearningSession.id
+        )
+        .where(
+            and_(LearningSession.id == session_id, LearningSession.user_id == user_id)
+        )
+    )
+    stats_row = result.one_or_none()
+    if stats_row is None:
+        return None
+
+    return SessionInteractionStats(
+        session=stats_row.LearningSession,
+        interaction_count=stats_row.interaction_count or 0,
+        mastered_count=stats_row.mastered_count or 0,
+        interaction_time=stats_row.interaction_time or 0,
+    )
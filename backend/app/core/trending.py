@@ -0,0 +1,156 @@
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import redis_client, settings
+from app.models import LearningSession, Topic
+
+TRENDING_KEY_PREFIX = "trending:"
+
+# Scores are stored relative to the start of a generation and grow by 2x per
+# half-life within it; a generation spans this many half-lives
+GENERATION_HALF_LIVES = 32
+
+
+class TrendingTopics:
+    """
+    Exponentially decayed activity per topic, kept in Redis sorted sets.
+
+    Instead of decaying every score over time, each new activity is added
+    with weight * 2 ** (age of the generation / half-life), so older activity
+    shrinks relative to newer activity while stored scores never change.
+    A write is a ZINCRBY and a top-K read a ZREVRANGE, both O(log n), and the
+    ranking is always current without a background job.
+
+    There is one leaderboard for all topics and one per category. To keep
+    the growth factor bounded, keys are split into generations of
+    GENERATION_HALF_LIVES half-lives. Every activity is also added, already
+    scaled down, to the next generation's keys, so that generation starts
+    out complete and older ones simply expire.
+
+    Note:
+        Recording is best effort: when Redis is unavailable the activity is
+        not counted and top_topics() returns None.
+    """
+
+    def __init__(self, half_life_seconds: float = settings.TRENDING_HALF_LIFE_SECONDS):
+        self.half_life_seconds = half_life_seconds
+        self.generation_seconds = half_life_seconds * GENERATION_HALF_LIVES
+        self._topic_id_type = list(Topic.__table__.primary_key.columns)[
+            0
+        ].type.python_type
+
+    def _leaderboard_key(self, generation: int, category: Optional[str] = None) -> str:
+        scope = "all" if category is None else f"category:{category}"
+        return f"{TRENDING_KEY_PREFIX}{generation}:{scope}"
+
+    def _generation(self, timestamp: float) -> int:
+        return int(timestamp // self.generation_seconds)
+
+    def _growth(self, timestamp: float, generation: int) -> float:
+        return 2 ** (
+            (timestamp - generation * self.generation_seconds) / self.half_life_seconds
+        )
+
+    async def record_activity(
+        self,
+        topic_activity: Iterable[Tuple[Any, Optional[str], float]],
+        timestamp: Optional[float] = None,
+    ) -> bool:
+        """Add (topic id, category, weight) activity; False if Redis is unavailable"""
+        topic_activity = list(topic_activity)
+        timestamp = time.time() if timestamp is None else timestamp
+        current_generation = self._generation(timestamp)
+
+        increments_by_key: Dict[str, Dict[str, float]] = {}
+        for generation in (current_generation, current_generation + 1):
+            growth = self._growth(timestamp, generation)
+            for topic_id, category, weight in topic_activity:
+                leaderboard_keys = [self._leaderboard_key(generation)]
+                if category:
+                    leaderboard_keys.append(self._leaderboard_key(generation, category))
+                for leaderboard_key in leaderboard_keys:
+                    member_increments = increments_by_key.setdefault(
+                        leaderboard_key, {}
+                    )
+                    member_increments[str(topic_id)] = (
+                        member_increments.get(str(topic_id), 0.0) + weight * growth
+                    )
+
+        return await redis_client.increment_sorted_set_scores(
+            increments_by_key, ttl_seconds=int(2 * self.generation_seconds)
+        )
+
+    async def record_interactions(
+        self, db: AsyncSession, interaction_counts: Mapping[Any, int]
+    ) -> bool:
+        """Add interaction activity given {session id: interaction count}, resolving each session's topic"""
+        if not interaction_counts:
+            return True
+
+        result = await db.execute(
+            select(LearningSession.id, Topic.id, Topic.category)
+            .join(Topic, LearningSession.topic_id == Topic.id)
+            .where(LearningSession.id.in_(list(interaction_counts)))
+        )
+        return await self.record_activity(
+            (
+                topic_id,
+                category,
+                interaction_counts[session_id] * settings.TRENDING_INTERACTION_WEIGHT,
+            )
+            for session_id, topic_id, category in result.all()
+        )
+
+    async def top_topics(
+        self,
+        limit: int,
+        category: Optional[str] = None,
+        timestamp: Optional[float] = None,
+    ) -> Optional[List[Tuple[Any, float]]]:
+        """(topic id, decayed score) for the top topics, best first; None if Redis is unavailable"""
+        timestamp = time.time() if timestamp is None else timestamp
+        generation = self._generation(timestamp)
+        scored_members = await redis_client.get_top_scored_members(
+            self._leaderboard_key(generation, category), limit
+        )
+        if scored_members is None:
+            return None
+
+        growth = self._growth(timestamp, generation)
+        return [
+            (self._topic_id_type(member), score / growth)
+            for member, score in scored_members
+        ]
+
+    async def fallback_topics(
+        self, db: AsyncSession, limit: int, category: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Topics ranked by how many learning sessions they have, for when the
+        leaderboards are unavailable or still empty.
+
+        The category filter is part of the query, so a category with few
+        sessions still gets up to limit topics.
+        """
+        session_counts = (
+            select(LearningSession.topic_id, func.count().label("session_count"))
+            .group_by(LearningSession.topic_id)
+            .subquery()
+        )
+        statement = (
+            select(Topic)
+            .outerjoin(session_counts, session_counts.c.topic_id == Topic.id)
+            .order_by(func.coalesce(session_counts.c.session_count, 0).desc(), Topic.id)
+            .limit(limit)
+        )
+        if category is not None:
+            statement = statement.where(Topic.category == category)
+
+        result = await db.execute(statement)
+        return list(result.scalars().all())
+
+
+trending_topics = TrendingTopics()
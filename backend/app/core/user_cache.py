@@ -0,0 +1,105 @@
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+
+from .cache import NearCache
+
+
+class UserCache:
+    """
+    Two-tier cache for resolving authenticated users.
+
+    Lookups go through the near-cache (in-process LRU, then Redis) and only
+    then the database. Cached entries hold plain column values; on a hit the
+    user is rebuilt and merged into the request session without emitting a
+    SELECT, so routes can still modify and commit it as usual.
+
+    Note:
+        Call invalidate() after any change to a user row (profile updates,
+        preference updates, is_active flips). The invalidation is broadcast
+        to every worker; the short local TTL only matters if a broadcast is
+        missed. A request that loaded the user before the invalidation cannot
+        put the old row back afterwards (see NearCache.set_if_unchanged).
+        Secret columns (SECRET_COLUMNS) are never cached: on a cache hit they
+        are left unloaded, so code that needs them must load them explicitly,
+        e.g. with db.refresh(user, ["hashed_password"]).
+    """
+
+    # v2: entries hold typed values (msgpack) instead of JSON strings
+    NAMESPACE = "auth:user:v2:"
+    SECRET_COLUMNS = frozenset({"hashed_password"})
+
+    def __init__(
+        self,
+        max_size: int = settings.USER_CACHE_MAX_SIZE,
+        local_ttl_seconds: int = settings.USER_CACHE_LOCAL_TTL,
+        redis_ttl_seconds: int = settings.USER_CACHE_TTL,
+    ):
+        self._near_cache = NearCache(
+            self.NAMESPACE,
+            max_size=max_size,
+            ttl_seconds=local_ttl_seconds,
+            redis_ttl_seconds=redis_ttl_seconds,
+        )
+        self.database_loads = 0
+
+    async def get_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """
+        Resolve a user by ID, attached to the given session.
+
+        Returns None if the user does not exist.
+        """
+        user_columns = await self._near_cache.get(user_id)
+        if user_columns is not None:
+            return await _attach_to_session(db, user_columns)
+
+        fill_token = await self._near_cache.fill_token(user_id)
+        self.database_loads += 1
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+
+        if user is not None:
+            await self._near_cache.set_if_unchanged(
+                user.id, _dump_columns(user), fill_token
+            )
+
+        return user
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop a user from both tiers on every worker"""
+        await self._near_cache.delete(user_id)
+        logger.debug(f"Invalidated cached user {user_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for both tiers"""
+        near_cache_stats = self._near_cache.stats()
+        return {
+            **near_cache_stats,
+            "database_loads": self.database_loads,
+            "hits": near_cache_stats["local_hits"] + near_cache_stats["redis_hits"],
+            "misses": self.database_loads,
+        }
+
+
+def _dump_columns(user: User) -> Dict[str, Any]:
+    return {
+        column_attr.key: getattr(user, column_attr.key)
+        for column_attr in sa_inspect(User).column_attrs
+        if column_attr.key not in UserCache.SECRET_COLUMNS
+    }
+
+
+async def _attach_to_session(db: AsyncSession, user_columns: Dict[str, Any]) -> User:
+    user = User(**user_columns)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+user_cache = UserCache()
@@ -1,8 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.config import settings
+from fastapi.responses import PlainTextResponse
+from app.config import settings, redis_client
+from app.config.database import engine, read_engine, has_read_replica
+from app.config.logging import setup_logging
 from app.api import api_router
+from app.core import setup_middleware, setup_events
+from app.core.metrics import (
+    metrics_registry,
+    metrics_access_allowed,
+    instrument_engine,
+    instrument_redis,
+)
+
 
+setup_logging()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -13,6 +25,13 @@ app = FastAPI(
 
 app.include_router(api_router)
 
+setup_middleware(app)
+setup_events(app)
+instrument_engine(engine)
+if has_read_replica():
+    instrument_engine(read_engine, pool_name="replica")
+instrument_redis(redis_client)
+
 
 @app.get("/")
 async def root():
@@ -23,6 +42,18 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    client_host = request.client.host if request.client else None
+    if not metrics_access_allowed(client_host, request.headers.get("authorization")):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
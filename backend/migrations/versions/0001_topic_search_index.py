@@ -0,0 +1,28 @@
+"""Topic full-text search index
+
+FTS5 table and sync triggers on SQLite, GIN index on PostgreSQL. The
+statements live in app.core.search next to the queries that rely on them.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.search import drop_index, install_index
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    install_index(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_index(op.get_bind())
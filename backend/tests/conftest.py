@@ -0,0 +1,73 @@
+import os
+import tempfile
+import uuid
+
+# The app reads its settings at import time, so point it at a throwaway
+# SQLite file and the in-process Redis backend before anything imports it
+_test_directory = tempfile.mkdtemp(prefix="infinity-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_test_directory}/test.db")
+os.environ.setdefault("REDIS_URL", "redis+memory://")
+os.environ.setdefault("ENVIRONMENT", "testing")
+
+import pytest
+
+from app.config.database import Base, create_tables, engine
+from app.config.redis import redis_client
+from app.config.settings import settings
+
+
+@pytest.fixture
+async def redis():
+    """The application's Redis client on a fresh in-memory keyspace"""
+    if not redis_client.is_connected():
+        await redis_client.connect_to_redis()
+    await redis_client.flush_entire_database()
+    yield redis_client
+    await redis_client.flush_entire_database()
+
+
+@pytest.fixture
+async def database():
+    """Empty application tables, dropped again after the test"""
+    await create_tables()
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest.fixture
+async def real_redis():
+    """
+    The application's Redis client on the server at REDIS_TEST_URL, so Lua
+    scripts run on Redis itself; skipped when that is unset or unreachable.
+
+    Keys go under a per-test prefix and are removed afterwards; the client
+    is back on the in-memory backend once the test is done.
+    """
+    redis_url = os.environ.get("REDIS_TEST_URL")
+    if not redis_url:
+        pytest.skip("REDIS_TEST_URL is not set")
+
+    await redis_client.close_connection()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "REDIS_URL", redis_url)
+        patch.setattr(
+            redis_client,
+            "key_prefix",
+            f"{settings.CACHE_KEY_PREFIX}test:{uuid.uuid4().hex}:",
+        )
+        try:
+            await redis_client._open_connection()
+        except Exception as redis_connection_error:
+            unreachable_error = redis_connection_error
+        else:
+            unreachable_error = None
+            try:
+                yield redis_client
+            finally:
+                await redis_client.flush_entire_database()
+                await redis_client.close_connection()
+
+    await redis_client.connect_to_redis()
+    if unreachable_error is not None:
+        pytest.skip(f"Redis at REDIS_TEST_URL is unreachable: {unreachable_error!r}")
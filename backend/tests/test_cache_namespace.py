@@ -0,0 +1,107 @@
+import pytest
+
+from app.core.cache import (
+    CacheNamespace,
+    _namespace_versions,
+    cached,
+    invalidate_tag,
+    invalidation_bus,
+)
+
+
+@pytest.fixture
+def command_log(redis):
+    issued_commands = []
+    redis.command_observer = issued_commands.append
+    yield issued_commands
+    redis.command_observer = None
+
+
+@pytest.fixture(autouse=True)
+def empty_version_cache():
+    _namespace_versions.clear_local()
+    yield
+    _namespace_versions.clear_local()
+
+
+async def test_unversioned_namespace_is_looked_up_once(redis, command_log):
+    namespace = CacheNamespace("topics:never-invalidated")
+
+    keys = [await namespace.key(f"page:{page}") for page in range(100)]
+
+    assert keys[0] == "ns:topics:never-invalidated:v0:page:0"
+    assert command_log == ["GET"]
+
+
+async def test_invalidating_a_namespace_leaves_others_alone(redis):
+    user_one = CacheNamespace("cards:user:1")
+    user_two = CacheNamespace("cards:user:2")
+    await user_one.set("saved", ["card-a"])
+    await user_two.set("saved", ["card-b"])
+
+    assert await user_one.invalidate() == 1
+
+    assert await user_one.get("saved") is None
+    assert await user_two.get("saved") == ["card-b"]
+    assert await user_two.version() == 0
+
+
+async def test_cached_absent_version_is_dropped_on_invalidation(redis):
+    namespace = CacheNamespace("topics:list")
+    assert await namespace.version() == 0
+
+    await namespace.invalidate()
+    assert await namespace.version() == 1
+
+
+async def test_invalidation_from_another_worker_drops_the_cached_version(redis):
+    namespace = CacheNamespace("topics:category")
+    assert await namespace.version() == 0
+
+    # Another worker bumps the version and broadcasts it
+    await redis.increment(f"{CacheNamespace.VERSION_PREFIX}topics:category")
+    assert await namespace.version() == 0
+    invalidation_bus.handle_message(
+        f"other-worker|{CacheNamespace.VERSION_PREFIX}|topics:category"
+    )
+
+    assert await namespace.version() == 1
+
+
+async def test_absence_is_not_cached_while_redis_is_unavailable(redis, monkeypatch):
+    monkeypatch.setattr(redis, "is_connected", lambda: False)
+    monkeypatch.setattr(redis, "_redis_connection", None)
+    namespace = CacheNamespace("topics:offline")
+    assert await namespace.version() == 0
+
+    monkeypatch.undo()
+    await redis.increment(f"{CacheNamespace.VERSION_PREFIX}topics:offline")
+    assert await namespace.version() == 1
+
+
+async def test_tag_invalidation_drops_only_tagged_entries(redis):
+    namespace = CacheNamespace("cards:topic:7")
+    await namespace.set("page:1", [1, 2], tags=["user:1"])
+    await namespace.set("page:2", [3, 4], tags=["user:2"])
+
+    assert await invalidate_tag("user:1") == 1
+
+    assert await namespace.get("page:1") is None
+    assert await namespace.get("page:2") == [3, 4]
+
+
+async def test_cached_functions_are_invalidated_per_namespace(redis):
+    computed = []
+
+    @cached("saved:{skip}", namespace="cards:user:{user_id}")
+    async def saved_cards(user_id: int, skip: int) -> list:
+        computed.append(user_id)
+        return [user_id, skip]
+
+    await saved_cards(1, 0)
+    await saved_cards(2, 0)
+    await CacheNamespace("cards:user:1").invalidate()
+    await saved_cards(1, 0)
+    await saved_cards(2, 0)
+
+    assert computed == [1, 2, 1]
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.config.database import engine
+from app.core.cache import CacheAside, cached
+
+
+class _TrendingQuery:
+    """Stands in for a slow service query and counts how often it runs"""
+
+    def __init__(self, query_seconds: float = 0.1):
+        self.query_seconds = query_seconds
+        self.database_queries = 0
+
+    async def __call__(self, limit: int) -> list:
+        self.database_queries += 1
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        await asyncio.sleep(self.query_seconds)
+        return [
+            {"topic_id": topic_id, "score": 100 - topic_id} for topic_id in range(limit)
+        ]
+
+
+async def test_expired_hot_key_is_recomputed_once_under_500_requests(redis):
+    trending_query = _TrendingQuery()
+    get_trending = cached("trending:{limit}", ttl_seconds=60)(trending_query)
+
+    await get_trending(10)
+    await get_trending.invalidate(10)
+
+    results = await asyncio.gather(*(get_trending(10) for _ in range(500)))
+
+    assert trending_query.database_queries == 2
+    assert all(result == results[0] for result in results)
+    assert get_trending.stats()["recomputations"] == 2
+
+
+async def test_workers_share_one_recomputation_through_the_redis_lock(redis):
+    trending_query = _TrendingQuery()
+    # Separate instances have separate in-process single-flight maps, like separate workers
+    workers = [
+        CacheAside(trending_query, "trending:{limit}", lock_poll_interval_seconds=0.01)
+        for _ in range(5)
+    ]
+
+    results = await asyncio.gather(*(workers[index % 5](10) for index in range(500)))
+
+    assert trending_query.database_queries == 1
+    assert len(results) == 500 and all(result == results[0] for result in results)
+
+
+async def test_failed_computation_is_not_cached(redis):
+    attempts = []
+
+    @cached("flaky:{key}")
+    async def flaky(key: str) -> str:
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise RuntimeError("database went away")
+        return "value"
+
+    results = await asyncio.gather(
+        *(flaky("a") for _ in range(10)), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    assert await flaky("a") == "value"
+    assert attempts == ["a", "a"]
+
+
+async def test_entries_close_to_expiry_are_refreshed_early(redis, monkeypatch):
+    trending_query = _TrendingQuery(query_seconds=0)
+    get_trending = cached("trending:{limit}", ttl_seconds=60)(trending_query)
+    await get_trending(5)
+
+    cache_key = await get_trending.cache_key(5)
+    entry = await redis.get_value(cache_key)
+    # Far from expiry a cheap value is never refreshed early
+    await get_trending(5)
+    assert trending_query.database_queries == 1
+
+    # One second left on a value that took ten to compute: refreshed before it expires
+    entry.update(expires_at=time.time() + 1, delta=10.0)
+    await redis.set_value(cache_key, entry, expiration_seconds=60)
+    monkeypatch.setattr("app.core.cache.random.random", lambda: 0.5)
+
+    await get_trending(5)
+    assert trending_query.database_queries == 2
+    assert get_trending.stats()["early_refreshes"] == 1
+
+
+async def test_waiters_take_over_when_the_computing_caller_is_cancelled(redis):
+    trending_query = _TrendingQuery(query_seconds=0.05)
+    get_trending = cached("trending:{limit}", ttl_seconds=60)(trending_query)
+
+    owner = asyncio.create_task(get_trending(10))
+    await asyncio.sleep(0.01)
+    waiters = [asyncio.create_task(get_trending(10)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+
+    owner.cancel()
+    results = await asyncio.gather(*waiters)
+
+    assert owner.cancelled()
+    assert all(result == results[0] for result in results)
+    # The first waiter recomputed; the other four shared its result
+    assert trending_query.database_queries == 2
+
+
+async def test_a_cancelled_waiter_does_not_disturb_the_others(redis):
+    trending_query = _TrendingQuery(query_seconds=0.05)
+    get_trending = cached("trending:{limit}", ttl_seconds=60)(trending_query)
+
+    callers = [asyncio.create_task(get_trending(10)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    callers[1].cancel()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert isinstance(results[1], asyncio.CancelledError)
+    assert results[0] == results[2]
+    assert trending_query.database_queries == 1
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import insert
+
+# The routes need the request/response schemas; without them there is
+# nothing to mount
+pytest.importorskip("app.schemas.card")
+
+from app.api.routes import card as card_routes
+from app.config.database import AsyncSessionLocal
+from app.core.dependencies import get_current_user, get_read_db
+from app.models import Card, SavedCard
+
+SAVED_CARD_COUNT = 7
+
+
+async def _read_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _client() -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(card_routes.router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(
+        id=1, is_active=True
+    )
+    app.dependency_overrides[get_read_db] = _read_db
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.fixture
+async def saved_cards(database):
+    saved_at = datetime(2025, 1, 1)
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Card), [{"id": "card-1", "total_views": 0}])
+        await db.execute(
+            insert(SavedCard),
+            [
+                {
+                    "user_id": 1,
+                    "card_id": "card-1",
+                    "tags": [],
+                    "saved_at": saved_at + timedelta(minutes=index),
+                }
+                for index in range(SAVED_CARD_COUNT)
+            ],
+        )
+        await db.commit()
+
+
+async def test_saved_cards_page_through_the_next_cursor_header(saved_cards):
+    pages = []
+    params = {"limit": 3}
+    async with _client() as client:
+        while True:
+            response = await client.get("/cards/saved", params=params)
+            assert response.status_code == 200
+            pages.append(response.json())
+
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if next_cursor is None:
+                break
+            params = {"limit": 3, "cursor": next_cursor}
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert (
+        len({saved_card["id"] for page in pages for saved_card in page})
+        == SAVED_CARD_COUNT
+    )
+
+
+async def test_saved_cards_reject_a_malformed_cursor(saved_cards):
+    async with _client() as client:
+        response = await client.get("/cards/saved", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
@@ -0,0 +1,91 @@
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config.database import AsyncSessionLocal, Base, engine
+from app.core.counts import TotalCount, invalidate_counts
+from app.core.db import DBOperationOptions
+from app.core.repository import Repository
+from app.models import Topic
+
+SCIENCE = DBOperationOptions(filters={"category": "science"})
+
+
+async def _create_topics(count: int, session_factory=AsyncSessionLocal) -> None:
+    async with session_factory() as db:
+        await db.execute(
+            insert(Topic),
+            [
+                {"name": f"topic {index}", "category": "science"}
+                for index in range(count)
+            ],
+        )
+        await db.commit()
+
+
+class _CountingRepository(Repository):
+    def __init__(self, model):
+        super().__init__(model)
+        self.counted_on = []
+
+    async def count(self, db, options=None):
+        self.counted_on.append(db.bind)
+        return await super().count(db, options)
+
+
+async def test_exact_count_is_cached_until_the_table_is_written(database, redis):
+    topic_repository = _CountingRepository(Topic)
+    await _create_topics(5)
+
+    async with AsyncSessionLocal() as db:
+        assert await topic_repository.count_total(db, SCIENCE) == TotalCount(5)
+        assert await topic_repository.count_total(db, SCIENCE) == TotalCount(5)
+        assert len(topic_repository.counted_on) == 1
+
+        await _create_topics(2)
+        await invalidate_counts(["topics"])
+        assert await topic_repository.count_total(db, SCIENCE) == TotalCount(7)
+
+
+async def test_skipped_count_has_no_value(database, redis):
+    async with AsyncSessionLocal() as db:
+        assert await Repository(Topic).count_total(
+            db, SCIENCE, include_total=False
+        ) == TotalCount(None)
+
+
+async def test_replica_sessions_fill_the_cache_from_the_primary(
+    database, redis, tmp_path
+):
+    topic_repository = _CountingRepository(Topic)
+    # A replica that has not caught up with the last three inserts
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    async with replica_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await _create_topics(2, lambda: AsyncSession(replica_engine))
+    await _create_topics(5)
+
+    try:
+        async with AsyncSession(replica_engine) as replica_db:
+            assert await topic_repository.count_total(
+                replica_db, SCIENCE
+            ) == TotalCount(5)
+    finally:
+        await replica_engine.dispose()
+    assert topic_repository.counted_on == [engine]
+
+
+async def test_count_racing_a_write_is_not_served_afterwards(database, redis):
+    topic_repository = _CountingRepository(Topic)
+    await _create_topics(3)
+
+    class _RacingRepository(_CountingRepository):
+        async def count(self, db, options=None):
+            total = await super().count(db, options)
+            # A write commits and invalidates while this count is in flight
+            await _create_topics(1)
+            await invalidate_counts(["topics"])
+            return total
+
+    async with AsyncSessionLocal() as db:
+        assert await _RacingRepository(Topic).count_total(db, SCIENCE) == TotalCount(3)
+        assert await topic_repository.count_total(db, SCIENCE) == TotalCount(4)
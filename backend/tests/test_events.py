@@ -0,0 +1,64 @@
+from fastapi import FastAPI
+from sqlalchemy import insert, inspect, select
+
+from app.config.database import AsyncSessionLocal, drop_tables, engine
+from app.config.redis import redis_client
+from app.core.cache import invalidation_bus
+from app.core.counters import counter_reconciler
+from app.core.events import setup_events
+from app.core.interaction_buffer import interaction_buffer
+from app.models import Card, CardInteraction
+
+
+async def _table_names() -> set:
+    async with engine.connect() as conn:
+        return set(
+            await conn.run_sync(
+                lambda sync_connection: inspect(sync_connection).get_table_names()
+            )
+        )
+
+
+async def test_startup_and_shutdown_through_the_app(database, redis):
+    app = FastAPI()
+    setup_events(app)
+    await drop_tables()
+    await redis_client.close_connection()
+
+    await app.router.startup()
+    try:
+        assert {"topics", "cards", "card_interactions"} <= await _table_names()
+        assert redis_client.is_connected()
+        assert (
+            invalidation_bus._listener_task is not None
+            and not invalidation_bus._listener_task.done()
+        )
+        assert interaction_buffer._flush_task is not None
+        assert counter_reconciler._reconcile_task is not None
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                insert(Card),
+                [{"id": "card-1", "total_views": 0, "total_time_spent": 0}],
+            )
+            await db.commit()
+            await interaction_buffer.record(
+                db,
+                {
+                    "id": 1,
+                    "user_id": 1,
+                    "card_id": "card-1",
+                    "session_id": "session-1",
+                    "time_spent_seconds": 1.0,
+                },
+            )
+    finally:
+        await app.router.shutdown()
+
+    # Shutdown stops the background tasks and writes out what was still buffered
+    assert invalidation_bus._listener_task is None
+    assert interaction_buffer._flush_task is None
+    assert counter_reconciler._reconcile_task is None
+    assert not redis_client.is_connected()
+    async with AsyncSessionLocal() as db:
+        assert list((await db.scalars(select(CardInteraction.id))).all()) == [1]
@@ -0,0 +1,83 @@
+import os
+import zlib
+
+from sqlalchemy import insert
+
+from app.config.database import AsyncSessionLocal
+from app.core.db import DBOperationOptions
+from app.core.export import gzip_chunks, ndjson_chunks, stream_in_session
+from app.core.repository import Repository
+from app.models import CardInteraction
+
+card_interaction_repository = Repository(CardInteraction)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _resident_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * _PAGE_SIZE
+
+
+async def _create_interactions(row_count: int, batch_size: int = 50_000) -> None:
+    async with AsyncSessionLocal() as db:
+        for batch_start in range(0, row_count, batch_size):
+            await db.execute(
+                insert(CardInteraction),
+                [
+                    {
+                        "user_id": 1,
+                        "card_id": f"card-{index % 500}",
+                        "session_id": f"session-{index // 100}",
+                        "time_spent_seconds": 12.5,
+                        "answer_revealed": index % 2 == 0,
+                        "action": "viewed",
+                        "confidence_rating": index % 5,
+                    }
+                    for index in range(
+                        batch_start, min(batch_start + batch_size, row_count)
+                    )
+                ],
+            )
+        await db.commit()
+
+
+async def test_export_opens_its_own_session_when_the_body_starts(database):
+    await _create_interactions(2_500)
+    options = DBOperationOptions(filters={"user_id": 1}, batch_size=1_000)
+    opened_sessions = []
+
+    def session_factory():
+        opened_sessions.append(AsyncSessionLocal())
+        return opened_sessions[-1]
+
+    batches = stream_in_session(session_factory, card_interaction_repository, options)
+    assert opened_sessions == []
+
+    body = b"".join([chunk async for chunk in ndjson_chunks(batches)])
+
+    assert body.count(b"\n") == 2_500
+    assert len(opened_sessions) == 1
+
+
+async def test_million_row_export_keeps_memory_flat(database):
+    row_count = 1_000_000
+    await _create_interactions(row_count)
+    options = DBOperationOptions(filters={"user_id": 1}, batch_size=1_000)
+
+    baseline_bytes = _resident_bytes()
+    peak_bytes = baseline_bytes
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    exported_rows = 0
+    compressed_bytes = 0
+
+    batches = stream_in_session(AsyncSessionLocal, card_interaction_repository, options)
+    async for chunk in gzip_chunks(ndjson_chunks(batches)):
+        compressed_bytes += len(chunk)
+        exported_rows += decompressor.decompress(chunk).count(b"\n")
+        peak_bytes = max(peak_bytes, _resident_bytes())
+
+    assert exported_rows == row_count
+    # The NDJSON body is well over 100 MB; only a few batches are ever held at once
+    assert peak_bytes - baseline_bytes < 64 * 1024 * 1024
+    assert compressed_bytes < 32 * 1024 * 1024
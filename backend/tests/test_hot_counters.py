@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.config.database import AsyncSessionLocal
+from app.config.redis import redis_client
+from app.core.counters import TAKE_COUNTERS_LUA_SCRIPT, HotCounters
+from app.models import Card
+
+VIEW = {"total_views": 1, "total_time_spent": 0.5}
+
+
+@pytest.fixture
+async def card_counters(database, redis):
+    async with AsyncSessionLocal() as db:
+        db.add_all(
+            [
+                Card(id="card-1", total_views=0, total_time_spent=0),
+                Card(id="card-2", total_views=0, total_time_spent=0),
+            ]
+        )
+        await db.commit()
+    return HotCounters(Card, ("total_views", "total_time_spent"))
+
+
+async def _stored(card_id: str) -> tuple:
+    async with AsyncSessionLocal() as db:
+        card = (await db.execute(select(Card).where(Card.id == card_id))).scalar_one()
+        return card.total_views, card.total_time_spent
+
+
+async def test_deltas_in_flight_stay_visible_until_committed(
+    card_counters, monkeypatch
+):
+    await card_counters.increment({"card-1": VIEW, "card-2": VIEW})
+    apply_started = asyncio.Event()
+    finish_apply = asyncio.Event()
+    original_apply = card_counters.apply
+
+    async def slow_apply(db, deltas):
+        apply_started.set()
+        await finish_apply.wait()
+        await original_apply(db, deltas)
+
+    monkeypatch.setattr(card_counters, "apply", slow_apply)
+    reconcile_task = asyncio.create_task(card_counters.reconcile())
+    await apply_started.wait()
+
+    # Taken from the counter hashes but not committed: still pending, and
+    # new increments add to it
+    await card_counters.increment({"card-1": VIEW})
+    assert await card_counters.pending(["card-1", "card-2"]) == {
+        "card-1": {"total_views": 2, "total_time_spent": 1.0},
+        "card-2": {"total_views": 1, "total_time_spent": 0.5},
+    }
+    assert await _stored("card-1") == (0, 0)
+
+    finish_apply.set()
+    assert await reconcile_task == 2
+    assert await _stored("card-1") == (1, 0.5)
+    assert await card_counters.pending(["card-1", "card-2"]) == {
+        "card-1": {"total_views": 1, "total_time_spent": 0.5}
+    }
+
+
+async def test_failed_commit_puts_the_deltas_back(card_counters, monkeypatch):
+    await card_counters.increment({"card-1": VIEW})
+
+    async def failing_apply(db, deltas):
+        raise RuntimeError("database went away")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(card_counters, "apply", failing_apply)
+        assert await card_counters.reconcile() == 0
+
+    assert await card_counters.pending(["card-1"]) == {
+        "card-1": {"total_views": 1, "total_time_spent": 0.5}
+    }
+    assert await card_counters.reconcile() == 1
+    assert await _stored("card-1") == (1, 0.5)
+
+
+async def test_batch_abandoned_by_a_crashed_worker_is_restored(
+    card_counters, monkeypatch
+):
+    await card_counters.increment({"card-1": VIEW})
+    # A worker takes a batch and dies before committing it
+    await redis_client.run_script(
+        TAKE_COUNTERS_LUA_SCRIPT,
+        keys=[
+            card_counters._dirty_set_key,
+            card_counters._batches_key,
+            card_counters._batch_members_key("dead"),
+        ],
+        args=[
+            10,
+            redis_client.key(""),
+            redis_client.key(card_counters._processing_key_prefix),
+            len(card_counters._counter_key("")),
+            "dead",
+            time.time(),
+        ],
+    )
+    assert await card_counters.pending(["card-1"]) == {
+        "card-1": {"total_views": 1, "total_time_spent": 0.5}
+    }
+    # Its rows are not taken again while the batch may still be in flight
+    assert await card_counters.reconcile() == 0
+
+    monkeypatch.setattr(settings, "COUNTER_PROCESSING_TIMEOUT", 0)
+    assert await card_counters.reconcile() == 1
+    assert await _stored("card-1") == (1, 0.5)
+    assert card_counters.stats()["restored_batches"] == 1
+
+
+async def test_no_increment_is_lost_under_1000_concurrent_writers(card_counters):
+    writers_done = asyncio.Event()
+
+    async def writer(index: int):
+        await asyncio.sleep(index % 10 * 0.001)
+        assert await card_counters.increment({f"card-{index % 2 + 1}": VIEW})
+
+    async def reconcile_continuously():
+        while not writers_done.is_set():
+            await card_counters.reconcile(batch_size=1)
+            await asyncio.sleep(0)
+
+    reconciler = asyncio.create_task(reconcile_continuously())
+    await asyncio.gather(*(writer(index) for index in range(1000)))
+    writers_done.set()
+    await reconciler
+    await card_counters.reconcile()
+
+    assert await _stored("card-1") == (500, 250.0)
+    assert await _stored("card-2") == (500, 250.0)
+    assert await card_counters.pending(["card-1", "card-2"]) == {}
+    assert card_counters.stats()["reconciled_rows"] >= 2
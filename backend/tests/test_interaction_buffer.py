@@ -0,0 +1,243 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app.config.database import AsyncSessionLocal
+from app.core import interaction_buffer as interaction_buffer_module
+from app.core.interaction_buffer import InteractionBuffer
+from app.models import Card, CardInteraction
+
+
+def _interaction(interaction_id: int, card_id: str = "card-1") -> dict:
+    return {
+        "id": interaction_id,
+        "user_id": 1,
+        "card_id": card_id,
+        "session_id": "session-1",
+        "time_spent_seconds": 2.0,
+        "action": "view",
+    }
+
+
+async def _stored_ids() -> list:
+    async with AsyncSessionLocal() as db:
+        return list(
+            (
+                await db.scalars(
+                    select(CardInteraction.id).order_by(CardInteraction.id)
+                )
+            ).all()
+        )
+
+
+@pytest.fixture
+async def cards(database, redis):
+    async with AsyncSessionLocal() as db:
+        db.add_all(
+            [
+                Card(id=card_id, total_views=0, total_time_spent=0)
+                for card_id in ("card-1", "flaky")
+            ]
+        )
+        await db.commit()
+
+
+@pytest.fixture
+def flaky_card(monkeypatch):
+    """Single-row writes for the "flaky" card fail as if the database were unreachable"""
+    original_write = interaction_buffer_module.write_interactions
+    database_down = {"flaky": True}
+
+    async def write_interactions(db, entries):
+        if (
+            database_down["flaky"]
+            and len(entries) == 1
+            and entries[0]["card_id"] == "flaky"
+        ):
+            raise OperationalError("INSERT", {}, Exception("database is unreachable"))
+        await original_write(db, entries)
+
+    monkeypatch.setattr(
+        interaction_buffer_module, "write_interactions", write_interactions
+    )
+    return database_down
+
+
+async def test_sync_mode_writes_in_the_request(cards):
+    buffer = InteractionBuffer(durability="sync")
+    await buffer.start()
+
+    async with AsyncSessionLocal() as db:
+        await buffer.record(db, _interaction(1))
+
+    assert await _stored_ids() == [1]
+    assert buffer.stats()["sync_writes"] == 1
+
+
+async def test_memory_mode_buffers_until_flushed(cards):
+    buffer = InteractionBuffer(
+        durability="memory", flush_interval_seconds=60, batch_size=100
+    )
+    await buffer.start()
+    try:
+        async with AsyncSessionLocal() as db:
+            for interaction_id in range(1, 6):
+                await buffer.record(db, _interaction(interaction_id))
+        assert await _stored_ids() == []
+        assert buffer.stats()["queued"] == 5
+
+        assert await buffer.flush() == 5
+        assert await _stored_ids() == [1, 2, 3, 4, 5]
+    finally:
+        await buffer.stop()
+
+
+async def test_a_full_batch_is_flushed_before_the_interval(cards):
+    buffer = InteractionBuffer(
+        durability="memory", flush_interval_seconds=60, batch_size=3
+    )
+    await buffer.start()
+    try:
+        async with AsyncSessionLocal() as db:
+            for interaction_id in range(1, 4):
+                await buffer.record(db, _interaction(interaction_id))
+
+        for _ in range(100):
+            if buffer.stats()["written"] == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert await _stored_ids() == [1, 2, 3]
+    finally:
+        await buffer.stop()
+
+
+async def test_stop_writes_out_the_buffer(cards):
+    buffer = InteractionBuffer(
+        durability="memory", flush_interval_seconds=60, batch_size=2
+    )
+    await buffer.start()
+    buffer._buffered_entries.extend(
+        {**_interaction(interaction_id), "recorded_at": time.time()}
+        for interaction_id in range(1, 6)
+    )
+
+    await buffer.stop()
+
+    assert await _stored_ids() == [1, 2, 3, 4, 5]
+    assert buffer.stats()["queued"] == 0
+
+
+async def test_memory_mode_requeues_only_the_rows_that_failed(cards, flaky_card):
+    buffer = InteractionBuffer(
+        durability="memory", flush_interval_seconds=60, batch_size=10
+    )
+    # Interaction 1 already exists, so the batch is rejected and written row by row
+    async with AsyncSessionLocal() as db:
+        await InteractionBuffer(durability="sync").record(db, _interaction(1))
+    buffer._buffered_entries.extend(
+        {**_interaction(interaction_id, card_id), "recorded_at": time.time()}
+        for interaction_id, card_id in (
+            (2, "card-1"),
+            (1, "card-1"),
+            (3, "flaky"),
+            (4, "card-1"),
+        )
+    )
+
+    assert await buffer.flush() == 3
+    assert await _stored_ids() == [1, 2, 4]
+    assert [entry["id"] for entry in buffer._buffered_entries] == [3]
+    assert buffer.stats()["rejected"] == 1
+
+    flaky_card["flaky"] = False
+    assert await buffer.flush() == 1
+    assert await _stored_ids() == [1, 2, 3, 4]
+    assert buffer.stats()["queued"] == 0
+
+    # Each committed row counted once towards its card
+    await interaction_buffer_module.card_counters.reconcile()
+    async with AsyncSessionLocal() as db:
+        views = dict((await db.execute(select(Card.id, Card.total_views))).all())
+    assert views == {"card-1": 3, "flaky": 1}
+
+
+async def test_redis_mode_reads_back_through_the_stream(cards):
+    buffer = InteractionBuffer(
+        durability="redis",
+        flush_interval_seconds=60,
+        batch_size=2,
+        claim_idle_seconds=0,
+    )
+    await buffer.start()
+    try:
+        async with AsyncSessionLocal() as db:
+            for interaction_id in range(1, 6):
+                await buffer.record(db, _interaction(interaction_id))
+        assert await _stored_ids() == []
+
+        assert await buffer.flush() == 5
+        assert await _stored_ids() == [1, 2, 3, 4, 5]
+    finally:
+        await buffer.stop()
+
+
+async def test_redis_mode_leaves_only_failed_rows_pending(cards, redis, flaky_card):
+    buffer = InteractionBuffer(
+        durability="redis",
+        flush_interval_seconds=60,
+        batch_size=10,
+        claim_idle_seconds=0,
+    )
+    await buffer.start()
+    try:
+        async with AsyncSessionLocal() as db:
+            await InteractionBuffer(durability="sync").record(db, _interaction(1))
+            for interaction_id, card_id in (
+                (2, "card-1"),
+                (1, "card-1"),
+                (3, "flaky"),
+                (4, "card-1"),
+            ):
+                await buffer.record(db, _interaction(interaction_id, card_id))
+
+        assert await buffer.flush() == 3
+        assert await _stored_ids() == [1, 2, 4]
+
+        flaky_card["flaky"] = False
+        assert await buffer.flush() == 1
+        assert await _stored_ids() == [1, 2, 3, 4]
+        assert await buffer.flush() == 0
+    finally:
+        await buffer.stop()
+
+
+async def test_buffered_ingestion_outpaces_synchronous_writes(cards):
+    interaction_count = 300
+
+    sync_buffer = InteractionBuffer(durability="sync")
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for interaction_id in range(1, interaction_count + 1):
+            await sync_buffer.record(db, _interaction(interaction_id))
+    sync_seconds = time.perf_counter() - started
+
+    buffer = InteractionBuffer(
+        durability="memory", flush_interval_seconds=60, batch_size=1000
+    )
+    await buffer.start()
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for interaction_id in range(interaction_count + 1, 2 * interaction_count + 1):
+            await buffer.record(db, _interaction(interaction_id))
+    await buffer.stop()
+    buffered_seconds = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as db:
+        assert (
+            await db.scalar(select(func.count()).select_from(CardInteraction))
+            == 2 * interaction_count
+        )
+    assert buffered_seconds * 10 < sync_seconds
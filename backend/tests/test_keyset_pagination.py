@@ -0,0 +1,132 @@
+import time
+
+import pytest
+from sqlalchemy import insert
+
+from app.config.database import AsyncSessionLocal
+from app.core.db import DBOperationOptions, SortOrder, encode_cursor
+from app.core.exceptions import ValidationError
+from app.core.repository import Repository
+from app.models import Topic
+
+TOPIC_KEYSET = ("name", "id")
+
+topic_repository = Repository(Topic)
+
+
+async def _create_topics(topic_rows) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Topic), list(topic_rows))
+        await db.commit()
+
+
+async def _walk(options: DBOperationOptions) -> list:
+    pages = []
+    cursor = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            topics, cursor = await topic_repository.list_keyset(
+                db, TOPIC_KEYSET, options, cursor
+            )
+            pages.append([topic.id for topic in topics])
+            if cursor is None:
+                return pages
+
+
+@pytest.fixture
+async def topics(database):
+    # Two topics per name, plus a few without one
+    await _create_topics(
+        {
+            "name": None if index % 10 == 0 else f"topic {index // 2:03d}",
+            "category": "science" if index % 3 else "art",
+        }
+        for index in range(95)
+    )
+
+
+@pytest.mark.parametrize("sort_order", [SortOrder.ASC, SortOrder.DESC])
+async def test_cursor_pages_cover_every_row_once_including_null_keys(
+    topics, sort_order
+):
+    pages = await _walk(DBOperationOptions(limit=7, sort_order=sort_order))
+
+    async with AsyncSessionLocal() as db:
+        all_topics = await topic_repository.list(db, DBOperationOptions())
+    expected = sorted(
+        all_topics,
+        key=lambda topic: (topic.name is None, topic.name or "", topic.id),
+        reverse=sort_order == SortOrder.DESC,
+    )
+    assert [topic_id for page in pages for topic_id in page] == [
+        topic.id for topic in expected
+    ]
+    assert all(len(page) == 7 for page in pages[:-1])
+
+
+async def test_offset_pages_share_the_cursor_order_and_filters(topics):
+    options = DBOperationOptions(limit=10, filters={"category": "science"})
+    cursor_pages = await _walk(options)
+
+    async with AsyncSessionLocal() as db:
+        offset_page, next_cursor = await topic_repository.list_keyset(
+            db, TOPIC_KEYSET, options.model_copy(update={"skip": 20})
+        )
+        following_page, _ = await topic_repository.list_keyset(
+            db, TOPIC_KEYSET, options, next_cursor
+        )
+        # skip is ignored once a cursor is given
+        resumed_page, _ = await topic_repository.list_keyset(
+            db, TOPIC_KEYSET, options.model_copy(update={"skip": 50}), next_cursor
+        )
+
+    assert [topic.id for topic in offset_page] == cursor_pages[2]
+    assert [topic.id for topic in following_page] == cursor_pages[3]
+    assert [topic.id for topic in resumed_page] == cursor_pages[3]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        encode_cursor([42, 1]),
+        encode_cursor(["topic", "1"]),
+        encode_cursor(["topic", True]),
+        encode_cursor(["topic", None]),
+        encode_cursor(["topic"]),
+        "not-a-cursor",
+    ],
+)
+async def test_malformed_cursors_are_rejected_before_querying(database, cursor):
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(ValidationError):
+            await topic_repository.list_keyset(
+                db, TOPIC_KEYSET, DBOperationOptions(limit=5), cursor
+            )
+
+
+async def test_deep_cursor_page_is_cheaper_than_the_same_offset_page(database):
+    row_count = 50_000
+    await _create_topics(
+        {"name": f"topic {index:06d}", "category": "science"}
+        for index in range(row_count)
+    )
+    options = DBOperationOptions(limit=20)
+    deep_cursor = encode_cursor([f"topic {row_count - 101:06d}", row_count - 100])
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        for _ in range(5):
+            offset_page, _ = await topic_repository.list_keyset(
+                db, TOPIC_KEYSET, options.model_copy(update={"skip": row_count - 100})
+            )
+        offset_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(5):
+            cursor_page, _ = await topic_repository.list_keyset(
+                db, TOPIC_KEYSET, options, deep_cursor
+            )
+        cursor_seconds = time.perf_counter() - started
+
+    assert [topic.id for topic in cursor_page] == [topic.id for topic in offset_page]
+    assert cursor_seconds < offset_seconds
@@ -0,0 +1,79 @@
+import io
+import itertools
+import random
+
+from loguru import logger
+
+from app.config.logging import AccessLogSampler, BatchedLogSink
+
+
+class _FailingStream(io.StringIO):
+    def write(self, text):
+        raise OSError("stream closed")
+
+
+def test_records_are_written_in_batches_and_flushed_on_stop():
+    stream = io.StringIO()
+    sink = BatchedLogSink(
+        stream=stream, max_queue_size=100, batch_size=3, flush_interval_seconds=0.01
+    )
+    # Queued before the writer starts, so they are taken in full batches
+    for record_number in range(7):
+        sink(f"record {record_number}\n")
+
+    sink.start()
+    sink.stop()
+
+    assert stream.getvalue() == "".join(
+        f"record {record_number}\n" for record_number in range(7)
+    )
+    assert sink.stats() == {"queued": 0, "written": 7, "dropped": 0, "batches": 3}
+
+
+def test_records_beyond_the_queue_are_dropped_and_counted():
+    sink = BatchedLogSink(stream=io.StringIO(), max_queue_size=2)
+
+    for record_number in range(5):
+        sink(f"record {record_number}\n")
+
+    assert sink.stats()["queued"] == 2
+    assert sink.stats()["dropped"] == 3
+
+
+def test_failed_writes_count_as_dropped():
+    sink = BatchedLogSink(stream=_FailingStream(), max_queue_size=10, batch_size=10)
+    sink("lost\n")
+
+    sink.start()
+    sink.stop()
+
+    assert sink.stats()["written"] == 0
+    assert sink.stats()["dropped"] == 1
+
+
+def test_stop_unregisters_the_sink():
+    stream = io.StringIO()
+    sink = BatchedLogSink(
+        stream=stream, max_queue_size=100, flush_interval_seconds=0.01
+    )
+    sink.attach(format="{message}", level="INFO")
+
+    logger.info("before stop")
+    sink.stop()
+    logger.info("after stop")
+
+    assert stream.getvalue() == "before stop\n"
+    assert sink.stats()["queued"] == 0
+
+
+def test_sampler_keeps_configured_share_per_status_class(monkeypatch):
+    monkeypatch.setattr(random, "random", itertools.cycle([0.2, 0.7]).__next__)
+    sampler = AccessLogSampler({"2xx": 0.5, "3xx": 0.0})
+
+    kept_success = sum(sampler.should_log(200) for _ in range(100))
+
+    assert kept_success == 50
+    assert not sampler.should_log(304)
+    # Classes without a rate are always kept
+    assert all(sampler.should_log(status_code) for status_code in (404, 500, 503))
+    assert sampler.sampled_out == 51
@@ -0,0 +1,69 @@
+from app.config.memory_redis import MemoryKeyspace
+from app.config.redis import redis_client
+
+
+def test_memory_cap_evicts_least_recently_used_cache_keys():
+    keyspace = MemoryKeyspace(max_memory_bytes=4096)
+
+    for index in range(200):
+        keyspace.set(f"cache:{index}", b"x" * 64, ex=60)
+        keyspace.get("cache:0")
+
+    assert keyspace.evictions > 0
+    assert keyspace.memory_used <= 4096
+    assert keyspace.get("cache:0") is not None
+    assert keyspace.get("cache:1") is None
+    assert keyspace.get("cache:199") is not None
+
+
+def test_memory_cap_keeps_streams_counters_and_leaderboards():
+    keyspace = MemoryKeyspace(
+        max_memory_bytes=4096, no_evict_prefixes=("stream:", "counters:", "trending:")
+    )
+    keyspace.xadd("stream:card_interactions", {"card_id": "1"})
+    keyspace.hincrby("counters:cards:1", "total_views", 5)
+    keyspace.sadd("counters:cards:dirty", "1")
+    keyspace.zadd("trending:all", {"7": 3.0})
+    keyspace.expire("trending:all", 60)
+    keyspace.set("session:1", b"no ttl")
+
+    for index in range(500):
+        keyspace.set(f"cache:{index}", b"x" * 64, ex=60)
+
+    assert keyspace.evictions > 0
+    assert keyspace.xlen("stream:card_interactions") == 1
+    assert keyspace.hget("counters:cards:1", "total_views") == b"5"
+    assert keyspace.smembers("counters:cards:dirty") == {b"1"}
+    assert keyspace.zscore("trending:all", "7") == 3.0
+    assert keyspace.get("session:1") == b"no ttl"
+
+
+def test_cap_is_exceeded_rather_than_dropping_keys_without_ttl():
+    keyspace = MemoryKeyspace(max_memory_bytes=1024)
+
+    for index in range(100):
+        keyspace.hincrby(f"counters:topics:{index}", "views", 1)
+
+    assert keyspace.evictions == 0
+    assert keyspace.dbsize() == 100
+    assert keyspace.memory_used > 1024
+
+
+def test_persisting_a_key_makes_it_unevictable():
+    keyspace = MemoryKeyspace(max_memory_bytes=2048)
+    keyspace.set("cache:kept", b"x" * 64, ex=60)
+    keyspace.set("cache:kept", b"y" * 64)
+
+    for index in range(100):
+        keyspace.set(f"cache:{index}", b"x" * 64, ex=60)
+
+    assert keyspace.get("cache:kept") == b"y" * 64
+
+
+async def test_reconnecting_keeps_the_in_memory_state(redis):
+    await redis.set_value("card:1", {"title": "Kept"})
+
+    await redis_client.close_connection()
+    await redis_client.connect_to_redis()
+
+    assert await redis.get_value("card:1") == {"title": "Kept"}
@@ -0,0 +1,146 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.config.database import engine
+from app.core.metrics import (
+    Histogram,
+    MetricsMiddleware,
+    db_queries_total,
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    instrument_engine,
+    metrics_access_allowed,
+    metrics_registry,
+)
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_NETWORKS", ["10.1.0.0/16"])
+    return "scrape-secret"
+
+
+def test_metrics_are_open_to_allowed_networks_only(metrics_token):
+    assert metrics_access_allowed("10.1.2.3", None)
+    assert not metrics_access_allowed("203.0.113.7", None)
+    assert not metrics_access_allowed(None, None)
+
+
+def test_metrics_token_admits_other_networks(metrics_token):
+    assert metrics_access_allowed("203.0.113.7", f"Bearer {metrics_token}")
+    assert not metrics_access_allowed("203.0.113.7", "Bearer wrong")
+    assert not metrics_access_allowed("203.0.113.7", metrics_token)
+
+
+def test_metrics_are_closed_without_token_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+
+    assert metrics_access_allowed("127.0.0.1", None)
+    assert not metrics_access_allowed("203.0.113.7", "Bearer ")
+
+
+async def test_failed_statements_do_not_leak_start_times():
+    instrument_engine(engine)
+
+    async with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                await connection.execute(
+                    text("SELECT * FROM table_that_does_not_exist")
+                )
+
+        queries_before = db_queries_total.value()
+        await connection.execute(text("SELECT 1"))
+        start_times = await connection.run_sync(
+            lambda sync_connection: list(
+                sync_connection.info.get("query_start_times", [])
+            )
+        )
+
+    assert start_times == []
+    assert db_queries_total.value() == queries_before + 1
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram(
+        "request_seconds", "Request latency", ("route",), buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, "/items")
+
+    assert histogram.render() == [
+        'request_seconds_bucket{route="/items",le="0.1"} 2',
+        'request_seconds_bucket{route="/items",le="1.0"} 3',
+        'request_seconds_bucket{route="/items",le="+Inf"} 4',
+        'request_seconds_sum{route="/items"} 5.65',
+        'request_seconds_count{route="/items"} 4',
+    ]
+
+
+def _duration_count(method: str, route: str, status: str) -> int:
+    series = http_request_duration_seconds._series.get((method, route, status))
+    return series[2] if series else 0
+
+
+def _instrumented_client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=MetricsMiddleware(app)),
+        base_url="http://test",
+    )
+
+
+async def test_in_flight_gauge_tracks_open_requests():
+    request_started = asyncio.Event()
+    finish_request = asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        request_started.set()
+        await finish_request.wait()
+        return {"status": "done"}
+
+    @app.get("/broken")
+    async def broken():
+        raise RuntimeError("handler failed")
+
+    in_flight_before = http_requests_in_flight.value("GET")
+    async with _instrumented_client(app) as client:
+        request_task = asyncio.create_task(client.get("/slow"))
+        await request_started.wait()
+        assert http_requests_in_flight.value("GET") == in_flight_before + 1
+
+        finish_request.set()
+        assert (await request_task).status_code == 200
+        assert http_requests_in_flight.value("GET") == in_flight_before
+
+        with pytest.raises(RuntimeError):
+            await client.get("/broken")
+        assert http_requests_in_flight.value("GET") == in_flight_before
+
+
+async def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+
+    @app.get("/cards/{card_id}")
+    async def get_card(card_id: str):
+        return {"id": card_id}
+
+    templated_before = _duration_count("GET", "/cards/{card_id}", "200")
+    unmatched_before = _duration_count("GET", "unmatched", "404")
+    async with _instrumented_client(app) as client:
+        for card_id in ("card-1", "card-2", "card-3"):
+            assert (await client.get(f"/cards/{card_id}")).status_code == 200
+        assert (await client.get("/no-such-route")).status_code == 404
+
+    assert _duration_count("GET", "/cards/{card_id}", "200") == templated_before + 3
+    assert _duration_count("GET", "unmatched", "404") == unmatched_before + 1
+    assert _duration_count("GET", "/cards/card-1", "200") == 0
+    assert 'route="/cards/{card_id}"' in metrics_registry.render()
@@ -0,0 +1,213 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.core.metrics import http_request_duration_seconds
+from app.core.middleware import (
+    RequestLoggingMiddleware,
+    SecurityHeadersMiddleware,
+    setup_middleware,
+)
+
+ITEMS = [
+    {"id": item_id, "name": f"Topic {item_id}", "category": "science"}
+    for item_id in range(50)
+]
+
+
+async def health(request):
+    return JSONResponse({"status": "healthy"})
+
+
+async def items(request):
+    return JSONResponse(ITEMS)
+
+
+def _app() -> Starlette:
+    return Starlette(routes=[Route("/health", health), Route("/items", items)])
+
+
+def _asgi_stack():
+    return RequestLoggingMiddleware(SecurityHeadersMiddleware(_app()))
+
+
+class _BaseSecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware form the ASGI middleware replaced"""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        for (
+            header_name,
+            header_value,
+        ) in SecurityHeadersMiddleware.SECURITY_HEADERS.items():
+            response.headers[header_name] = header_value
+        return response
+
+
+class _BaseProcessTimeMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+
+def _base_http_stack():
+    return _BaseProcessTimeMiddleware(_BaseSecurityHeadersMiddleware(_app()))
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+async def test_headers_are_added_and_body_is_unchanged():
+    async with _client(_asgi_stack()) as client:
+        response = await client.get("/items")
+
+    assert response.status_code == 200
+    assert response.json() == ITEMS
+    assert float(response.headers["X-Process-Time"]) >= 0
+    for header_name, header_value in SecurityHeadersMiddleware.SECURITY_HEADERS.items():
+        assert response.headers[header_name] == header_value
+
+
+async def test_streaming_bodies_are_not_buffered():
+    release_second_chunk = asyncio.Event()
+
+    async def chunks():
+        yield b"first"
+        await release_second_chunk.wait()
+        yield b"second"
+
+    async def stream(request):
+        return StreamingResponse(chunks())
+
+    sent_messages = []
+
+    async def send(message):
+        sent_messages.append(message)
+
+    request_received = asyncio.Event()
+    response_finished = asyncio.Event()
+
+    async def receive():
+        if not request_received.is_set():
+            request_received.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_finished.wait()
+        return {"type": "http.disconnect"}
+
+    app = RequestLoggingMiddleware(
+        SecurityHeadersMiddleware(Starlette(routes=[Route("/stream", stream)]))
+    )
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+        "scheme": "http",
+        "root_path": "",
+        "http_version": "1.1",
+        "asgi": {"version": "3.0"},
+    }
+    request_task = asyncio.create_task(app(scope, receive, send))
+
+    for _ in range(100):
+        if any(message.get("body") == b"first" for message in sent_messages):
+            break
+        await asyncio.sleep(0.01)
+
+    # The first chunk went out while the second one is still pending
+    assert sent_messages[0]["type"] == "http.response.start"
+    assert (b"x-frame-options", b"DENY") in sent_messages[0]["headers"]
+    assert any(message.get("body") == b"first" for message in sent_messages)
+
+    release_second_chunk.set()
+    for _ in range(100):
+        if sent_messages[-1].get("more_body") is False:
+            break
+        await asyncio.sleep(0.01)
+    response_finished.set()
+    await request_task
+    assert any(message.get("body") == b"second" for message in sent_messages)
+
+
+async def _requests_per_second(app, path: str, request_count: int = 300) -> float:
+    async with _client(app) as client:
+        for _ in range(20):
+            await client.get(path)
+
+        started = time.perf_counter()
+        for _ in range(request_count):
+            await client.get(path)
+        return request_count / (time.perf_counter() - started)
+
+
+async def test_asgi_stack_is_not_slower_than_base_http_stack():
+    for path in ("/health", "/items"):
+        asgi_throughput = max(
+            [await _requests_per_second(_asgi_stack(), path) for _ in range(3)]
+        )
+        base_http_throughput = max(
+            [await _requests_per_second(_base_http_stack(), path) for _ in range(3)]
+        )
+
+        assert asgi_throughput > base_http_throughput
+
+
+async def test_application_stack_end_to_end(redis, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 3)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    setup_middleware(app)
+    origin = "http://localhost:3000"
+
+    routed_before = http_request_duration_seconds._series.get(
+        ("GET", "/items/{item_id}", "200"), [0, 0, 0]
+    )[2]
+    async with _client(app) as client:
+        preflight = await client.options(
+            "/items/1",
+            headers={"Origin": origin, "Access-Control-Request-Method": "GET"},
+        )
+        responses = [
+            await client.get(f"/items/{item_id}", headers={"Origin": origin})
+            for item_id in range(4)
+        ]
+
+    assert preflight.status_code == 200
+    assert preflight.headers["access-control-allow-origin"] == origin
+
+    allowed_response = responses[0]
+    assert allowed_response.json() == {"id": 0}
+    assert allowed_response.headers["access-control-allow-origin"] == origin
+    assert "X-Next-Cursor" in allowed_response.headers["access-control-expose-headers"]
+    assert float(allowed_response.headers["X-Process-Time"]) >= 0
+    for header_name, header_value in SecurityHeadersMiddleware.SECURITY_HEADERS.items():
+        assert allowed_response.headers[header_name] == header_value
+
+    # The preflight and two requests use up the anonymous limit of 3
+    assert [response.status_code for response in responses] == [200, 200, 429, 429]
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+
+    routed_after = http_request_duration_seconds._series[
+        ("GET", "/items/{item_id}", "200")
+    ][2]
+    assert routed_after == routed_before + 2
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import InvalidationBus, NearCache
+
+
+async def _wait_until(condition) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not met in time")
+
+
+@pytest.fixture
+async def workers(redis):
+    """Two workers' near-caches over the same namespace, each on its own invalidation bus"""
+    buses = [InvalidationBus(), InvalidationBus()]
+    near_caches = [
+        NearCache("test:profiles:", ttl_seconds=60, bus=bus) for bus in buses
+    ]
+    for bus in buses:
+        await bus.start()
+
+    # The listener subscribes in the background: probe until the second worker hears the first
+    buses[1].add_handler("test:probe:", lambda cache_key: None)
+    while buses[1].received == 0:
+        await buses[0].publish("test:probe:", "probe")
+        await asyncio.sleep(0.01)
+
+    yield near_caches
+    for bus in buses:
+        await bus.stop()
+
+
+async def test_a_write_on_one_worker_drops_the_copy_on_another(workers):
+    writer, reader = workers
+    await writer.set("user:1", {"name": "before"})
+    assert await reader.get("user:1") == {"name": "before"}
+    assert reader.stats()["size"] == 1
+
+    await writer.set("user:1", {"name": "after"})
+    await _wait_until(lambda: reader.stats()["size"] == 0)
+
+    assert await reader.get("user:1") == {"name": "after"}
+
+
+async def test_a_delete_on_one_worker_drops_the_copy_on_another(workers):
+    writer, reader = workers
+    await writer.set("user:2", {"name": "cached"})
+    assert await reader.get("user:2") == {"name": "cached"}
+
+    await writer.delete("user:2")
+    await _wait_until(lambda: reader.stats()["size"] == 0)
+
+    assert await reader.get("user:2") is None
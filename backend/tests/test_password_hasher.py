@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.exceptions import ServiceOverloadedError
+from app.core.security import PasswordHasher, get_password_hash
+
+
+@pytest.fixture
+def hasher():
+    password_hasher = PasswordHasher(
+        executor_type="thread", max_workers=2, max_pending=4
+    )
+    yield password_hasher
+    password_hasher.shutdown()
+
+
+async def _ticker_delays(stop: asyncio.Event, interval: float = 0.005):
+    """How late each tick of a short sleep loop woke up, until stop is set"""
+    delays = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        delays.append(time.perf_counter() - started - interval)
+    return delays
+
+
+async def test_hash_and_verify_round_trip(hasher):
+    hashed_password = await hasher.hash("correct horse")
+
+    assert await hasher.verify("correct horse", hashed_password)
+    assert not await hasher.verify("wrong horse", hashed_password)
+    assert hasher.pending == 0
+
+
+async def test_hashing_does_not_stall_the_event_loop(hasher):
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker_delays(stop))
+
+    await asyncio.gather(*(hasher.hash(f"password-{index}") for index in range(4)))
+    stop.set()
+    delays = sorted(await ticker)
+
+    # An inline bcrypt call blocks for hundreds of milliseconds; off the loop
+    # other work keeps being scheduled close to on time
+    p99_delay = delays[int(len(delays) * 0.99) - 1]
+    assert len(delays) > 10
+    assert p99_delay < 0.05
+
+
+async def test_saturated_pool_rejects_immediately(hasher):
+    hashed_password = get_password_hash("secret")
+    in_flight = [
+        asyncio.create_task(hasher.verify("secret", hashed_password))
+        for _ in range(hasher.max_pending)
+    ]
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    with pytest.raises(ServiceOverloadedError):
+        await hasher.verify("secret", hashed_password)
+    assert time.perf_counter() - started < 0.01
+    assert hasher.rejected == 1
+
+    assert all(await asyncio.gather(*in_flight))
+    assert hasher.pending == 0
@@ -0,0 +1,150 @@
+import time
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.core import middleware
+from app.core.middleware import RateLimitMiddleware
+from app.core.rate_limit import InMemoryRateLimiter, RateLimiter, RateLimitPolicy
+from app.core.security import create_access_token
+
+
+def test_in_memory_limiter_allows_burst_then_rejects():
+    limiter = InMemoryRateLimiter()
+    policy = RateLimitPolicy(name="test", limit=5, period_seconds=60)
+
+    results = [limiter.hit("client", policy, now=100.0) for _ in range(6)]
+
+    assert [result.allowed for result in results] == [True] * 5 + [False]
+    assert results[-1].retry_after == pytest.approx(12.0)
+    assert limiter.hit("client", policy, now=112.0).allowed
+
+
+def test_in_memory_limiter_expires_keys_across_policy_intervals():
+    limiter = InMemoryRateLimiter(sweep_batch=100)
+    slow_policy = RateLimitPolicy(name="slow", limit=1, period_seconds=3600)
+    fast_policy = RateLimitPolicy(name="fast", limit=100, period_seconds=1)
+
+    # A long-lived key first, short-lived ones after it: expiry order is not insertion order
+    limiter.hit("slow-client", slow_policy, now=0.0)
+    for client_index in range(50):
+        limiter.hit(f"fast-client-{client_index}", fast_policy, now=0.0)
+
+    limiter.hit("trigger", fast_policy, now=10.0)
+
+    assert len(limiter) == 2
+
+
+def _seconds_per_hit(
+    limiter: InMemoryRateLimiter, policy: RateLimitPolicy, client_count: int
+) -> float:
+    now = 0.0
+    for client_index in range(client_count):
+        limiter.hit(f"ip:{client_index}", policy, now=now)
+
+    started = time.perf_counter()
+    for client_index in range(10000):
+        limiter.hit(f"ip:{client_index % client_count}", policy, now=now)
+    return (time.perf_counter() - started) / 10000
+
+
+def test_in_memory_limiter_cost_is_flat_in_client_count():
+    policy = RateLimitPolicy(name="load", limit=1000, period_seconds=60)
+
+    few_clients = min(
+        _seconds_per_hit(InMemoryRateLimiter(), policy, 100) for _ in range(3)
+    )
+    many_clients = min(
+        _seconds_per_hit(InMemoryRateLimiter(), policy, 100000) for _ in range(3)
+    )
+
+    assert many_clients < few_clients * 3
+
+
+async def test_redis_limit_is_shared_between_limiters(redis):
+    policy = RateLimitPolicy(name="shared", limit=3, period_seconds=60)
+    first_worker = RateLimiter(default_policy=policy)
+    second_worker = RateLimiter(default_policy=policy)
+
+    results = [
+        await worker.hit("ip:203.0.113.9", policy)
+        for worker in (first_worker, second_worker, first_worker, second_worker)
+    ]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+
+
+@pytest.fixture
+def decode_counter(monkeypatch):
+    decoded_tokens = []
+    verify_token = middleware.verify_token
+
+    def counting_verify_token(token, token_type="access"):
+        decoded_tokens.append(token)
+        return verify_token(token, token_type)
+
+    monkeypatch.setattr(middleware, "verify_token", counting_verify_token)
+    return decoded_tokens
+
+
+def _limited_client(calls: int) -> httpx.AsyncClient:
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = RateLimitMiddleware(
+        Starlette(routes=[Route("/items", ok)]), calls=calls, period=60
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+async def test_junk_tokens_are_throttled_before_decoding(redis, decode_counter):
+    async with _limited_client(calls=5) as client:
+        status_codes = [
+            (
+                await client.get(
+                    "/items", headers={"Authorization": f"Bearer junk-{attempt}"}
+                )
+            ).status_code
+            for attempt in range(20)
+        ]
+
+    assert status_codes.count(200) == 5
+    assert status_codes.count(429) == 15
+    assert len(decode_counter) == 5
+
+
+async def test_authenticated_requests_use_the_user_limit(redis, decode_counter):
+    token = create_access_token(subject=42)
+
+    async with _limited_client(calls=2) as client:
+        status_codes = [
+            (
+                await client.get("/items", headers={"Authorization": f"Bearer {token}"})
+            ).status_code
+            for _ in range(5)
+        ]
+
+    # Past the anonymous limit of 2, within the authenticated one
+    assert status_codes == [200] * 5
+
+
+async def test_a_new_token_is_charged_once(redis, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_AUTHENTICATED_PER_MINUTE", 3)
+    token = create_access_token(subject=43)
+
+    async with _limited_client(calls=10) as client:
+        status_codes = [
+            (
+                await client.get("/items", headers={"Authorization": f"Bearer {token}"})
+            ).status_code
+            for _ in range(5)
+        ]
+
+    # The first request is charged to the IP only, the next three to the user
+    assert status_codes == [200, 200, 200, 200, 429]
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import database as database_module
+from app.config.database import AsyncSessionLocal, Base, engine_options, get_db
+from app.config.read_your_writes import ReadYourWritesTracker, read_your_writes
+from app.core import dependencies
+from app.core.dependencies import get_read_db, read_session_factory
+from app.models import Topic
+
+
+@pytest.fixture
+async def replica(database, redis, tmp_path, monkeypatch):
+    """A second SQLite file as the read replica; it only has what a test puts there"""
+    replica_url = f"sqlite+aiosqlite:///{tmp_path}/replica.db"
+    replica_engine = create_async_engine(replica_url, **engine_options(replica_url))
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    replica_sessions = async_sessionmaker(
+        autocommit=False, autoflush=False, bind=replica_engine, class_=AsyncSession
+    )
+    monkeypatch.setattr(database_module, "read_engine", replica_engine)
+    monkeypatch.setattr(dependencies, "ReadSessionLocal", replica_sessions)
+    monkeypatch.setattr(
+        read_your_writes, "_local_deadlines", type(read_your_writes._local_deadlines)()
+    )
+    yield replica_sessions
+    await replica_engine.dispose()
+
+
+async def _topic_names(session_factory) -> list:
+    async with session_factory() as db:
+        return list((await db.scalars(select(Topic.name).order_by(Topic.id))).all())
+
+
+async def _write_topic_as(user_id: int, name: str) -> None:
+    """Commit a topic through get_db the way an authenticated write route does"""
+    db_dependency = get_db()
+    db = await anext(db_dependency)
+    db.info["writer_id"] = user_id
+    await db.execute(insert(Topic), [{"name": name}])
+    await db.commit()
+    await db_dependency.aclose()
+
+
+async def test_reads_go_to_the_replica(replica):
+    async with replica() as db:
+        await db.execute(insert(Topic), [{"name": "on the replica"}])
+        await db.commit()
+
+    assert database_module.has_read_replica()
+    assert await read_session_factory(None) is replica
+    assert await read_session_factory(1) is replica
+
+    read_db_dependency = get_read_db(credentials=None)
+    read_db = await anext(read_db_dependency)
+    assert list((await read_db.scalars(select(Topic.name))).all()) == ["on the replica"]
+    await read_db_dependency.aclose()
+
+
+async def test_a_writer_reads_from_the_primary_after_a_commit(replica):
+    await _write_topic_as(5, "just written")
+
+    # Not replicated yet: only the writer is routed to the primary
+    writer_sessions = await read_session_factory(5)
+    assert writer_sessions is AsyncSessionLocal
+    assert await _topic_names(writer_sessions) == ["just written"]
+
+    other_user_sessions = await read_session_factory(6)
+    assert other_user_sessions is replica
+    assert await _topic_names(other_user_sessions) == []
+
+
+async def test_the_write_marker_is_shared_through_redis(replica, redis, monkeypatch):
+    await _write_topic_as(7, "written on another worker")
+    assert await redis.key_exists(f"{ReadYourWritesTracker.KEY_PREFIX}7")
+
+    # A worker that did not see the commit still routes the writer to the primary
+    other_worker = ReadYourWritesTracker(window_seconds=1)
+    monkeypatch.setattr(dependencies, "read_your_writes", other_worker)
+    assert await read_session_factory(7) is AsyncSessionLocal
+    assert await read_session_factory(8) is replica
+
+    # Once the marker is gone (it expires after the window), reads go back to the replica
+    await redis.delete_key(f"{ReadYourWritesTracker.KEY_PREFIX}7")
+    assert await read_session_factory(7) is replica
+    assert other_worker.stats() == {"primary_reads": 1, "replica_reads": 2}
+
+
+async def test_local_marker_expires_after_the_window(replica, monkeypatch):
+    tracker = ReadYourWritesTracker(window_seconds=0.05)
+    monkeypatch.setattr(dependencies, "read_your_writes", tracker)
+
+    tracker.mark_write_local(9)
+    assert await read_session_factory(9) is AsyncSessionLocal
+
+    time.sleep(0.1)
+    assert await read_session_factory(9) is replica
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def command_log(redis):
+    issued_commands = []
+    redis.command_observer = issued_commands.append
+    yield issued_commands
+    redis.command_observer = None
+
+
+async def test_get_many_returns_existing_keys_only(redis):
+    await redis.set_many({"card:1": {"title": "One"}, "card:2": [1, 2, 3]})
+
+    assert await redis.get_many(["card:1", "card:2", "card:missing"]) == {
+        "card:1": {"title": "One"},
+        "card:2": [1, 2, 3],
+    }
+    assert await redis.get_many([]) == {}
+
+
+async def test_set_many_applies_per_key_ttl(redis):
+    stored = await redis.set_many(
+        {"short": 1, "long": 2, "default": 3},
+        expiration_seconds=600,
+        per_key_expiration_seconds={"short": 5, "long": 3600},
+    )
+
+    assert stored == {"short": True, "long": True, "default": True}
+    raw_client = redis.get_raw_redis_client()
+    assert await raw_client.ttl(redis.key("short")) == 5
+    assert await raw_client.ttl(redis.key("long")) == 3600
+    assert await raw_client.ttl(redis.key("default")) == 600
+
+
+async def test_set_many_reports_unencodable_values_and_stores_the_rest(redis):
+    self_referencing = []
+    self_referencing.append(self_referencing)
+    stored = await redis.set_many({"good": {"a": 1}, "bad": self_referencing})
+
+    assert stored == {"good": True, "bad": False}
+    assert await redis.get_many(["good", "bad"]) == {"good": {"a": 1}}
+
+
+async def test_get_many_skips_values_that_fail_to_decode(redis):
+    await redis.set_many({"good": "value"})
+    await redis.get_raw_redis_client().set(
+        redis.key("corrupt"), b"\xffnot a cached value"
+    )
+
+    assert await redis.get_many(["good", "corrupt"]) == {"good": "value"}
+
+
+async def test_delete_many_batches_large_key_sets(redis, command_log):
+    key_count = redis.MULTI_KEY_BATCH_SIZE * 2 + 1
+    await redis.set_many({f"item:{index}": index for index in range(key_count)})
+    command_log.clear()
+
+    deleted = await redis.delete_many(
+        [f"item:{index}" for index in range(key_count)] + ["item:missing"]
+    )
+
+    assert deleted == key_count
+    assert command_log == ["DEL", "DEL", "DEL"]
+    assert await redis.get_many([f"item:{index}" for index in range(10)]) == {}
+
+
+async def test_batch_operations_use_one_round_trip_instead_of_one_per_key(
+    redis, command_log
+):
+    page = {
+        f"card:{index}": {"id": index, "title": f"Card {index}"} for index in range(100)
+    }
+
+    started = time.perf_counter()
+    for redis_key, card in page.items():
+        await redis.set_value(redis_key, card)
+    for redis_key in page:
+        await redis.get_value(redis_key)
+    single_key_seconds = time.perf_counter() - started
+    single_key_round_trips = len(command_log)
+    command_log.clear()
+
+    started = time.perf_counter()
+    await redis.set_many(page)
+    cached_page = await redis.get_many(page)
+    batch_seconds = time.perf_counter() - started
+
+    assert cached_page == page
+    assert single_key_round_trips == 200
+    assert command_log == ["PIPELINE", "MGET"]
+    assert batch_seconds < single_key_seconds
@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.config.circuit_breaker import CircuitBreaker, CircuitState
+from app.config.memory_redis import InMemoryRedis
+from app.config.redis import RedisClient
+
+COMMAND_TIMEOUT_SECONDS = 0.05
+
+
+class FaultyRedis:
+    """Wraps the in-process Redis and injects latency or connection errors"""
+
+    def __init__(self):
+        self.backend = InMemoryRedis()
+        self.fault = None
+        self.calls = 0
+
+    def __getattr__(self, command_name):
+        backend_command = getattr(self.backend, command_name)
+
+        async def command(*args, **kwargs):
+            self.calls += 1
+            if self.fault == "down":
+                raise RedisConnectionError("Connection refused")
+            if self.fault == "slow":
+                await asyncio.sleep(5)
+            return await backend_command(*args, **kwargs)
+
+        return command
+
+
+@pytest.fixture
+async def faulty_client():
+    client = RedisClient(
+        command_timeout_seconds=COMMAND_TIMEOUT_SECONDS,
+        circuit_breaker=CircuitBreaker(
+            "redis-test",
+            failure_threshold=3,
+            reset_timeout_seconds=0.05,
+            max_reset_timeout_seconds=0.2,
+        ),
+    )
+    faulty_redis = FaultyRedis()
+    client._redis_connection = faulty_redis
+    yield client, faulty_redis
+    await client.close_connection()
+
+
+async def _timed_reads(client, count: int) -> float:
+    started = time.perf_counter()
+    for index in range(count):
+        assert await client.get_value(f"card:{index}") is None
+    return time.perf_counter() - started
+
+
+@pytest.mark.parametrize("fault", ["slow", "down"])
+async def test_outage_adds_bounded_latency(faulty_client, fault):
+    client, faulty_redis = faulty_client
+    faulty_redis.fault = fault
+
+    outage_seconds = await _timed_reads(client, 100)
+
+    # Only the calls before the breaker trips wait, and at most the command timeout each
+    assert outage_seconds < 3 * COMMAND_TIMEOUT_SECONDS + 0.1
+    assert client.circuit_breaker.state != CircuitState.CLOSED
+    assert faulty_redis.calls == 3
+    assert client.circuit_breaker.stats()["rejected_calls"] == 97
+
+
+async def test_breaker_closes_once_the_health_probe_succeeds(faulty_client):
+    client, faulty_redis = faulty_client
+    await client.set_value("card:1", {"title": "Cached"})
+    faulty_redis.fault = "down"
+    await _timed_reads(client, 5)
+    assert not client.is_connected()
+
+    faulty_redis.fault = None
+    for _ in range(50):
+        if client.is_connected():
+            break
+        await asyncio.sleep(0.02)
+
+    assert client.is_connected()
+    assert await client.get_value("card:1") == {"title": "Cached"}
+
+
+async def test_failed_probes_back_off(faulty_client):
+    client, faulty_redis = faulty_client
+    faulty_redis.fault = "down"
+    await _timed_reads(client, 3)
+
+    await asyncio.sleep(0.4)
+
+    assert not client.is_connected()
+    assert client.circuit_breaker.retry_delay_seconds == 0.2
+
+
+async def test_startup_without_redis_reconnects_in_the_background(monkeypatch):
+    client = RedisClient(
+        command_timeout_seconds=COMMAND_TIMEOUT_SECONDS,
+        circuit_breaker=CircuitBreaker("redis-test", reset_timeout_seconds=0.05),
+    )
+    connection_attempts = []
+
+    async def open_connection():
+        connection_attempts.append(time.perf_counter())
+        if len(connection_attempts) < 3:
+            raise RedisConnectionError("Connection refused")
+        client._redis_connection = InMemoryRedis()
+
+    monkeypatch.setattr(client, "_open_connection", open_connection)
+
+    started = time.perf_counter()
+    await client.connect_to_redis()
+    assert time.perf_counter() - started < 0.05
+    assert await client.get_value("anything") is None
+
+    for _ in range(50):
+        if client.is_connected():
+            break
+        await asyncio.sleep(0.02)
+
+    assert client.is_connected()
+    assert len(connection_attempts) == 3
+    assert await client.set_value("anything", 1)
+    await client.close_connection()
+
+
+async def test_close_connection_releases_the_client(faulty_client):
+    client, faulty_redis = faulty_client
+
+    await client.close_connection()
+
+    assert client.get_raw_redis_client() is None
+    assert not client.is_connected()
+    assert await client.get_value("card:1") is None
@@ -0,0 +1,174 @@
+"""
+The Lua scripts on a real Redis server.
+
+Everywhere else the suite runs on the in-process backend, which executes
+Python stand-ins for the scripts; these tests run the scripts themselves.
+Set REDIS_TEST_URL (e.g. redis://localhost:6379/15) to run them.
+"""
+
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.config.database import AsyncSessionLocal
+from app.core.cache import NearCache
+from app.core.counters import TAKE_COUNTERS_LUA_SCRIPT, HotCounters
+from app.core.rate_limit import RateLimiter, RateLimitPolicy
+from app.models import Card
+
+pytestmark = pytest.mark.real_redis
+
+VIEW = {"total_views": 1, "total_time_spent": 0.5}
+
+
+@pytest.fixture
+async def card_counters(database, real_redis):
+    async with AsyncSessionLocal() as db:
+        db.add_all(
+            [
+                Card(id=card_id, total_views=0, total_time_spent=0)
+                for card_id in ("card-1", "card-2")
+            ]
+        )
+        await db.commit()
+    return HotCounters(Card, ("total_views", "total_time_spent"))
+
+
+async def _stored(card_id: str) -> tuple:
+    async with AsyncSessionLocal() as db:
+        card = (await db.execute(select(Card).where(Card.id == card_id))).scalar_one()
+        return card.total_views, card.total_time_spent
+
+
+async def _take_batch(
+    card_counters: HotCounters, redis_client, batch_token: str
+) -> list:
+    return await redis_client.run_script(
+        TAKE_COUNTERS_LUA_SCRIPT,
+        keys=[
+            card_counters._dirty_set_key,
+            card_counters._batches_key,
+            card_counters._batch_members_key(batch_token),
+        ],
+        args=[
+            10,
+            redis_client.key(""),
+            redis_client.key(card_counters._processing_key_prefix),
+            len(card_counters._counter_key("")),
+            batch_token,
+            time.time(),
+        ],
+    )
+
+
+async def test_counters_are_taken_and_finished(card_counters, real_redis):
+    await card_counters.increment({"card-1": VIEW, "card-2": VIEW})
+    await card_counters.increment({"card-1": VIEW})
+
+    assert await card_counters.reconcile() == 2
+
+    assert await _stored("card-1") == (2, 1.0)
+    assert await _stored("card-2") == (1, 0.5)
+    assert await card_counters.pending(["card-1", "card-2"]) == {}
+    assert not await real_redis.key_exists(card_counters._batches_key)
+
+
+async def test_take_skips_rows_whose_batch_is_still_processing(
+    card_counters, real_redis
+):
+    await card_counters.increment({"card-1": VIEW})
+    popped_count, taken = await _take_batch(card_counters, real_redis, "first")
+    assert popped_count == 1
+    assert [(row_id, sorted(field_values[::2])) for row_id, field_values in taken] == [
+        (b"card-1", [b"total_time_spent", b"total_views"])
+    ]
+
+    await card_counters.increment({"card-1": VIEW})
+    # Busy rows go back into the dirty set instead of being taken twice
+    assert await _take_batch(card_counters, real_redis, "second") == [1, []]
+    assert await _take_batch(card_counters, real_redis, "third") == [1, []]
+
+
+async def test_failed_commit_restores_the_deltas(card_counters, monkeypatch):
+    await card_counters.increment(
+        {"card-1": {"total_views": 3, "total_time_spent": 1.25}}
+    )
+
+    async def failing_apply(db, deltas):
+        raise RuntimeError("database went away")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(card_counters, "apply", failing_apply)
+        assert await card_counters.reconcile() == 0
+
+    # Restored with HINCRBY/HINCRBYFLOAT on top of what arrived meanwhile
+    await card_counters.increment({"card-1": VIEW})
+    assert await card_counters.pending(["card-1"]) == {
+        "card-1": {"total_views": 4, "total_time_spent": 1.75}
+    }
+    assert await card_counters.reconcile() == 1
+    assert await _stored("card-1") == (4, 1.75)
+
+
+async def test_abandoned_batch_is_restored_after_the_timeout(
+    card_counters, real_redis, monkeypatch
+):
+    await card_counters.increment({"card-1": VIEW})
+    await _take_batch(card_counters, real_redis, "dead")
+    assert await card_counters.reconcile() == 0
+
+    monkeypatch.setattr(settings, "COUNTER_PROCESSING_TIMEOUT", 0)
+    assert await card_counters.reconcile() == 1
+    assert await _stored("card-1") == (1, 0.5)
+    assert card_counters.stats()["restored_batches"] == 1
+
+
+async def test_gcra_allows_the_burst_then_reports_retry_after(real_redis):
+    policy = RateLimitPolicy(name="scripted", limit=3, period_seconds=60)
+    first_worker = RateLimiter(default_policy=policy)
+    second_worker = RateLimiter(default_policy=policy)
+
+    results = [
+        await worker.hit("ip:203.0.113.10", policy)
+        for worker in (first_worker, second_worker, first_worker, second_worker)
+    ]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    # One emission interval (20 seconds) until the next request fits
+    assert 19 < results[-1].retry_after <= 20
+    assert RateLimiter.retry_after_header(results[-1]) == "20"
+    assert (await first_worker.hit("ip:203.0.113.11", policy)).allowed
+
+
+async def test_fill_is_rejected_after_a_concurrent_delete(real_redis):
+    near_cache = NearCache("scripted:", ttl_seconds=60)
+    fill_token = await near_cache.fill_token("user-1")
+    assert fill_token[1] == ""
+
+    # Another worker deletes the key (bumping its generation) mid-load
+    await real_redis.delete_and_bump_generation(
+        "scripted:user-1", "scripted:generation:user-1", 60
+    )
+
+    assert not await near_cache.set_if_unchanged(
+        "user-1", {"name": "stale"}, fill_token
+    )
+    assert await real_redis.get_value("scripted:user-1") is None
+
+    assert await near_cache.set_if_unchanged(
+        "user-1", {"name": "fresh"}, await near_cache.fill_token("user-1")
+    )
+    assert await real_redis.get_value("scripted:user-1") == {"name": "fresh"}
+
+
+async def test_lock_is_released_only_by_its_owner(real_redis):
+    ownership_token = await real_redis.acquire_lock("lock:scripted", timeout_seconds=5)
+    assert ownership_token is not None
+    assert await real_redis.acquire_lock("lock:scripted", timeout_seconds=5) is None
+
+    assert not await real_redis.release_lock("lock:scripted", "someone-else")
+    assert await real_redis.release_lock("lock:scripted", ownership_token)
+    assert await real_redis.acquire_lock("lock:scripted", timeout_seconds=5) is not None
@@ -0,0 +1,282 @@
+import pytest
+from sqlalchemy import insert
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import InvalidRequestError
+
+from app.config.database import AsyncSessionLocal
+from app.core.db import DBOperationOptions, IsolationLevel, SortOrder
+from app.core.exceptions import NotFoundError, ValidationError
+from app.core.repository import Repository
+from app.models import Card, CardInteraction, LearningSession, SavedCard, Topic
+
+topic_repository = Repository(Topic)
+
+TOPICS = [
+    {"id": 1, "name": "Algebra", "category": "math", "description": "Solving for x"},
+    {
+        "id": 2,
+        "name": "algorithms",
+        "category": "computing",
+        "description": "Sorting, 100% by hand",
+    },
+    {
+        "id": 3,
+        "name": "Biology",
+        "category": "science",
+        "description": "Cells and tissue_types",
+    },
+    {
+        "id": 4,
+        "name": "Chemistry",
+        "category": "science",
+        "description": "Bonds (SOLVING included)",
+    },
+    {"id": 5, "name": "Untitled", "category": None, "description": None},
+]
+
+
+@pytest.fixture
+async def topics(database):
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Topic), TOPICS)
+        await db.commit()
+
+
+async def _topic_ids(**option_values) -> list:
+    async with AsyncSessionLocal() as db:
+        return [
+            topic.id
+            for topic in await topic_repository.list(
+                db, DBOperationOptions(**option_values)
+            )
+        ]
+
+
+@pytest.mark.parametrize(
+    "filters, expected_ids",
+    [
+        ({"category": "science"}, [3, 4]),
+        ({"category": ["math", "computing"]}, [1, 2]),
+        ({"category": None}, [5]),
+        ({"category__ne": None}, [1, 2, 3, 4]),
+        ({"category__ne": "science"}, [1, 2]),
+        ({"id__gt": 3}, [4, 5]),
+        ({"id__gte": 3, "id__lt": 5}, [3, 4]),
+        ({"id__lte": 2}, [1, 2]),
+        ({"name__like": "%gebra"}, [1]),
+        ({"name__ilike": "AL%"}, [1, 2]),
+        ({"id__in": [2, 4]}, [2, 4]),
+        ({"description__icontains": "solving"}, [1, 4]),
+        # Wildcards in the value match literally
+        ({"description__icontains": "100%"}, [2]),
+        ({"description__icontains": "e_t"}, [3]),
+        ({"description__icontains": "%"}, [2]),
+        ({"name|description__icontains": "bio"}, [3]),
+        ({"name|description__icontains": "ING"}, [1, 2, 4]),
+        ({"name|category": None}, [5]),
+    ],
+)
+async def test_filter_operators(topics, filters, expected_ids):
+    assert await _topic_ids(filters=filters) == expected_ids
+
+
+@pytest.mark.parametrize(
+    "option_values",
+    [
+        {"filters": {"colour": "red"}},
+        {"filters": {"name__startswith": "A"}},
+        {"filters": {"name|colour__icontains": "red"}},
+        {"sort_by": "colour"},
+    ],
+)
+async def test_unknown_fields_and_operators_are_rejected(topics, option_values):
+    with pytest.raises(ValidationError):
+        await _topic_ids(**option_values)
+
+
+async def test_sorting_and_paging_break_ties_on_the_primary_key(topics):
+    assert await _topic_ids(
+        sort_by="category", sort_order=SortOrder.DESC, filters={"category__ne": None}
+    ) == [3, 4, 1, 2]
+    assert await _topic_ids(
+        sort_by="category", skip=1, limit=2, filters={"category__ne": None}
+    ) == [1, 3]
+
+
+async def test_get_and_count_apply_the_same_filters(topics):
+    async with AsyncSessionLocal() as db:
+        assert (await topic_repository.get(db, 3)).name == "Biology"
+        assert (
+            await topic_repository.get(
+                db, 3, DBOperationOptions(filters={"category": "math"})
+            )
+            is None
+        )
+        with pytest.raises(NotFoundError):
+            await topic_repository.get_or_raise(db, 99)
+        assert (
+            await topic_repository.count(
+                db, DBOperationOptions(filters={"category": "science"}, limit=1)
+            )
+            == 2
+        )
+
+
+@pytest.fixture
+async def learning_data(database):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(Card), [{"id": "card-1", "total_views": 0, "total_time_spent": 0}]
+        )
+        await db.execute(insert(LearningSession), [{"id": "session-1", "user_id": 1}])
+        await db.execute(
+            insert(CardInteraction),
+            [
+                {
+                    "user_id": 1,
+                    "card_id": "card-1",
+                    "session_id": "session-1",
+                    "time_spent_seconds": 1.0,
+                }
+                for _ in range(3)
+            ],
+        )
+        await db.execute(
+            insert(SavedCard), [{"user_id": 1, "card_id": "card-1", "tags": []}]
+        )
+        await db.commit()
+
+
+async def test_collections_are_selectin_loaded_and_to_one_relations_joined(
+    learning_data,
+):
+    session_repository = Repository(LearningSession)
+    saved_card_repository = Repository(SavedCard)
+
+    statement, _ = saved_card_repository._select_statement(
+        DBOperationOptions(eager_load_relations=["card"])
+    )
+    assert "JOIN cards" in str(statement)
+
+    async with AsyncSessionLocal() as db:
+        learning_session = await session_repository.get(
+            db,
+            "session-1",
+            DBOperationOptions(
+                eager_load_relations=["card_interactions"], lazy_load=False
+            ),
+        )
+        saved_card = (
+            await saved_card_repository.list(
+                db, DBOperationOptions(eager_load_relations=["card"])
+            )
+        )[0]
+
+    # Loaded up front, so readable after the session is gone
+    assert len(learning_session.card_interactions) == 3
+    assert saved_card.card.id == "card-1"
+
+    with pytest.raises(ValidationError):
+        session_repository._select_statement(
+            DBOperationOptions(eager_load_relations=["no_such_relation"])
+        )
+
+
+async def test_lazy_load_off_raises_on_unloaded_relations(learning_data):
+    async with AsyncSessionLocal() as db:
+        learning_session = await Repository(LearningSession).get(
+            db, "session-1", DBOperationOptions(lazy_load=False)
+        )
+
+        assert "card_interactions" in sa_inspect(learning_session).unloaded
+        with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+            learning_session.card_interactions
+
+
+def test_lock_rows_selects_for_update_skip_locked():
+    statement, _ = topic_repository._select_statement(
+        DBOperationOptions(lock_rows=True, limit=10)
+    )
+
+    compiled_sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert compiled_sql.endswith("FOR UPDATE OF topics SKIP LOCKED")
+    unlocked_statement, _ = topic_repository._select_statement(
+        DBOperationOptions(limit=10)
+    )
+    assert "FOR UPDATE" not in str(
+        unlocked_statement.compile(dialect=postgresql.dialect())
+    )
+
+
+async def test_isolation_level_is_set_on_the_connection(topics):
+    async with AsyncSessionLocal() as db:
+        await topic_repository.list(
+            db, DBOperationOptions(isolation_level=IsolationLevel.READ_UNCOMMITTED)
+        )
+        connection = await db.connection()
+        assert await connection.get_isolation_level() == "READ UNCOMMITTED"
+
+    async with AsyncSessionLocal() as db:
+        await topic_repository.list(db)
+        connection = await db.connection()
+        assert await connection.get_isolation_level() == "SERIALIZABLE"
+
+
+def test_statements_are_cached_per_option_shape():
+    repository = Repository(Topic, statement_cache_size=2)
+
+    science_statement, science_parameters = repository._select_statement(
+        DBOperationOptions(filters={"category": "science"}, limit=5)
+    )
+    math_statement, math_parameters = repository._select_statement(
+        DBOperationOptions(filters={"category": "math"}, limit=10)
+    )
+    # Same shape, different values: one statement, different parameters
+    assert math_statement is science_statement
+    assert (science_parameters, math_parameters) == (
+        {"filter_0": "science", "limit": 5},
+        {"filter_0": "math", "limit": 10},
+    )
+
+    null_statement, null_parameters = repository._select_statement(
+        DBOperationOptions(filters={"category": None})
+    )
+    assert null_statement is not science_statement
+    assert null_parameters == {}
+
+    # Bounded: the least recently used shape is rebuilt
+    repository._select_statement(DBOperationOptions(sort_by="name"))
+    rebuilt_statement, _ = repository._select_statement(
+        DBOperationOptions(filters={"category": "art"}, limit=5)
+    )
+    assert rebuilt_statement is not science_statement
+    assert len(repository._statement_cache) == 2
+
+
+async def test_writes_commit_or_only_flush(database):
+    async with AsyncSessionLocal() as db:
+        created = await topic_repository.create(db, {"name": "Geology"})
+        await topic_repository.update(db, created, {"category": "science"})
+        created_id = created.id
+        flushed = await topic_repository.create(
+            db, {"name": "Draft"}, DBOperationOptions(commit=False)
+        )
+        assert flushed.id is not None
+        await db.rollback()
+
+        with pytest.raises(ValidationError):
+            await topic_repository.update(db, created, {"colour": "red"})
+
+    assert [(topic.name, topic.category) for topic in await _topics()] == [
+        ("Geology", "science")
+    ]
+
+    async with AsyncSessionLocal() as db:
+        await topic_repository.delete(db, await topic_repository.get(db, created_id))
+    assert await _topics() == []
+
+
+async def _topics() -> list:
+    async with AsyncSessionLocal() as db:
+        return await topic_repository.list(db)
@@ -0,0 +1,188 @@
+import time
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+from app.config.database import AsyncSessionLocal, engine
+from app.core.search import drop_index, install_index, topic_search
+from app.models import Topic
+
+
+@pytest.fixture
+async def search_index(database):
+    """The search index installed as the migration does, removed again after the test"""
+    async with engine.begin() as conn:
+        await conn.run_sync(install_index)
+    await topic_search.detect()
+    yield topic_search
+    async with engine.begin() as conn:
+        await conn.run_sync(drop_index)
+    topic_search.available = False
+
+
+async def _create_topics(topics) -> None:
+    """topics: (name, description, category) per topic, ids from 1"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(Topic),
+            [
+                {
+                    "id": topic_id,
+                    "name": name,
+                    "description": description,
+                    "category": category,
+                }
+                for topic_id, (name, description, category) in enumerate(
+                    topics, start=1
+                )
+            ],
+        )
+        await db.commit()
+
+
+async def test_detect_reports_a_missing_index(database):
+    assert await topic_search.detect() is False
+
+    async with AsyncSessionLocal() as db:
+        assert await topic_search.search(db, "python") is None
+
+
+async def test_install_backfills_existing_topics(database):
+    await _create_topics([("Python basics", "Variables and loops", "programming")])
+
+    async with engine.begin() as conn:
+        await conn.run_sync(install_index)
+        # A second run (a re-applied migration) leaves the index alone
+        await conn.run_sync(install_index)
+    try:
+        assert await topic_search.detect() is True
+        async with AsyncSessionLocal() as db:
+            topics, total = await topic_search.search(db, "python")
+        assert [topic.id for topic in topics] == [1]
+        assert total == 1
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(drop_index)
+        topic_search.available = False
+
+
+async def test_every_word_must_match_and_the_last_is_a_prefix(search_index):
+    await _create_topics(
+        [
+            ("Organic chemistry", "Carbon compounds", "science"),
+            ("Inorganic chemistry", "Metals and salts", "science"),
+            ("Chemical engineering", "Organic process design", "engineering"),
+        ]
+    )
+
+    async with AsyncSessionLocal() as db:
+        topics, total = await search_index.search(db, "organic chem")
+        assert {topic.id for topic in topics} == {1, 3}
+        assert total == 2
+
+        # A short last word is matched whole, not as a prefix
+        topics, total = await search_index.search(db, "organic ch")
+        assert topics == [] and total == 0
+
+
+async def test_name_matches_rank_above_description_matches(search_index):
+    await _create_topics(
+        [
+            ("World history", "Includes a unit on algebra", "history"),
+            ("Algebra", "Equations and functions", "math"),
+        ]
+    )
+
+    async with AsyncSessionLocal() as db:
+        topics, _ = await search_index.search(db, "algebra")
+
+    assert [topic.id for topic in topics] == [2, 1]
+
+
+async def test_category_paging_and_skipped_total(search_index):
+    await _create_topics(
+        [
+            (f"Music theory {index}", None, "art" if index % 2 else "music")
+            for index in range(10)
+        ]
+    )
+
+    async with AsyncSessionLocal() as db:
+        topics, total = await search_index.search(
+            db, "music", category="music", skip=2, limit=2
+        )
+        assert {topic.category for topic in topics} == {"music"}
+        assert len(topics) == 2
+        assert total == 5
+
+        topics, total = await search_index.search(db, "music", include_total=False)
+        assert len(topics) == 10
+        assert total is None
+
+        assert await search_index.search(db, "!!!") == ([], 0)
+
+
+async def test_triggers_keep_the_index_in_sync(search_index):
+    await _create_topics([("Astronomy", "Stars", "science")])
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Topic).where(Topic.id == 1).values(name="Astrophysics"))
+        await db.commit()
+        assert (await search_index.search(db, "astronomy"))[1] == 0
+        assert (await search_index.search(db, "astrophysics"))[1] == 1
+
+        await db.execute(delete(Topic).where(Topic.id == 1))
+        await db.commit()
+        assert (await search_index.search(db, "astrophysics"))[1] == 0
+
+
+async def test_index_search_is_faster_than_substring_search(search_index):
+    # The substring search the route falls back to has to scan every row
+    words = [
+        "python",
+        "biology",
+        "history",
+        "finance",
+        "design",
+        "physics",
+        "music",
+        "cooking",
+    ]
+    await _create_topics(
+        [
+            (
+                f"{words[index % 8]} {words[(index // 8) % 8]} part {index}",
+                f"Unit {index} of {words[index % 3]}",
+                None,
+            )
+            for index in range(50_000)
+        ]
+    )
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        for _ in range(20):
+            substring_topics = list(
+                (
+                    await db.scalars(
+                        select(Topic)
+                        .where(
+                            Topic.name.ilike("%music%"), Topic.name.ilike("%part 4999%")
+                        )
+                        .limit(20)
+                    )
+                ).all()
+            )
+        substring_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(20):
+            indexed_topics, _ = await search_index.search(
+                db, "music part 4999", include_total=False
+            )
+        indexed_seconds = time.perf_counter() - started
+
+    assert substring_topics and {topic.id for topic in indexed_topics} == {
+        topic.id for topic in substring_topics
+    }
+    assert indexed_seconds * 3 < substring_seconds
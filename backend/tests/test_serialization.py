@@ -0,0 +1,61 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from app.config.serialization import SerializationError, ValueSerializer
+
+TYPED_VALUE = {
+    "created_at": datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc),
+    "naive": datetime(2025, 3, 1, 12, 30, 15, 250),
+    "due": date(2025, 3, 2),
+    "id": uuid4(),
+    "score": Decimal("4.75"),
+    "nested": [{"at": datetime(2024, 1, 1)}],
+    "plain": {
+        "count": 3,
+        "ratio": 0.5,
+        "title": "Card",
+        "tags": ["a", "b"],
+        "missing": None,
+    },
+}
+
+
+def test_default_codec_preserves_value_types():
+    serializer = ValueSerializer()
+
+    assert serializer.codec_name == "msgpack"
+    assert serializer.loads(serializer.dumps(TYPED_VALUE)) == TYPED_VALUE
+
+
+@pytest.mark.parametrize("compression_name", ["none", "zstd", "lz4"])
+def test_compressed_payloads_round_trip(compression_name):
+    serializer = ValueSerializer(
+        compression_name=compression_name, compression_threshold=16
+    )
+    large_value = {"cards": [TYPED_VALUE] * 50}
+
+    assert serializer.loads(serializer.dumps(large_value)) == large_value
+
+
+def test_values_written_by_other_codecs_stay_readable():
+    reader = ValueSerializer()
+
+    for codec_name in ("json", "orjson"):
+        writer = ValueSerializer(codec_name=codec_name)
+        assert reader.loads(writer.dumps({"title": "Card", "views": 3})) == {
+            "title": "Card",
+            "views": 3,
+        }
+
+    assert reader.loads(b'{"legacy": true}') == {"legacy": True}
+
+
+def test_corrupt_payload_raises_serialization_error():
+    serializer = ValueSerializer()
+    payload = serializer.dumps({"title": "Card"})
+
+    with pytest.raises(SerializationError):
+        serializer.loads(payload[:1] + b"\xc1garbage")
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.config.database import AsyncSessionLocal
+from app.core.session_stats import load_session_stats
+from app.models import CardInteraction, LearningSession
+
+
+async def _create_session(session_id: str, user_id: int, ratings) -> None:
+    async with AsyncSessionLocal() as db:
+        db.add(LearningSession(id=session_id, user_id=user_id, topic_id=1))
+        await db.flush()
+        if ratings:
+            await db.execute(
+                insert(CardInteraction),
+                [
+                    {
+                        "user_id": user_id,
+                        "card_id": f"card-{index}",
+                        "session_id": session_id,
+                        "time_spent_seconds": 2.0 + index % 5,
+                        "confidence_rating": rating,
+                    }
+                    for index, rating in enumerate(ratings)
+                ],
+            )
+        await db.commit()
+
+
+async def _stats_in_python(db, session_id: str) -> tuple:
+    """What the endpoint used to do: load every interaction and add them up"""
+    result = await db.execute(
+        select(CardInteraction).where(CardInteraction.session_id == session_id)
+    )
+    interactions = result.scalars().all()
+    mastered_count = sum(
+        1 for interaction in interactions if (interaction.confidence_rating or 0) >= 4
+    )
+    interaction_time = sum(
+        interaction.time_spent_seconds for interaction in interactions
+    )
+    return len(interactions), mastered_count, interaction_time
+
+
+async def test_totals_match_the_interactions(database):
+    await _create_session("session-1", 1, [5, 4, 3, None, 1, 4])
+    await _create_session("session-2", 1, [5] * 3)
+
+    async with AsyncSessionLocal() as db:
+        session_stats = await load_session_stats(db, "session-1", 1)
+
+    assert session_stats.session.id == "session-1"
+    assert (
+        session_stats.interaction_count,
+        session_stats.mastered_count,
+        session_stats.interaction_time,
+    ) == (6, 3, 22.0)
+    assert session_stats.average_time_per_card == pytest.approx(22 / 6)
+    assert session_stats.completion_rate == 50.0
+
+
+async def test_session_without_interactions_has_zero_totals(database):
+    await _create_session("session-empty", 1, [])
+
+    async with AsyncSessionLocal() as db:
+        session_stats = await load_session_stats(db, "session-empty", 1)
+
+    assert (
+        session_stats.interaction_count,
+        session_stats.mastered_count,
+        session_stats.interaction_time,
+    ) == (0, 0, 0)
+    assert session_stats.average_time_per_card == 0
+    assert session_stats.completion_rate == 0
+
+
+@pytest.mark.parametrize("session_id, user_id", [("session-1", 2), ("missing", 1)])
+async def test_unknown_or_foreign_sessions_have_no_stats(database, session_id, user_id):
+    await _create_session("session-1", 1, [5])
+
+    async with AsyncSessionLocal() as db:
+        assert await load_session_stats(db, session_id, user_id) is None
+
+
+async def test_aggregate_query_beats_loading_the_interactions(database):
+    await _create_session(
+        "session-large", 1, [index % 6 or None for index in range(20_000)]
+    )
+    await _create_session("session-other", 1, [5] * 5_000)
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        for _ in range(5):
+            python_totals = await _stats_in_python(db, "session-large")
+            db.expunge_all()
+        python_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(5):
+            session_stats = await load_session_stats(db, "session-large", 1)
+        aggregate_seconds = time.perf_counter() - started
+
+    assert (
+        session_stats.interaction_count,
+        session_stats.mastered_count,
+        session_stats.interaction_time,
+    ) == python_totals
+    assert aggregate_seconds * 5 < python_seconds
@@ -0,0 +1,131 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.core.cache import invalidation_bus
+from app.core.security import (
+    RevocationList,
+    TokenClaimsCache,
+    create_access_token,
+    token_claims_cache,
+    verify_token,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_claims_cache():
+    token_claims_cache.clear()
+    yield
+    token_claims_cache.clear()
+
+
+def _verify_many(tokens, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for token in tokens:
+            assert verify_token(token) is not None
+    return time.perf_counter() - started
+
+
+def test_cached_verification_is_faster_than_decoding():
+    tokens = [create_access_token(subject=user_id) for user_id in range(50)]
+
+    # Every call on fresh tokens decodes and checks the signature
+    uncached_seconds = 0.0
+    for _ in range(20):
+        token_claims_cache.clear()
+        uncached_seconds += _verify_many(tokens, rounds=1)
+
+    _verify_many(tokens, rounds=1)
+    cached_seconds = _verify_many(tokens, rounds=20)
+
+    assert cached_seconds < uncached_seconds / 2
+    assert token_claims_cache.stats()["hits"] >= 50 * 20
+
+
+def test_expired_token_is_not_served_from_cache():
+    token = create_access_token(subject=1, expires_delta=timedelta(seconds=1))
+    assert verify_token(token) == "1"
+
+    # jose checks exp in whole seconds
+    time.sleep(2.1)
+    assert token_claims_cache.get(token) is None
+    assert verify_token(token) is None
+
+
+async def test_revoked_token_is_rejected_although_signature_is_valid(redis):
+    token = create_access_token(subject=7)
+    other_token = create_access_token(subject=7, expires_delta=timedelta(minutes=5))
+    assert verify_token(token) == "7"
+
+    await token_claims_cache.revoke_token(token)
+
+    assert verify_token(token) is None
+    assert verify_token(other_token) == "7"
+
+
+async def test_revoked_subject_rejects_older_tokens_only(redis):
+    old_token = create_access_token(subject=8)
+    assert verify_token(old_token) == "8"
+
+    await token_claims_cache.revoke_subject(8)
+    time.sleep(0.001)
+    new_token = create_access_token(subject=8)
+
+    assert verify_token(old_token) is None
+    assert verify_token(new_token) == "8"
+
+
+def test_revocations_from_other_workers_are_applied():
+    token = create_access_token(subject=9)
+    assert verify_token(token) == "9"
+
+    namespace = token_claims_cache.REVOCATION_NAMESPACE
+    invalidation_bus.handle_message(f"other-worker|{namespace}|subject:{time.time()}:9")
+
+    assert verify_token(token) is None
+
+
+async def test_revocations_survive_claims_cache_pressure(redis, monkeypatch):
+    # Keep the application's cache as the handler of revocations from other workers
+    namespace = TokenClaimsCache.REVOCATION_NAMESPACE
+    monkeypatch.setitem(
+        invalidation_bus._handlers, namespace, invalidation_bus._handlers[namespace]
+    )
+    claims_cache = TokenClaimsCache(max_size=2)
+    revoked_token = create_access_token(subject=10)
+    await claims_cache.revoke_token(revoked_token)
+    await claims_cache.revoke_subject(11)
+    subject_token_claims = {
+        "sub": "11",
+        "iat": time.time() - 1,
+        "exp": time.time() + 60,
+    }
+
+    # Far more tokens than max_size are verified and revoked afterwards
+    for user_id in range(100, 200):
+        token = create_access_token(subject=user_id)
+        claims_cache.store(token, {"sub": str(user_id), "exp": time.time() + 60})
+        await claims_cache.revoke_token(token)
+
+    assert claims_cache.is_revoked(revoked_token, {"sub": "10"})
+    assert claims_cache.is_revoked("any-token", subject_token_claims)
+    assert claims_cache.stats()["revoked_tokens"] == 101
+
+
+def test_revocation_list_forgets_entries_once_expired():
+    revocations = RevocationList()
+    revocations.add("expired", 1.0, time.time() - 1)
+    revocations.add("held", 2.0, time.time() + 60)
+    # A later revocation of the same key extends it
+    revocations.add("extended", 3.0, time.time() + 0.05)
+    revocations.add("extended", 4.0, time.time() + 60)
+
+    time.sleep(0.1)
+    revocations.add("trigger-prune", 5.0, time.time() + 60)
+
+    assert "expired" not in revocations
+    assert revocations.get("held") == 2.0
+    assert revocations.get("extended") == 4.0
+    assert len(revocations) == 3
@@ -0,0 +1,111 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import insert
+
+# The routes need the request/response schemas; without them there is
+# nothing to mount
+pytest.importorskip("app.schemas.topic")
+
+from app.api.routes import topics as topic_routes
+from app.config.database import AsyncSessionLocal
+from app.core.dependencies import get_read_db
+from app.models import Topic
+
+
+async def _read_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _client() -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(topic_routes.router)
+    app.dependency_overrides[get_read_db] = _read_db
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.fixture
+async def topics(database, redis):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(Topic),
+            [
+                {"id": 1, "name": "Algebra", "category": "math"},
+                {"id": 2, "name": "Biology", "category": "science"},
+            ],
+        )
+        await db.commit()
+
+
+async def test_trending_topics_are_served_from_the_cache(topics, monkeypatch):
+    fallback_calls = []
+    original_fallback = topic_routes.trending_topics.fallback_topics
+
+    async def fallback_topics(db, limit, category=None):
+        fallback_calls.append((limit, category))
+        return await original_fallback(db, limit, category)
+
+    monkeypatch.setattr(
+        topic_routes.trending_topics, "fallback_topics", fallback_topics
+    )
+
+    async with _client() as client:
+        responses = [
+            await client.get("/topics/trending", params={"limit": 5}) for _ in range(3)
+        ]
+        science_response = await client.get(
+            "/topics/trending", params={"limit": 5, "category": "science"}
+        )
+
+    assert all(response.json() == responses[0].json() for response in responses)
+    assert [topic["name"] for topic in responses[0].json()] == ["Algebra", "Biology"]
+    assert [topic["name"] for topic in science_response.json()] == ["Biology"]
+    # Cached per limit and category
+    assert fallback_calls == [(5, None), (5, "science")]
+
+
+async def test_search_without_the_index_matches_names_and_descriptions_literally(
+    database, monkeypatch
+):
+    monkeypatch.setattr(topic_routes.topic_search, "available", False)
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(Topic),
+            [
+                {
+                    "id": 1,
+                    "name": "Percentages",
+                    "description": "What 50% of a number means",
+                },
+                {"id": 2, "name": "Snake_case", "description": "Naming things"},
+                {
+                    "id": 3,
+                    "name": "Fractions",
+                    "description": "Parts of a whole, as percentages",
+                },
+                {"id": 4, "name": "Geometry", "description": "Shapes"},
+            ],
+        )
+        await db.commit()
+
+    async with _client() as client:
+        percent_response = await client.get("/topics/", params={"search": "%"})
+        underscore_response = await client.get("/topics/", params={"search": "e_c"})
+        description_response = await client.get(
+            "/topics/", params={"search": "PERCENTAGE"}
+        )
+
+    assert [topic["name"] for topic in percent_response.json()["topics"]] == [
+        "Percentages"
+    ]
+    assert [topic["name"] for topic in underscore_response.json()["topics"]] == [
+        "Snake_case"
+    ]
+    assert [topic["name"] for topic in description_response.json()["topics"]] == [
+        "Fractions",
+        "Percentages",
+    ]
+    assert description_response.json()["total"] == 2
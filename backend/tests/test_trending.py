@@ -0,0 +1,54 @@
+from sqlalchemy import insert
+
+from app.config.database import AsyncSessionLocal
+from app.core.trending import trending_topics
+from app.models import LearningSession, Topic
+
+
+async def _create_topics_with_sessions(session_counts) -> None:
+    """session_counts: (category, number of sessions) per topic, ids from 1"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(Topic),
+            [
+                {"id": topic_id, "name": f"topic {topic_id}", "category": category}
+                for topic_id, (category, _) in enumerate(session_counts, start=1)
+            ],
+        )
+        await db.execute(
+            insert(LearningSession),
+            [
+                {
+                    "id": f"session-{topic_id}-{index}",
+                    "user_id": 1,
+                    "topic_id": topic_id,
+                }
+                for topic_id, (_, session_count) in enumerate(session_counts, start=1)
+                for index in range(session_count)
+            ],
+        )
+        await db.commit()
+
+
+async def test_fallback_ranks_topics_by_sessions(database):
+    await _create_topics_with_sessions(
+        [("art", 1), ("science", 5), ("art", 3), ("science", 0)]
+    )
+
+    async with AsyncSessionLocal() as db:
+        topics = await trending_topics.fallback_topics(db, limit=3)
+
+    assert [topic.id for topic in topics] == [2, 3, 1]
+
+
+async def test_fallback_filters_by_category_before_limiting(database):
+    # The busiest topics are all art; science still fills the page
+    await _create_topics_with_sessions(
+        [("art", 10)] * 10 + [("science", 2), ("science", 0), ("science", 1)]
+    )
+
+    async with AsyncSessionLocal() as db:
+        topics = await trending_topics.fallback_topics(db, limit=3, category="science")
+
+    assert [topic.id for topic in topics] == [11, 13, 12]
+    assert {topic.category for topic in topics} == {"science"}
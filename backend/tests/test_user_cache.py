@@ -0,0 +1,99 @@
+from datetime import datetime
+
+from app.config.database import AsyncSessionLocal
+from app.core.user_cache import UserCache
+from app.models import User
+
+
+async def _create_user(**columns) -> int:
+    async with AsyncSessionLocal() as db:
+        user = User(
+            email="ada@example.com",
+            username="ada",
+            hashed_password="bcrypt-hash",
+            **columns,
+        )
+        db.add(user)
+        await db.flush()
+        user_id = user.id
+        await db.commit()
+        return user_id
+
+
+async def test_second_lookup_is_served_from_the_cache(database, redis):
+    user_cache = UserCache()
+    user_id = await _create_user()
+
+    async with AsyncSessionLocal() as db:
+        assert (await user_cache.get_user(db, user_id)).username == "ada"
+    async with AsyncSessionLocal() as db:
+        assert (await user_cache.get_user(db, user_id)).username == "ada"
+
+    cache_stats = user_cache.stats()
+    assert cache_stats["database_loads"] == 1
+    assert cache_stats["hits"] == 1
+
+
+async def test_secret_columns_are_not_cached(database, redis):
+    user_cache = UserCache()
+    user_id = await _create_user()
+
+    async with AsyncSessionLocal() as db:
+        await user_cache.get_user(db, user_id)
+
+    cached_columns = await redis.get_value(f"{UserCache.NAMESPACE}{user_id}")
+    assert cached_columns["username"] == "ada"
+    assert "hashed_password" not in cached_columns
+    assert "hashed_password" not in await user_cache._near_cache.get(user_id)
+
+
+async def test_invalidate_drops_the_cached_user(database, redis):
+    user_cache = UserCache()
+    user_id = await _create_user()
+
+    async with AsyncSessionLocal() as db:
+        user = await user_cache.get_user(db, user_id)
+        user.full_name = "Ada Lovelace"
+        await db.commit()
+        await user_cache.invalidate(user_id)
+
+    async with AsyncSessionLocal() as db:
+        assert (await user_cache.get_user(db, user_id)).full_name == "Ada Lovelace"
+    assert user_cache.stats()["database_loads"] == 2
+
+
+async def test_user_loaded_before_an_invalidation_is_not_written_back(database, redis):
+    user_cache = UserCache()
+    user_id = await _create_user()
+
+    async with AsyncSessionLocal() as db:
+        load_user = db.execute
+
+        async def load_then_invalidate(*args, **kwargs):
+            # A writer commits and invalidates while this reader holds the old row
+            loaded = await load_user(*args, **kwargs)
+            await user_cache.invalidate(user_id)
+            return loaded
+
+        db.execute = load_then_invalidate
+        assert await user_cache.get_user(db, user_id) is not None
+
+    assert await redis.get_value(f"{UserCache.NAMESPACE}{user_id}") is None
+    assert await user_cache._near_cache.get(user_id) is None
+    assert user_cache.stats()["rejected_fills"] == 1
+
+
+async def test_users_rebuilt_from_redis_keep_column_types(database, redis):
+    user_id = await _create_user()
+
+    async with AsyncSessionLocal() as db:
+        loaded_user = await UserCache().get_user(db, user_id)
+        created_at = loaded_user.created_at
+
+    # A fresh instance has an empty local tier, so this hit comes from Redis
+    async with AsyncSessionLocal() as db:
+        cached_user = await UserCache().get_user(db, user_id)
+
+    assert isinstance(cached_user.created_at, datetime)
+    assert cached_user.created_at == created_at
+    assert cached_user.is_active is True